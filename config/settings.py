@@ -8,12 +8,49 @@ REPORTS_PATH = "reports"
 OCUPADOS_CATEGORIA_FILE = "ocupados_categoria_ocupacional.csv"
 OCUPADOS_GRUPO_FILE = "ocupados_grupo_ocupacional_ciuo88.csv"
 
+# Almacenamiento de datos procesados ("parquet", "arrow" o "csv")
+STORAGE_FORMAT = "parquet"
+EXPORT_CSV = False
+
+# Disposición de los datasets procesados: "wide" (códigos y descripciones por fila)
+# o "star" (tabla de hechos con claves enteras y una tabla de dimensión por eje)
+STORAGE_LAYOUT = "wide"
+
+# Snapshots versionados de datos procesados conservados para rollback
+KEEP_SNAPSHOTS = 3
+
+# Deduplicación: "row" (fila completa) o "key" (columnas de código)
+# y resolución de claves repetidas en modo "key": "first", "last" o "error"
+DEDUP_MODE = "row"
+DEDUP_KEEP = "first"
+
+# Reporte de bytes asignados por etapa de la transformación (tracemalloc)
+ETL_MEMORY_REPORT = False
+
 # Configuración de logging
 LOG_LEVEL = "INFO"
 LOG_FORMAT = "{time:YYYY-MM-DD HH:mm:ss} | {level} | {message}"
 
 # Configuración de visualización
 PLOTLY_TEMPLATE = "plotly_white"
+
+# Barras, líneas y tortas construidas directo con trazas go (sin plotly.express)
+FAST_FIGURES = True
+
+# Hilos para construir en paralelo el conjunto de gráficos del dashboard (1 = secuencial)
+CHART_WORKERS = 4
+
+# Box plots con cuartiles y bigotes calculados en el servidor (sin enviar cada fila)
+BOX_STATS = True
+BOX_MAX_OUTLIERS = 100
+
+# Trazas WebGL sobre este número de puntos y reducción LTTB de series al ancho del gráfico (px)
+WEBGL_THRESHOLD = 1000
+PLOT_WIDTH = 1200
+
+# Registro opcional de bytes enviados por cada salida de callback (log DEBUG y /health)
+PAYLOAD_METRICS = False
+
 COLORS = {
     "primary": "#1f77b4",
     "secondary": "#ff7f0e", 
@@ -26,4 +63,17 @@ COLORS = {
 # Configuración de la aplicación Dash
 DASH_HOST = "127.0.0.1"
 DASH_PORT = 8050
-DASH_DEBUG = True
+DASH_DEBUG = False
+
+# Precarga de datasets en segundo plano al iniciar el dashboard
+DASHBOARD_WARMUP = False
+
+# Lectura de datos por memory-map desde una copia Arrow compartida entre workers
+DASHBOARD_MEMORY_MAP = False
+
+# Recarga en caliente: segundos entre sondeos de los datos procesados (0 = desactivada)
+DATA_RELOAD_INTERVAL = 0
+
+# Caché de figuras del dashboard (LRU por entradas y, opcionalmente, por MB)
+FIGURE_CACHE_ENTRIES = 128
+FIGURE_CACHE_MB = None
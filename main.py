@@ -23,8 +23,9 @@ from loguru import logger
 sys.path.append(str(Path(__file__).parent / "src"))
 
 from src.etl.processors import ETLPipeline
+from src.etl.storage import DATASET_FILES
 from src.visualization.dashboard import create_dashboard
-from src.utils.helpers import PathManager
+from src.utils.helpers import PathManager, ConfigManager
 
 
 def setup_logging():
@@ -46,13 +47,24 @@ def setup_logging():
     )
 
 
-def run_etl_pipeline(base_path: str = None):
+def run_etl_pipeline(base_path: str = None, export_csv: bool = None, force: bool = False,
+                     chunksize: int = None):
     """Ejecuta el pipeline ETL completo."""
     try:
         logger.info("=== Iniciando Pipeline ETL ===")
         
-        etl = ETLPipeline(base_path)
-        results = etl.run_full_pipeline()
+        etl = ETLPipeline(base_path, export_csv=export_csv)
+        
+        if chunksize:
+            # Modo por bloques: memoria acotada, solo se reportan conteos
+            row_counts = etl.run_streaming_pipeline(chunksize, force=force)
+            logger.info("=== Resumen de Resultados ===")
+            for dataset_name, count in row_counts.items():
+                logger.info(f"{dataset_name}: {count} registros procesados")
+            logger.info("=== Pipeline ETL Completado ===")
+            return row_counts
+        
+        results = etl.run_full_pipeline(force=force)
         
         # Mostrar resumen de resultados
         logger.info("=== Resumen de Resultados ===")
@@ -67,13 +79,17 @@ def run_etl_pipeline(base_path: str = None):
         raise
 
 
-def run_dashboard(base_path: str = None):
-    """Ejecuta el dashboard interactivo."""
+def run_dashboard(base_path: str = None, datasets: dict = None, host: str = None,
+                  port: int = None, debug: bool = None):
+    """Ejecuta el dashboard interactivo con el servidor de desarrollo.
+    
+    Para producción con varios workers usar ``wsgi.py`` (ver README).
+    """
     try:
         logger.info("=== Iniciando Dashboard Interactivo ===")
         
-        dashboard = create_dashboard(base_path)
-        dashboard.run(debug=True)
+        dashboard = create_dashboard(base_path, datasets=datasets)
+        dashboard.run(debug=debug, host=host, port=port)
         
     except Exception as e:
         logger.error(f"Error en dashboard: {e}")
@@ -114,6 +130,33 @@ def main():
         help='Puerto para el dashboard (default: 8050)'
     )
     
+    parser.add_argument(
+        '--debug',
+        action='store_true',
+        default=None,
+        help='Ejecutar el dashboard en modo debug (recarga automática y herramientas de desarrollo)'
+    )
+    
+    parser.add_argument(
+        '--export-csv',
+        action='store_true',
+        default=None,
+        help='Exportar también los datos procesados a CSV (además del formato columnar)'
+    )
+    
+    parser.add_argument(
+        '--force',
+        action='store_true',
+        help='Reprocesar todos los datasets aunque los archivos raw no hayan cambiado'
+    )
+    
+    parser.add_argument(
+        '--chunksize',
+        type=int,
+        default=None,
+        help='Procesar los archivos raw por bloques de N filas (memoria acotada)'
+    )
+    
     args = parser.parse_args()
     
     # Configurar logging
@@ -126,18 +169,35 @@ def main():
     logger.info(f"Ruta base del proyecto: {base_path}")
     logger.info(f"Modo de ejecución: {args.mode}")
     
+    datasets = None
+    
     try:
         if args.mode in ['etl', 'both']:
-            results = run_etl_pipeline(base_path)
+            chunksize = args.chunksize or ConfigManager().get('etl_chunksize')
+            results = run_etl_pipeline(
+                base_path,
+                export_csv=args.export_csv,
+                force=args.force,
+                chunksize=chunksize
+            )
             
             if args.mode == 'etl':
                 logger.info("Pipeline ETL completado. Finalizando...")
                 return
+            
+            # En modo both las partes del ETL pasan directo al dashboard
+            # (el modo por bloques solo retorna conteos y el dashboard lee del disco).
+            # La copia unificada se libera antes de bloquear en el servidor.
+            if not chunksize:
+                datasets = {name: results[name] for name in DATASET_FILES}
+            del results
         
         if args.mode in ['dashboard', 'both']:
             logger.info("Iniciando dashboard...")
             logger.info(f"Dashboard disponible en: http://{args.host}:{args.port}")
-            run_dashboard(base_path)
+            
+            run_dashboard(base_path, datasets=datasets, host=args.host,
+                          port=args.port, debug=args.debug)
     
     except KeyboardInterrupt:
         logger.info("Proceso interrumpido por el usuario")
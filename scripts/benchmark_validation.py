@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+Benchmark de validación: ColumnarValidator (vectorizado) vs OcupacionRecord por registro.
+
+Uso:
+    python scripts/benchmark_validation.py --rows 10000 100000 1000000
+
+La validación por registro con pydantic se mide sobre una muestra
+(``--record-sample``) y se extrapola linealmente al tamaño completo.
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+from typing import Iterable, Optional
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from src.models.base import OcupacionRecord
+from src.models.validation import ColumnarValidator
+
+
+def generar_datos(n_rows: int, seed: int = 0) -> pd.DataFrame:
+    """Genera un DataFrame procesado sintético con algunas violaciones."""
+    rng = np.random.default_rng(seed)
+    periodos = [f"{year}-V{month:02d}" for year in range(2010, 2025) for month in range(1, 13)]
+    grupos = [f"ISCO88_{i}" for i in range(1, 10)] + ["ISCO88_T"]
+    sexos = ["_T", "M", "F"]
+    sexo_desc = {"_T": "Ambos sexos", "M": "Hombres", "F": "Mujeres"}
+
+    periodo = rng.choice(periodos, n_rows)
+    grupo = rng.choice(grupos, n_rows)
+    sexo = rng.choice(sexos, n_rows)
+    valor = rng.integers(0, 200, n_rows).astype("int32")
+
+    # Inyectar ~0.1% de valores negativos
+    valor[rng.random(n_rows) < 0.001] = -1
+
+    return pd.DataFrame({
+        "trimestre_movil": pd.Categorical(periodo),
+        "trimestre_movil_desc": pd.Categorical(periodo),
+        "region_code": pd.Categorical(["CHL14"] * n_rows),
+        "region_name": pd.Categorical(["Región de Los Ríos"] * n_rows),
+        "grupo_ocupacional_code": pd.Categorical(grupo),
+        "grupo_ocupacional_desc": pd.Categorical(grupo),
+        "sexo_code": pd.Categorical(sexo),
+        "sexo_desc": pd.Categorical(pd.Series(sexo).map(sexo_desc)),
+        "valor": valor,
+    })
+
+
+def validar_por_registro(df: pd.DataFrame) -> int:
+    """Valida fila por fila con OcupacionRecord; retorna la cantidad de errores."""
+    errores = 0
+    records = df.astype({column: str for column in df.columns if column != "valor"})
+    for row in records.rename(columns={"valor": "value"}).to_dict("records"):
+        try:
+            OcupacionRecord(**row)
+        except ValueError:
+            errores += 1
+    return errores
+
+
+def ejecutar_benchmark(sizes: Iterable[int], record_sample: int) -> None:
+    """Ejecuta el benchmark para cada tamaño e imprime los tiempos."""
+    validator = ColumnarValidator()
+
+    print(f"{'filas':>10} | {'vectorizado (s)':>15} | {'por registro (s)':>17} | {'aceleración':>11}")
+    print("-" * 64)
+
+    for n_rows in sizes:
+        df = generar_datos(n_rows)
+
+        start = time.perf_counter()
+        report = validator.validate(df)
+        vectorizado = time.perf_counter() - start
+
+        sample = df.head(min(record_sample, n_rows))
+        start = time.perf_counter()
+        validar_por_registro(sample)
+        por_registro = (time.perf_counter() - start) * n_rows / len(sample)
+
+        print(f"{n_rows:>10,} | {vectorizado:>15.4f} | {por_registro:>17.2f} | "
+              f"{por_registro / vectorizado:>10.0f}x")
+        print(f"{'':>10}   {report.summary()}")
+
+
+def parse_args(argv: Optional[Iterable[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Benchmark de validación vectorizada.")
+    parser.add_argument("--rows", type=int, nargs="+", default=[10_000, 100_000, 1_000_000],
+                        help="Tamaños de DataFrame a evaluar")
+    parser.add_argument("--record-sample", type=int, default=20_000,
+                        help="Filas a validar con pydantic antes de extrapolar")
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[Iterable[str]] = None) -> None:
+    args = parse_args(argv)
+    ejecutar_benchmark(args.rows, args.record_sample)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,166 @@
+from itertools import chain
+from typing import Dict, Iterable, List, Optional, Sequence
+import numpy as np
+import pandas as pd
+
+from .schema import order_period_categories
+
+
+# Dimensiones del cubo; cada una agrupa su código y su descripción (relación 1:1)
+CUBE_DIMENSIONS = {
+    'fuente': ['fuente'],
+    'trimestre': ['trimestre_movil', 'trimestre_movil_desc'],
+    'region': ['region_code', 'region_name'],
+    'grupo': ['grupo_ocupacional_code', 'grupo_ocupacional_desc'],
+    'sexo': ['sexo_code', 'sexo_desc'],
+}
+
+COLUMN_DIMENSIONS = {
+    column: dimension
+    for dimension, columns in CUBE_DIMENSIONS.items()
+    for column in columns
+}
+
+CUBE_COLUMNS = list(chain.from_iterable(CUBE_DIMENSIONS.values()))
+
+
+class OcupacionCube:
+    """Cubo materializado de sumas sobre fuente × trimestre × región × grupo × sexo.
+
+    Contiene todos los conjuntos de agrupación (incluidos los totales
+    marginales), de modo que una consulta recorre solo las celdas de su
+    agrupación y no las filas originales. La columna ``grouping`` es una
+    máscara de bits con las dimensiones presentes en cada celda.
+    """
+
+    VALUE_COLUMN = 'valor'
+
+    def __init__(self, cells: pd.DataFrame):
+        self.cells = cells.reset_index(drop=True)
+        groupings = self.cells['grouping'].to_numpy()
+        self._bounds = {
+            int(grouping): (int(start), int(end))
+            for grouping, start, end in zip(
+                *self._grouping_bounds(groupings)
+            )
+        }
+
+    @staticmethod
+    def _grouping_bounds(groupings: np.ndarray):
+        """Retorna inicio y fin de cada bloque contiguo de agrupación."""
+        unique = np.unique(groupings)
+        starts = np.searchsorted(groupings, unique, side='left')
+        ends = np.searchsorted(groupings, unique, side='right')
+        return unique, starts, ends
+
+    @staticmethod
+    def grouping_id(dimensions: Iterable[str]) -> int:
+        """Calcula la máscara de bits de un conjunto de dimensiones."""
+        names = list(CUBE_DIMENSIONS)
+        return sum(1 << names.index(dimension) for dimension in set(dimensions))
+
+    @classmethod
+    def build(cls, df: pd.DataFrame) -> 'OcupacionCube':
+        """Materializa el cubo a partir de las filas del dataset procesado."""
+        return cls.build_from_chunks([df])
+
+    @classmethod
+    def build_from_chunks(cls, chunks: Iterable[pd.DataFrame]) -> 'OcupacionCube':
+        """Materializa el cubo agregando bloque a bloque (memoria acotada)."""
+        partials = [
+            chunk.groupby(CUBE_COLUMNS, observed=True)[cls.VALUE_COLUMN].sum().astype('int64')
+            for chunk in chunks
+        ]
+        base = pd.concat(partials)
+        if len(partials) > 1:
+            base = base.groupby(level=CUBE_COLUMNS, observed=True).sum()
+
+        dtypes = {column: base.index.get_level_values(column).dtype for column in CUBE_COLUMNS}
+        names = list(CUBE_DIMENSIONS)
+        frames = []
+
+        for grouping in range(1 << len(names)):
+            columns = [
+                column
+                for position, dimension in enumerate(names) if grouping >> position & 1
+                for column in CUBE_DIMENSIONS[dimension]
+            ]
+
+            if columns:
+                cell = base.groupby(level=columns, observed=True).sum().reset_index()
+            else:
+                cell = pd.DataFrame({cls.VALUE_COLUMN: [base.sum()]})
+
+            # Dimensiones acumuladas: valor nulo conservando el tipo categórico
+            for column in CUBE_COLUMNS:
+                if column not in cell.columns:
+                    cell[column] = pd.Series(
+                        pd.Categorical.from_codes(np.full(len(cell), -1), dtype=dtypes[column])
+                        if isinstance(dtypes[column], pd.CategoricalDtype)
+                        else np.full(len(cell), None),
+                        index=cell.index
+                    )
+
+            cell['grouping'] = np.int8(grouping)
+            frames.append(cell[CUBE_COLUMNS + [cls.VALUE_COLUMN, 'grouping']])
+
+        # Categorías de trimestre en orden cronológico: las consultas salen ordenadas en el tiempo
+        return cls(order_period_categories(pd.concat(frames, ignore_index=True)))
+
+    def _cells_for(self, dimensions: Iterable[str]) -> pd.DataFrame:
+        """Retorna las celdas de un conjunto de agrupación."""
+        start, end = self._bounds.get(self.grouping_id(dimensions), (0, 0))
+        return self.cells.iloc[start:end]
+
+    def query(self, columns: Sequence[str] = (),
+              filters: Optional[Dict[str, List]] = None) -> pd.DataFrame:
+        """Suma ``valor`` agrupando por ``columns`` y filtrando por ``filters``.
+
+        ``filters`` asocia columnas del dataset con listas de valores
+        permitidos. Retorna un DataFrame con ``columns`` y ``valor``.
+        """
+        columns = list(dict.fromkeys(columns))
+        filters = {column: values for column, values in (filters or {}).items()
+                   if values is not None}
+
+        unknown = [column for column in chain(columns, filters) if column not in COLUMN_DIMENSIONS]
+        if unknown:
+            raise ValueError(f"Columnas no disponibles en el cubo: {unknown}")
+
+        dimensions = {COLUMN_DIMENSIONS[column] for column in chain(columns, filters)}
+        cells = self._cells_for(dimensions)
+
+        if filters:
+            mask = np.ones(len(cells), dtype=bool)
+            for column, values in filters.items():
+                mask &= cells[column].isin(values).to_numpy()
+            cells = cells[mask]
+
+        group_dimensions = {COLUMN_DIMENSIONS[column] for column in columns}
+        if not columns:
+            return pd.DataFrame({self.VALUE_COLUMN: [int(cells[self.VALUE_COLUMN].sum())]})
+
+        if group_dimensions != dimensions or len(columns) != sum(
+                len(CUBE_DIMENSIONS[dimension]) for dimension in group_dimensions):
+            # Los filtros quedan fuera de la agrupación: acumular sobre ellos
+            return (cells.groupby(columns, observed=True)[self.VALUE_COLUMN]
+                    .sum().reset_index())
+
+        return cells[columns + [self.VALUE_COLUMN]].reset_index(drop=True)
+
+    def total(self, filters: Optional[Dict[str, List]] = None) -> int:
+        """Suma total de ``valor`` bajo los filtros indicados."""
+        return int(self.query(filters=filters)[self.VALUE_COLUMN].sum())
+
+    def nunique(self, column: str, filters: Optional[Dict[str, List]] = None) -> int:
+        """Cantidad de valores distintos observados de una columna."""
+        return int(self.query([column], filters=filters)[column].nunique())
+
+    def to_frame(self) -> pd.DataFrame:
+        """Retorna las celdas para persistirlas."""
+        return self.cells
+
+    @classmethod
+    def from_frame(cls, cells: pd.DataFrame) -> 'OcupacionCube':
+        """Reconstruye el cubo desde sus celdas persistidas."""
+        return cls(order_period_categories(cells.sort_values('grouping', kind='stable')))
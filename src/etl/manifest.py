@@ -0,0 +1,113 @@
+import hashlib
+import json
+import os
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+from loguru import logger
+
+from ..utils.helpers import PathManager
+
+
+class ETLManifest:
+    """Manifiesto de huellas de archivos raw para ejecuciones incrementales del ETL."""
+
+    FILENAME = "etl_manifest.json"
+    HASH_CHUNK_SIZE = 1024 * 1024
+
+    def __init__(self, path_manager: PathManager):
+        self.path = path_manager.get_processed_data_path() / self.FILENAME
+        self.entries = self._load()
+
+    def _load(self) -> Dict[str, Any]:
+        """Carga el manifiesto existente (o uno vacío)."""
+        if not self.path.exists():
+            return {}
+        try:
+            with open(self.path, "r", encoding="utf-8") as fh:
+                return json.load(fh).get("processors", {})
+        except (OSError, ValueError) as e:
+            logger.warning(f"Manifiesto ETL ilegible, se ignorará: {e}")
+            return {}
+
+    def save(self) -> None:
+        """Persiste el manifiesto en disco de forma atómica (archivo temporal + reemplazo)."""
+        payload = {
+            "updated_at": datetime.now().isoformat(timespec="seconds"),
+            "processors": self.entries
+        }
+        tmp_path = self.path.with_name(f".{self.FILENAME}.{os.getpid()}.tmp")
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as fh:
+                json.dump(payload, fh, indent=2, ensure_ascii=False)
+            os.replace(tmp_path, self.path)
+        except OSError:
+            tmp_path.unlink(missing_ok=True)
+            raise
+
+    def discard(self) -> None:
+        """Descarta las entradas registradas desde el último ``save``."""
+        self.entries = self._load()
+
+    @classmethod
+    def fingerprint(cls, file_path: Path) -> Dict[str, Any]:
+        """Calcula hash de contenido, tamaño y mtime de un archivo."""
+        stat = file_path.stat()
+        return {
+            "sha256": cls._hash_file(file_path),
+            "size": stat.st_size,
+            "mtime_ns": stat.st_mtime_ns
+        }
+
+    @classmethod
+    def _hash_file(cls, file_path: Path) -> str:
+        """Calcula el SHA-256 del archivo leyendo por bloques."""
+        digest = hashlib.sha256()
+        with open(file_path, "rb") as fh:
+            for block in iter(lambda: fh.read(cls.HASH_CHUNK_SIZE), b""):
+                digest.update(block)
+        return digest.hexdigest()
+
+    def _input_unchanged(self, file_path: Path, recorded: Optional[Dict[str, Any]]) -> bool:
+        """Compara un archivo con su huella registrada."""
+        if not recorded or not file_path.exists():
+            return False
+
+        stat = file_path.stat()
+        if stat.st_size != recorded.get("size"):
+            return False
+
+        # Mismo tamaño y mtime: se asume sin cambios sin recalcular el hash
+        if stat.st_mtime_ns == recorded.get("mtime_ns"):
+            return True
+
+        return self._hash_file(file_path) == recorded.get("sha256")
+
+    def is_up_to_date(self, key: str, inputs: List[Path], version: str,
+                      outputs: List[Path]) -> bool:
+        """Indica si un procesador puede omitirse porque nada cambió."""
+        entry = self.entries.get(key)
+        if not entry or entry.get("version") != version:
+            return False
+
+        if not all(output.exists() for output in outputs):
+            return False
+
+        recorded_inputs = entry.get("inputs", {})
+        if set(recorded_inputs) != {str(path.name) for path in inputs}:
+            return False
+
+        return all(
+            self._input_unchanged(path, recorded_inputs.get(path.name))
+            for path in inputs
+        )
+
+    def record(self, key: str, inputs: List[Path], version: str,
+               outputs: List[Path]) -> None:
+        """Registra las huellas de una ejecución exitosa de un procesador."""
+        self.entries[key] = {
+            "version": version,
+            "inputs": {path.name: self.fingerprint(path) for path in inputs},
+            "outputs": [path.name for path in outputs],
+            "processed_at": datetime.now().isoformat(timespec="seconds")
+        }
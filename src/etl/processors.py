@@ -1,44 +1,120 @@
-from typing import Any, Dict, List
+from typing import Any, Dict, Iterator, List, Optional
+import numpy as np
 import pandas as pd
 from pathlib import Path
 from loguru import logger
 
-from ..models.base import (
-    DataProcessor, 
-    CategoriaOcupacionalRecord, 
-    GrupoOcupacionalRecord
+from ..models.base import DataProcessor
+from ..models.validation import ColumnarValidator, ValidationReport
+from ..utils.helpers import (
+    DataValidator,
+    PathManager,
+    ConfigManager,
+    KeyDeduplicator,
+    StageMemoryTracker,
+    StreamingDeduplicator
 )
-from ..utils.helpers import DataValidator, DataCleaner, PathManager
+from .manifest import ETLManifest
+from .cube import OcupacionCube, CUBE_COLUMNS
+from .schema import PERIOD_COLUMN, OcupacionSchema, concat_datasets, parse_periodo, sort_by_period
+from .storage import ProcessedDataStore, DATASET_FILES, CUBE_FILE
 
 
-class CategoriaOcupacionalProcessor(DataProcessor):
-    """Procesador específico para datos de categoría ocupacional."""
+class OcupacionProcessor(DataProcessor):
+    """Procesador base para los archivos de ocupados del INE.
+    
+    Las subclases solo definen la columna de código propia del archivo
+    (``CODE_COLUMN``) y el nombre de la fuente (``FUENTE``).
+    """
+    
+    # Incrementar al cambiar la lógica de transformación para invalidar el manifiesto
+    VERSION = "1.4.1"
+    CODE_COLUMN: str = None
+    FUENTE: str = None
     
-    def __init__(self, path_manager: PathManager):
+    DEDUP_MODES = ('row', 'key')
+    
+    def __init__(self, path_manager: PathManager, store: ProcessedDataStore = None,
+                 track_memory: Optional[bool] = None, dedup_mode: Optional[str] = None,
+                 dedup_keep: Optional[str] = None):
+        config = ConfigManager()
         self.path_manager = path_manager
+        self.store = store or ProcessedDataStore(path_manager)
         self.validator = DataValidator()
-        self.cleaner = DataCleaner()
+        self.column_validator = ColumnarValidator()
+        self.last_validation_report: ValidationReport = None
+        if track_memory is None:
+            track_memory = config.get('etl_memory_report', False)
+        self.memory_tracker = StageMemoryTracker(enabled=track_memory)
+        self.dedup_mode = dedup_mode or config.get('dedup_mode', 'row')
+        self.dedup_keep = dedup_keep or config.get('dedup_keep', 'first')
+        if self.dedup_mode not in self.DEDUP_MODES:
+            raise ValueError(f"Modo de deduplicación no soportado: {self.dedup_mode}")
+        # Identifican una observación: período, región, categoría y sexo
+        self.key_columns = [
+            'DTI_CL_TRIMESTRE_MOVIL',
+            'DTI_CL_REGION',
+            self.CODE_COLUMN,
+            'DTI_CL_SEXO'
+        ]
         self.required_columns = [
             'DTI_CL_TRIMESTRE_MOVIL',
             'Trimestre Móvil',
             'DTI_CL_REGION',
             'Región',
-            'DTI_CL_CISE',
+            self.CODE_COLUMN,
             'Grupo ocupacional',
             'DTI_CL_SEXO',
             'Sexo',
             'Value'
         ]
+        self.column_mapping = {
+            'DTI_CL_TRIMESTRE_MOVIL': 'trimestre_movil',
+            'Trimestre Móvil': 'trimestre_movil_desc',
+            'DTI_CL_REGION': 'region_code',
+            'Región': 'region_name',
+            self.CODE_COLUMN: 'grupo_ocupacional_code',
+            'Grupo ocupacional': 'grupo_ocupacional_desc',
+            'DTI_CL_SEXO': 'sexo_code',
+            'Sexo': 'sexo_desc',
+            'Value': 'valor'
+        }
+        self.schema = OcupacionSchema(self.required_columns, self.column_mapping)
+    
+    @property
+    def version(self) -> str:
+        """Versión de la salida: incluye el modo de deduplicación si no es el de fila completa."""
+        if self.dedup_mode == 'row':
+            return self.VERSION
+        return f"{self.VERSION}+{self.dedup_mode}-{self.dedup_keep}"
+    
+    def _dedup_frame(self, df: pd.DataFrame) -> pd.DataFrame:
+        """Filas con ``Value`` numérico, para que su hash no dependa del dtype del bloque."""
+        return df.assign(**{self.schema.VALUE_COLUMN: self.schema.numeric_values(df)})
+    
+    def _duplicate_mask(self, df: pd.DataFrame) -> np.ndarray:
+        """Máscara de las filas que sobreviven a la deduplicación configurada."""
+        df = self._dedup_frame(df)
+        if self.dedup_mode == 'key':
+            deduplicator = KeyDeduplicator(self.key_columns, self.schema.VALUE_COLUMN, self.dedup_keep)
+            return deduplicator.mask(df)
+        return ~df.duplicated().to_numpy()
+    
+    def _get_raw_path(self, file_path: str) -> Path:
+        """Retorna la ruta completa de un archivo raw, validando que exista."""
+        full_path = self.path_manager.get_raw_data_path() / file_path
+        
+        if not self.validator.validate_file_exists(full_path):
+            raise FileNotFoundError(f"Archivo no encontrado: {full_path}")
+        
+        return full_path
     
     def extract(self, file_path: str) -> pd.DataFrame:
         """Extrae datos del archivo CSV."""
         try:
-            full_path = self.path_manager.get_raw_data_path() / file_path
+            full_path = self._get_raw_path(file_path)
             
-            if not self.validator.validate_file_exists(full_path):
-                raise FileNotFoundError(f"Archivo no encontrado: {full_path}")
-            
-            df = pd.read_csv(full_path)
+            df = pd.read_csv(full_path, dtype=self.schema.raw_dtypes)
             logger.info(f"Datos extraídos: {len(df)} registros de {file_path}")
             
             return df
@@ -46,6 +122,12 @@ class CategoriaOcupacionalProcessor(DataProcessor):
             logger.error(f"Error extrayendo datos: {e}")
             raise
     
+    def extract_chunks(self, file_path: str, chunksize: int) -> Iterator[pd.DataFrame]:
+        """Extrae datos del archivo CSV en bloques de ``chunksize`` filas."""
+        full_path = self._get_raw_path(file_path)
+        
+        return pd.read_csv(full_path, chunksize=chunksize, dtype=self.schema.raw_dtypes)
+    
     def transform(self, df: pd.DataFrame) -> pd.DataFrame:
         """Transforma los datos extraídos."""
         try:
@@ -53,28 +135,14 @@ class CategoriaOcupacionalProcessor(DataProcessor):
             if not self.validator.validate_dataframe(df, self.required_columns):
                 raise ValueError("DataFrame no contiene las columnas requeridas")
             
-            # Limpiar datos
-            df = self.cleaner.remove_duplicates(df)
-            df = self.cleaner.clean_numeric_column(df, 'Value')
-            
-            # Renombrar columnas para consistencia
-            df = df.rename(columns={
-                'DTI_CL_TRIMESTRE_MOVIL': 'trimestre_movil',
-                'Trimestre Móvil': 'trimestre_movil_desc',
-                'DTI_CL_REGION': 'region_code',
-                'Región': 'region_name',
-                'DTI_CL_CISE': 'grupo_ocupacional_code',
-                'Grupo ocupacional': 'grupo_ocupacional_desc',
-                'DTI_CL_SEXO': 'sexo_code',
-                'Sexo': 'sexo_desc',
-                'Value': 'valor'
-            })
-            
-            # Redondear valores a enteros
-            df['valor'] = df['valor'].round(0).astype(int)
-            
-            # Agregar columna de fuente
-            df['fuente'] = 'categoria_ocupacional'
+            with self.memory_tracker.stage('duplicados'):
+                keep = self._duplicate_mask(df)
+            
+            removed = int(len(df) - keep.sum())
+            if removed:
+                logger.info(f"Eliminados {removed} registros duplicados")
+            
+            df = self._fused_transform(df, keep)
             
             logger.info(f"Datos transformados: {len(df)} registros")
             return df
@@ -83,131 +151,225 @@ class CategoriaOcupacionalProcessor(DataProcessor):
             logger.error(f"Error transformando datos: {e}")
             raise
     
+    def _fused_transform(self, df: pd.DataFrame, keep: Optional[np.ndarray] = None) -> pd.DataFrame:
+        """Limpia, valida y renombra en una sola pasada con una máscara de validez combinada.
+        
+        ``Value`` se convierte una vez; las columnas categóricas se reutilizan
+        sin copiarse y las filas inválidas (duplicadas, no numéricas, negativas
+        o que violan reglas obligatorias) se descartan con un único filtrado.
+        El resultado queda ordenado por ``periodo``.
+        """
+        valid = np.ones(len(df), dtype=bool) if keep is None else keep
+        
+        with self.memory_tracker.stage('valor'):
+            values = self.schema.numeric_values(df)
+            numeric = values >= 0
+            valid &= numeric
+            valor = np.rint(np.where(numeric, values, 0)).astype(self.schema.VALUE_DTYPE)
+        
+        with self.memory_tracker.stage('renombrado'):
+            # Las columnas ya son categóricas desde la lectura: se reutilizan sin copia
+            columns = {
+                target: df[source]
+                for source, target in self.column_mapping.items()
+                if source != self.schema.VALUE_COLUMN
+            }
+            columns['valor'] = valor
+            columns['fuente'] = pd.Categorical.from_codes(
+                np.zeros(len(df), dtype=np.int8), categories=[self.FUENTE]
+            )
+            # Índice entero del trimestre móvil: se interpreta una vez por valor distinto
+            columns[PERIOD_COLUMN] = parse_periodo(df['DTI_CL_TRIMESTRE_MOVIL'])
+            result = pd.DataFrame(columns, index=df.index, copy=False)
+        
+        with self.memory_tracker.stage('validacion'):
+            # Reglas de OcupacionRecord evaluadas de forma vectorizada
+            report = self.column_validator.validate(result)
+            self.last_validation_report = report
+            if not report.is_valid:
+                logger.warning(f"Validación de registros: {report.summary()}")
+                valid &= ~report.invalid_mask()
+        
+        with self.memory_tracker.stage('filtrado'):
+            if not valid.all():
+                result = result[valid]
+            result = sort_by_period(self.schema.apply(result))
+        
+        if self.memory_tracker.enabled:
+            logger.info(f"Memoria por etapa: {self.memory_tracker.summary()}")
+        
+        return result
+    
     def load(self, df: pd.DataFrame, output_filename: str) -> None:
         """Carga los datos transformados."""
         try:
-            output_path = self.path_manager.get_processed_data_path() / output_filename
-            df.to_csv(output_path, index=False)
+            output_path = self.store.write(df, output_filename)
             logger.info(f"Datos guardados en: {output_path}")
         except Exception as e:
             logger.error(f"Error guardando datos: {e}")
             raise
-
-
-class GrupoOcupacionalProcessor(DataProcessor):
-    """Procesador específico para datos de grupo ocupacional CIUO88."""
-    
-    def __init__(self, path_manager: PathManager):
-        self.path_manager = path_manager
-        self.validator = DataValidator()
-        self.cleaner = DataCleaner()
-        self.required_columns = [
-            'DTI_CL_TRIMESTRE_MOVIL',
-            'Trimestre Móvil',
-            'DTI_CL_REGION',
-            'Región',
-            'DTI_CL_GRUPO_OCU',
-            'Grupo ocupacional',
-            'DTI_CL_SEXO',
-            'Sexo',
-            'Value'
-        ]
     
-    def extract(self, file_path: str) -> pd.DataFrame:
-        """Extrae datos del archivo CSV."""
+    def stream(self, file_path: str, output_filename: str, chunksize: int) -> int:
+        """Procesa el archivo por bloques, agregando cada uno a la salida.
+        
+        La memoria máxima queda acotada por ``chunksize`` y no por el tamaño
+        del archivo. Los duplicados se detectan también entre bloques. Cada
+        bloque se ordena por ``periodo``, pero no la salida completa.
+        """
         try:
-            full_path = self.path_manager.get_raw_data_path() / file_path
+            if self.dedup_mode == 'key':
+                deduplicator = StreamingDeduplicator(
+                    self.key_columns, self.schema.VALUE_COLUMN, self.dedup_keep
+                )
+            else:
+                deduplicator = StreamingDeduplicator()
             
-            if not self.validator.validate_file_exists(full_path):
-                raise FileNotFoundError(f"Archivo no encontrado: {full_path}")
+            with self.store.open_writer(output_filename) as writer:
+                for chunk in self.extract_chunks(file_path, chunksize):
+                    if not self.validator.validate_dataframe(chunk, self.required_columns):
+                        raise ValueError("DataFrame no contiene las columnas requeridas")
+                    
+                    chunk = self._fused_transform(chunk, deduplicator.mask(self._dedup_frame(chunk)))
+                    if not chunk.empty:
+                        writer.append(chunk)
             
-            df = pd.read_csv(full_path)
-            logger.info(f"Datos extraídos: {len(df)} registros de {file_path}")
+            if deduplicator.removed:
+                logger.info(f"Eliminados {deduplicator.removed} registros duplicados")
+            logger.info(f"Datos procesados por bloques: {writer.rows_written} registros "
+                        f"guardados en {writer.output_path}")
             
-            return df
-        except Exception as e:
-            logger.error(f"Error extrayendo datos: {e}")
-            raise
-    
-    def transform(self, df: pd.DataFrame) -> pd.DataFrame:
-        """Transforma los datos extraídos."""
-        try:
-            # Validar columnas requeridas
-            if not self.validator.validate_dataframe(df, self.required_columns):
-                raise ValueError("DataFrame no contiene las columnas requeridas")
-            
-            # Limpiar datos
-            df = self.cleaner.remove_duplicates(df)
-            df = self.cleaner.clean_numeric_column(df, 'Value')
-            
-            # Renombrar columnas para consistencia
-            df = df.rename(columns={
-                'DTI_CL_TRIMESTRE_MOVIL': 'trimestre_movil',
-                'Trimestre Móvil': 'trimestre_movil_desc',
-                'DTI_CL_REGION': 'region_code',
-                'Región': 'region_name',
-                'DTI_CL_GRUPO_OCU': 'grupo_ocupacional_code',
-                'Grupo ocupacional': 'grupo_ocupacional_desc',
-                'DTI_CL_SEXO': 'sexo_code',
-                'Sexo': 'sexo_desc',
-                'Value': 'valor'
-            })
-            
-            # Redondear valores a enteros
-            df['valor'] = df['valor'].round(0).astype(int)
-            
-            # Agregar columna de fuente
-            df['fuente'] = 'grupo_ocupacional_ciuo88'
-            
-            logger.info(f"Datos transformados: {len(df)} registros")
-            return df
+            return writer.rows_written
             
         except Exception as e:
-            logger.error(f"Error transformando datos: {e}")
+            logger.error(f"Error procesando datos por bloques: {e}")
             raise
+
+
+class CategoriaOcupacionalProcessor(OcupacionProcessor):
+    """Procesador específico para datos de categoría ocupacional."""
     
-    def load(self, df: pd.DataFrame, output_filename: str) -> None:
-        """Carga los datos transformados."""
-        try:
-            output_path = self.path_manager.get_processed_data_path() / output_filename
-            df.to_csv(output_path, index=False)
-            logger.info(f"Datos guardados en: {output_path}")
-        except Exception as e:
-            logger.error(f"Error guardando datos: {e}")
-            raise
+    CODE_COLUMN = 'DTI_CL_CISE'
+    FUENTE = 'categoria_ocupacional'
+
+
+class GrupoOcupacionalProcessor(OcupacionProcessor):
+    """Procesador específico para datos de grupo ocupacional CIUO88."""
+    
+    CODE_COLUMN = 'DTI_CL_GRUPO_OCU'
+    FUENTE = 'grupo_ocupacional_ciuo88'
 
 
 class ETLPipeline:
     """Pipeline ETL principal que orquesta todos los procesadores."""
     
-    def __init__(self, base_path: str = None):
+    RAW_FILES = {
+        'categoria_ocupacional': "ocupados_categoria_ocupacional.csv",
+        'grupo_ocupacional': "ocupados_grupo_ocupacional_ciuo88.csv"
+    }
+    
+    def __init__(self, base_path: str = None, storage_format: str = None,
+                 export_csv: bool = None):
+        config = ConfigManager()
         self.path_manager = PathManager(base_path)
-        self.categoria_processor = CategoriaOcupacionalProcessor(self.path_manager)
-        self.grupo_processor = GrupoOcupacionalProcessor(self.path_manager)
+        self.store = ProcessedDataStore(
+            self.path_manager,
+            storage_format=storage_format or config.get('storage_format', 'parquet'),
+            export_csv=config.get('export_csv', False) if export_csv is None else export_csv,
+            keep_snapshots=config.get('keep_snapshots', 3),
+            layout=config.get('storage_layout', 'wide')
+        )
+        self.categoria_processor = CategoriaOcupacionalProcessor(self.path_manager, self.store)
+        self.grupo_processor = GrupoOcupacionalProcessor(self.path_manager, self.store)
+        self.manifest = ETLManifest(self.path_manager)
+        self.processors = {
+            'categoria_ocupacional': self.categoria_processor,
+            'grupo_ocupacional': self.grupo_processor
+        }
+        self._changed = set()
+    
+    def _manifest_paths(self, dataset_key: str):
+        """Retorna las rutas de entrada y salida que registra el manifiesto."""
+        inputs = [self.path_manager.get_raw_data_path() / self.RAW_FILES[dataset_key]]
+        outputs = [self.store.path_for(DATASET_FILES[dataset_key])]
+        return inputs, outputs
+    
+    def _output_version(self, dataset_key: str) -> str:
+        """Versión registrada en el manifiesto: la del procesador y la disposición de la salida."""
+        version = self.processors[dataset_key].version
+        return version if self.store.layout == 'wide' else f"{version}+{self.store.layout}"
+    
+    def _is_up_to_date(self, dataset_key: str) -> bool:
+        """Indica si un dataset puede reutilizarse sin reprocesar."""
+        inputs, outputs = self._manifest_paths(dataset_key)
+        
+        if self.manifest.is_up_to_date(dataset_key, inputs, self._output_version(dataset_key), outputs):
+            logger.info(f"Sin cambios en {self.RAW_FILES[dataset_key]}; se reutiliza la salida existente")
+            return True
+        return False
+    
+    def _record(self, dataset_key: str) -> None:
+        """Registra en el manifiesto una ejecución exitosa (se persiste al publicar el snapshot)."""
+        inputs, outputs = self._manifest_paths(dataset_key)
+        self.manifest.record(dataset_key, inputs, self._output_version(dataset_key), outputs)
+    
+    def _run_processor(self, dataset_key: str, force: bool = False) -> pd.DataFrame:
+        """Ejecuta un procesador, o reutiliza su salida si sus entradas no cambiaron."""
+        output_name = DATASET_FILES[dataset_key]
+        
+        if not force and self._is_up_to_date(dataset_key):
+            return self.store.read(output_name)
+        
+        processor = self.processors[dataset_key]
+        df = processor.extract(self.RAW_FILES[dataset_key])
+        df = processor.transform(df)
+        processor.load(df, output_name)
+        self._record(dataset_key)
+        self._changed.add(dataset_key)
+        
+        return df
+    
+    def _needs_cube(self) -> bool:
+        """Indica si el cubo de agregados debe (re)construirse."""
+        return bool(self._changed) or not self.store.exists(CUBE_FILE)
     
-    def run_full_pipeline(self) -> Dict[str, pd.DataFrame]:
-        """Ejecuta el pipeline completo de ETL."""
+    def _save_cube(self, cube: OcupacionCube) -> OcupacionCube:
+        """Persiste el cubo de agregados junto a los datasets procesados."""
+        output_path = self.store.write(cube.to_frame(), CUBE_FILE)
+        logger.info(f"Cubo de agregados guardado en: {output_path} ({len(cube.cells)} celdas)")
+        return cube
+    
+    def run_full_pipeline(self, force: bool = False) -> Dict[str, pd.DataFrame]:
+        """Ejecuta el pipeline completo de ETL.
+        
+        Los procesadores cuyas entradas raw y versión no cambiaron desde la
+        última ejecución se omiten, salvo que se indique ``force=True``.
+        """
         try:
             logger.info("Iniciando pipeline ETL completo")
+            self.store.begin_snapshot()
             
             # Procesar categoría ocupacional
             logger.info("Procesando datos de categoría ocupacional")
-            categoria_df = self.categoria_processor.extract("ocupados_categoria_ocupacional.csv")
-            categoria_df = self.categoria_processor.transform(categoria_df)
-            self.categoria_processor.load(categoria_df, "categoria_ocupacional_processed.csv")
+            categoria_df = self._run_processor('categoria_ocupacional', force=force)
             
             # Procesar grupo ocupacional
             logger.info("Procesando datos de grupo ocupacional")
-            grupo_df = self.grupo_processor.extract("ocupados_grupo_ocupacional_ciuo88.csv")
-            grupo_df = self.grupo_processor.transform(grupo_df)
-            self.grupo_processor.load(grupo_df, "grupo_ocupacional_processed.csv")
+            grupo_df = self._run_processor('grupo_ocupacional', force=force)
             
-            # Crear dataset unificado
+            # Crear dataset unificado (solo en memoria; se persiste únicamente como exportación CSV)
             logger.info("Creando dataset unificado")
-            unified_df = pd.concat([categoria_df, grupo_df], ignore_index=True)
-            unified_path = self.path_manager.get_processed_data_path() / "ocupacion_laboral_unified.csv"
-            unified_df.to_csv(unified_path, index=False)
+            unified_df = concat_datasets([categoria_df, grupo_df])
+            if self.store.export_csv:
+                unified_df.to_csv(self.store.write_path_for("ocupacion_laboral_unified", "csv"), index=False)
+            
+            # Materializar el cubo de agregados para el dashboard
+            if self._needs_cube():
+                logger.info("Materializando cubo de agregados")
+                self._save_cube(OcupacionCube.build(unified_df))
             
+            # Publicar atómicamente el snapshot de esta ejecución
+            self.store.publish_snapshot()
+            self.manifest.save()
             logger.info("Pipeline ETL completado exitosamente")
             
             return {
@@ -217,5 +379,54 @@ class ETLPipeline:
             }
             
         except Exception as e:
+            self.store.abort_snapshot()
+            self.manifest.discard()
+            self._changed.clear()
             logger.error(f"Error en pipeline ETL: {e}")
             raise
+    
+    def run_streaming_pipeline(self, chunksize: int, force: bool = False) -> Dict[str, int]:
+        """Ejecuta el pipeline procesando los archivos raw por bloques.
+        
+        A diferencia de ``run_full_pipeline`` no retiene los datasets en
+        memoria: retorna solo la cantidad de registros escritos por dataset.
+        """
+        try:
+            logger.info(f"Iniciando pipeline ETL por bloques de {chunksize} filas")
+            self.store.begin_snapshot()
+            
+            row_counts = {}
+            for dataset_key, processor in self.processors.items():
+                output_name = DATASET_FILES[dataset_key]
+                
+                if not force and self._is_up_to_date(dataset_key):
+                    row_counts[dataset_key] = self.store.count_rows(output_name)
+                    continue
+                
+                logger.info(f"Procesando datos de {dataset_key}")
+                row_counts[dataset_key] = processor.stream(
+                    self.RAW_FILES[dataset_key], output_name, chunksize
+                )
+                self._record(dataset_key)
+                self._changed.add(dataset_key)
+            
+            if self._needs_cube():
+                logger.info("Materializando cubo de agregados por bloques")
+                columns = CUBE_COLUMNS + [OcupacionCube.VALUE_COLUMN]
+                self._save_cube(OcupacionCube.build_from_chunks(
+                    batch
+                    for name in DATASET_FILES.values()
+                    for batch in self.store.iter_batches(name, columns=columns, batch_size=chunksize)
+                ))
+            
+            self.store.publish_snapshot()
+            self.manifest.save()
+            logger.info("Pipeline ETL por bloques completado exitosamente")
+            return row_counts
+            
+        except Exception as e:
+            self.store.abort_snapshot()
+            self.manifest.discard()
+            self._changed.clear()
+            logger.error(f"Error en pipeline ETL por bloques: {e}")
+            raise
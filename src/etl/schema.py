@@ -0,0 +1,183 @@
+import re
+from typing import Dict, List
+import numpy as np
+import pandas as pd
+
+
+# Tipos del dataset procesado, comunes a ambos procesadores. Se usan al leer
+# formatos sin tipos (CSV); coinciden con ``OcupacionSchema.processed_dtypes``.
+PROCESSED_DTYPES = {
+    'trimestre_movil': 'category',
+    'trimestre_movil_desc': 'category',
+    'region_code': 'category',
+    'region_name': 'category',
+    'grupo_ocupacional_code': 'category',
+    'grupo_ocupacional_desc': 'category',
+    'sexo_code': 'category',
+    'sexo_desc': 'category',
+    'valor': 'int32',
+    'fuente': 'category',
+    'periodo': 'int32'
+}
+
+# Trimestre móvil: código ``AAAA-Vmm`` (ventana móvil ``mm`` del año ``AAAA``)
+TRIMESTRE_COLUMN = 'trimestre_movil'
+TRIMESTRE_DESC_COLUMN = 'trimestre_movil_desc'
+PERIOD_COLUMN = 'periodo'
+TRIMESTRE_PATTERN = re.compile(r'^(\d{4})-V(\d{1,2})$')
+INVALID_PERIOD = -1
+
+
+def period_of(code) -> int:
+    """Índice entero y ordenado de un trimestre móvil (``año * 12 + ventana - 1``)."""
+    match = TRIMESTRE_PATTERN.match(str(code)) if isinstance(code, str) else None
+    if match is None:
+        return INVALID_PERIOD
+    return int(match.group(1)) * 12 + int(match.group(2)) - 1
+
+
+def parse_periodo(column: pd.Series) -> np.ndarray:
+    """Índices de período de una columna de trimestres; solo se interpretan sus valores distintos."""
+    if isinstance(column.dtype, pd.CategoricalDtype):
+        codes, values = column.cat.codes.to_numpy(), column.cat.categories
+    else:
+        codes, values = pd.factorize(column)
+
+    # Posición extra al final para el código de nulo (-1)
+    periods = np.array([period_of(value) for value in values] + [INVALID_PERIOD], dtype=np.int32)
+    return periods[codes]
+
+
+def order_period_categories(df: pd.DataFrame) -> pd.DataFrame:
+    """Ordena cronológicamente las categorías de trimestre y de su descripción.
+
+    Así los ``groupby`` sobre estas columnas entregan los períodos en orden
+    temporal y no lexicográfico. Solo se reordenan categorías, no filas.
+    """
+    if TRIMESTRE_COLUMN not in df.columns or not isinstance(df[TRIMESTRE_COLUMN].dtype, pd.CategoricalDtype):
+        return df
+
+    codes = df[TRIMESTRE_COLUMN]
+    category_periods = np.array([period_of(value) for value in codes.cat.categories], dtype=np.int32)
+    order = np.argsort(category_periods, kind='stable')
+    df = df.copy(deep=False)
+    df[TRIMESTRE_COLUMN] = codes.cat.reorder_categories(codes.cat.categories[order])
+
+    desc = df.get(TRIMESTRE_DESC_COLUMN)
+    if desc is not None and isinstance(desc.dtype, pd.CategoricalDtype):
+        code_idx = codes.cat.codes.to_numpy()
+        desc_idx = desc.cat.codes.to_numpy()
+        valid = (code_idx >= 0) & (desc_idx >= 0)
+        # Cada descripción toma el primer período en que aparece
+        first_period = pd.Series(category_periods[code_idx[valid]]).groupby(desc_idx[valid]).min()
+        desc_periods = np.full(len(desc.cat.categories), np.iinfo(np.int32).max, dtype=np.int64)
+        desc_periods[first_period.index.to_numpy()] = first_period.to_numpy()
+        desc_order = np.argsort(desc_periods, kind='stable')
+        df[TRIMESTRE_DESC_COLUMN] = desc.cat.reorder_categories(desc.cat.categories[desc_order])
+    return df
+
+
+def sort_by_period(df: pd.DataFrame) -> pd.DataFrame:
+    """Ordena las filas por período (orden estable) y las categorías cronológicamente."""
+    if PERIOD_COLUMN in df.columns:
+        periods = df[PERIOD_COLUMN].to_numpy()
+        if len(periods) > 1 and (np.diff(periods) < 0).any():
+            df = df.iloc[np.argsort(periods, kind='stable')]
+    return order_period_categories(df)
+
+
+class OcupacionSchema:
+    """Esquema explícito de tipos para los archivos de ocupados del INE.
+
+    Se deriva de las columnas requeridas de cada procesador: los códigos
+    ``DTI_CL_*`` y las descripciones de baja cardinalidad se leen como
+    categorías, y el valor se almacena como entero de 32 bits.
+    """
+
+    VALUE_COLUMN = 'Value'
+    VALUE_DTYPE = 'int32'
+
+    def __init__(self, required_columns: List[str], column_mapping: Dict[str, str]):
+        self.required_columns = list(required_columns)
+        self.column_mapping = dict(column_mapping)
+
+    @property
+    def raw_dtypes(self) -> Dict[str, str]:
+        """Tipos a usar en ``read_csv`` para las columnas raw.
+
+        ``Value`` no se fija: cada bloque lo lee como float64, o como object
+        si ese bloque trae marcadores no numéricos (p. ej. ``..``). Su dtype
+        puede variar entre bloques del mismo archivo, así que quien lo use
+        debe pasar por ``numeric_values``.
+        """
+        return {
+            column: 'category'
+            for column in self.required_columns
+            if column != self.VALUE_COLUMN
+        }
+
+    def numeric_values(self, df: pd.DataFrame) -> np.ndarray:
+        """``Value`` como float64, con los marcadores no numéricos como NaN.
+
+        No depende del dtype con que se leyó el bloque (float64 u object).
+        """
+        return pd.to_numeric(df[self.VALUE_COLUMN], errors='coerce').to_numpy(dtype='float64')
+
+    @property
+    def processed_dtypes(self) -> Dict[str, str]:
+        """Tipos de las columnas del dataset procesado (tras renombrar)."""
+        dtypes = {
+            self.column_mapping[column]: dtype
+            for column, dtype in self.raw_dtypes.items()
+            if column in self.column_mapping
+        }
+        dtypes[self.column_mapping[self.VALUE_COLUMN]] = self.VALUE_DTYPE
+        dtypes['fuente'] = 'category'
+        dtypes[PERIOD_COLUMN] = 'int32'
+        return dtypes
+
+    def apply(self, df: pd.DataFrame) -> pd.DataFrame:
+        """Convierte las columnas procesadas presentes a los tipos del esquema."""
+        conversions = {
+            column: dtype
+            for column, dtype in self.processed_dtypes.items()
+            if column in df.columns and str(df[column].dtype) != dtype
+        }
+        return df.astype(conversions) if conversions else df
+
+
+def union_categories(columns: List[pd.Series]) -> pd.Index:
+    """Une las categorías de varias columnas, conservando el orden de aparición."""
+    categories = columns[0].cat.categories
+    for column in columns[1:]:
+        categories = categories.union(column.cat.categories, sort=False)
+    return categories
+
+
+def concat_datasets(frames: List[pd.DataFrame]) -> pd.DataFrame:
+    """Concatena datasets conservando las columnas categóricas.
+
+    ``pd.concat`` convierte a ``object`` las categorías que difieren entre
+    frames; aquí se unifican antes para que el resultado siga siendo compacto.
+    """
+    frames = [df for df in frames if df is not None]
+    if not frames:
+        return pd.DataFrame()
+
+    categorical_columns = [
+        column for column in frames[0].columns
+        if all(
+            column in df.columns and isinstance(df[column].dtype, pd.CategoricalDtype)
+            for df in frames
+        )
+    ]
+
+    if categorical_columns:
+        aligned = [df.copy(deep=False) for df in frames]
+        for column in categorical_columns:
+            categories = union_categories([df[column] for df in frames])
+            for df in aligned:
+                df[column] = df[column].cat.set_categories(categories)
+        frames = aligned
+
+    return pd.concat(frames, ignore_index=True)
@@ -0,0 +1,114 @@
+import os
+import shutil
+import uuid
+from datetime import datetime
+from pathlib import Path
+from typing import Iterable, List, Optional
+from loguru import logger
+
+
+class SnapshotManager:
+    """Snapshots versionados de los datos procesados con publicación atómica.
+
+    Cada ejecución del ETL escribe en un directorio de preparación que, al
+    terminar, se renombra a ``snapshots/<id>``; luego el puntero ``CURRENT``
+    se reemplaza atómicamente. Los lectores nunca ven archivos a medio
+    escribir y los snapshots anteriores quedan disponibles para rollback.
+    """
+
+    POINTER_FILE = 'CURRENT'
+    SNAPSHOTS_DIR = 'snapshots'
+    STAGING_PREFIX = '.staging-'
+
+    def __init__(self, processed_path: Path, keep: int = 3):
+        self.processed_path = Path(processed_path)
+        self.root = self.processed_path / self.SNAPSHOTS_DIR
+        self.pointer = self.processed_path / self.POINTER_FILE
+        self.keep = max(keep, 1)
+
+    def path(self, snapshot_id: str) -> Path:
+        """Directorio de un snapshot."""
+        return self.root / snapshot_id
+
+    def current_id(self) -> Optional[str]:
+        """Id del snapshot publicado, o ``None`` si aún no hay snapshots."""
+        try:
+            snapshot_id = self.pointer.read_text(encoding='utf-8').strip()
+        except OSError:
+            return None
+        return snapshot_id if snapshot_id and self.path(snapshot_id).is_dir() else None
+
+    def list(self) -> List[str]:
+        """Ids de los snapshots publicados, del más antiguo al más reciente."""
+        if not self.root.exists():
+            return []
+        return sorted(
+            entry.name for entry in self.root.iterdir()
+            if entry.is_dir() and not entry.name.startswith(self.STAGING_PREFIX)
+        )
+
+    def create_staging(self) -> Path:
+        """Crea un directorio de preparación para una nueva ejecución."""
+        staging = self.root / f"{self.STAGING_PREFIX}{uuid.uuid4().hex}"
+        staging.mkdir(parents=True)
+        return staging
+
+    @staticmethod
+    def carry_over(source: Optional[Path], staging: Path, suffixes: Iterable[str]) -> None:
+        """Enlaza en ``staging`` los archivos de ``source`` que la ejecución no regeneró."""
+        if source is None or not source.is_dir():
+            return
+
+        produced = {path.stem for path in staging.iterdir()}
+        suffixes = set(suffixes)
+        for path in source.iterdir():
+            if not path.is_file() or path.suffix not in suffixes or path.stem in produced:
+                continue
+            target = staging / path.name
+            try:
+                os.link(path, target)
+            except OSError:
+                shutil.copy2(path, target)
+
+    def publish(self, staging: Path) -> str:
+        """Renombra el directorio de preparación a un snapshot y lo publica como actual."""
+        snapshot_id = datetime.now().strftime('%Y%m%dT%H%M%S%f')
+        os.rename(staging, self.path(snapshot_id))
+        self._set_current(snapshot_id)
+        self.prune()
+        return snapshot_id
+
+    def discard(self, staging: Path) -> None:
+        """Elimina un directorio de preparación sin publicarlo."""
+        shutil.rmtree(staging, ignore_errors=True)
+
+    def rollback(self, snapshot_id: Optional[str] = None) -> str:
+        """Vuelve a publicar un snapshot anterior (por defecto, el previo al actual)."""
+        snapshots = self.list()
+        if snapshot_id is None:
+            current = self.current_id()
+            previous = [entry for entry in snapshots if current is None or entry < current]
+            if not previous:
+                raise ValueError("No hay un snapshot anterior al actual")
+            snapshot_id = previous[-1]
+        elif snapshot_id not in snapshots:
+            raise ValueError(f"Snapshot desconocido: {snapshot_id}")
+
+        self._set_current(snapshot_id)
+        logger.info(f"Snapshot {snapshot_id} publicado nuevamente (rollback)")
+        return snapshot_id
+
+    def _set_current(self, snapshot_id: str) -> None:
+        """Reemplaza atómicamente el puntero al snapshot actual."""
+        tmp_pointer = self.pointer.with_name(f"{self.POINTER_FILE}.{os.getpid()}.tmp")
+        tmp_pointer.write_text(snapshot_id, encoding='utf-8')
+        os.replace(tmp_pointer, self.pointer)
+
+    def prune(self) -> None:
+        """Elimina los snapshots más antiguos, conservando ``keep`` y siempre el actual."""
+        current = self.current_id()
+        others = [entry for entry in self.list() if entry != current]
+        stale = others[:max(len(others) - (self.keep - 1), 0)]
+        for snapshot_id in stale:
+            shutil.rmtree(self.path(snapshot_id), ignore_errors=True)
+            logger.debug(f"Snapshot {snapshot_id} eliminado")
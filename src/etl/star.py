@@ -0,0 +1,158 @@
+from typing import Dict, List, Optional
+import numpy as np
+import pandas as pd
+
+
+# Ejes del esquema estrella: columna de código y columna descriptiva de cada dimensión
+STAR_DIMENSIONS = {
+    'trimestre': ('trimestre_movil', 'trimestre_movil_desc'),
+    'region': ('region_code', 'region_name'),
+    'grupo': ('grupo_ocupacional_code', 'grupo_ocupacional_desc'),
+    'sexo': ('sexo_code', 'sexo_desc'),
+}
+
+ID_DTYPE = 'int16'
+
+
+def id_column(axis: str) -> str:
+    """Columna de la tabla de hechos con la clave entera de un eje."""
+    return f"{axis}_id"
+
+
+def dimension_name(name: str, axis: str) -> str:
+    """Nombre del archivo de la tabla de dimensión de un eje."""
+    return f"{name}_dim_{axis}"
+
+
+def is_fact_table(columns: List[str]) -> bool:
+    """Indica si las columnas corresponden a una tabla de hechos del esquema estrella."""
+    return all(id_column(axis) in columns for axis in STAR_DIMENSIONS)
+
+
+def fact_columns(columns: Optional[List[str]]) -> Optional[List[str]]:
+    """Traduce una proyección de columnas del dataset a columnas de la tabla de hechos."""
+    if columns is None:
+        return None
+
+    dimension_of = {
+        column: axis
+        for axis, pair in STAR_DIMENSIONS.items()
+        for column in pair
+    }
+    return list(dict.fromkeys(
+        id_column(dimension_of[column]) if column in dimension_of else column
+        for column in columns
+    ))
+
+
+class StarSchemaEncoder:
+    """Separa un dataset procesado en una tabla de hechos angosta y tablas de dimensión.
+
+    Cada par (código, descripción) observado recibe una clave entera estable
+    entre bloques; la tabla de hechos guarda solo esas claves, ``valor`` y
+    ``fuente``, y las descripciones se escriben una vez por eje.
+    """
+
+    def __init__(self):
+        self._ids: Dict[str, Dict[tuple, int]] = {axis: {} for axis in STAR_DIMENSIONS}
+
+    @staticmethod
+    def _pair_codes(df: pd.DataFrame, code_column: str, desc_column: str):
+        """Factoriza los pares (código, descripción) de un bloque sobre enteros."""
+        code_idx, code_values = _codes(df[code_column])
+        desc_idx, desc_values = _codes(df[desc_column])
+        pair_keys = (code_idx.astype(np.int64) + 1) * (len(desc_values) + 1) + (desc_idx + 1)
+        inverse, uniques = pd.factorize(pair_keys)
+
+        n_desc = len(desc_values) + 1
+        pairs = [
+            (_value(code_values, key // n_desc - 1), _value(desc_values, key % n_desc - 1))
+            for key in uniques
+        ]
+        return inverse, pairs
+
+    def encode(self, df: pd.DataFrame) -> pd.DataFrame:
+        """Retorna la tabla de hechos de un bloque, registrando los pares nuevos."""
+        columns = {}
+        for axis, (code_column, desc_column) in STAR_DIMENSIONS.items():
+            inverse, pairs = self._pair_codes(df, code_column, desc_column)
+            ids = self._ids[axis]
+            lookup = np.array([ids.setdefault(pair, len(ids)) for pair in pairs], dtype=np.int64)
+            if len(ids) > np.iinfo(ID_DTYPE).max:
+                raise ValueError(f"Demasiados valores distintos en la dimensión {axis}")
+            columns[id_column(axis)] = lookup[inverse].astype(ID_DTYPE)
+
+        dimension_columns = {column for pair in STAR_DIMENSIONS.values() for column in pair}
+        for column in df.columns:
+            if column not in dimension_columns:
+                columns[column] = df[column].to_numpy() if column == 'valor' else df[column]
+        return pd.DataFrame(columns, index=df.index).reset_index(drop=True)
+
+    def dimensions(self) -> Dict[str, pd.DataFrame]:
+        """Tablas de dimensión (``id``, código, descripción) de los pares registrados."""
+        tables = {}
+        for axis, (code_column, desc_column) in STAR_DIMENSIONS.items():
+            pairs = list(self._ids[axis])
+            tables[axis] = pd.DataFrame({
+                'id': np.arange(len(pairs), dtype=ID_DTYPE),
+                code_column: pd.Series([code for code, _ in pairs], dtype='category'),
+                desc_column: pd.Series([desc for _, desc in pairs], dtype='category'),
+            })
+        return tables
+
+
+def _codes(column: pd.Series):
+    """Códigos enteros y valores de una columna (reutilizando los de una categórica)."""
+    if isinstance(column.dtype, pd.CategoricalDtype):
+        return column.cat.codes.to_numpy(), column.cat.categories
+    return pd.factorize(column)
+
+
+def _value(values, position: int):
+    """Valor en ``position`` o ``None`` para el código de nulo."""
+    return None if position < 0 else values[position]
+
+
+def _categorical(ids: np.ndarray, values: pd.Series) -> pd.Categorical:
+    """Arma una columna categórica desde las claves, sin materializar cadenas por fila."""
+    codes, categories = pd.factorize(values, sort=True)
+    if np.array_equal(codes, np.arange(len(codes))):
+        # Claves alineadas con las categorías: se reutilizan sin copiarlas
+        row_codes = ids
+    else:
+        row_codes = codes.astype(ID_DTYPE)[ids]
+    return pd.Categorical.from_codes(row_codes, categories=categories)
+
+
+def join_dimensions(fact: pd.DataFrame, dimensions: Dict[str, pd.DataFrame],
+                    columns: Optional[List[str]] = None) -> pd.DataFrame:
+    """Reconstruye las columnas de código y descripción desde las claves de la tabla de hechos.
+
+    Las columnas resultantes son categóricas: por fila solo se guardan
+    códigos enteros y cada descripción existe una única vez.
+    """
+    result = {}
+    id_columns = {id_column(axis) for axis in STAR_DIMENSIONS}
+    for axis, (code_column, desc_column) in STAR_DIMENSIONS.items():
+        key = id_column(axis)
+        if key not in fact.columns:
+            continue
+        ids = fact[key].to_numpy()
+        table = dimensions[axis].sort_values('id')
+        for column in (code_column, desc_column):
+            if columns is None or column in columns:
+                result[column] = _categorical(ids, table[column].astype(object))
+
+    for column in fact.columns:
+        if column not in id_columns:
+            result[column] = fact[column]
+
+    frame = pd.DataFrame(result, index=fact.index, copy=False)
+    order = [column for column in (columns or _wide_order(frame.columns)) if column in frame.columns]
+    return frame[order]
+
+
+def _wide_order(columns) -> List[str]:
+    """Orden de columnas del dataset procesado (códigos y descripciones antes que el resto)."""
+    dimension_columns = [column for pair in STAR_DIMENSIONS.values() for column in pair]
+    return dimension_columns + [column for column in columns if column not in dimension_columns]
@@ -0,0 +1,471 @@
+import os
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional
+import pandas as pd
+from loguru import logger
+
+from ..utils.helpers import PathManager
+from .schema import PROCESSED_DTYPES, concat_datasets
+from .snapshots import SnapshotManager
+from .star import (
+    STAR_DIMENSIONS,
+    StarSchemaEncoder,
+    dimension_name,
+    fact_columns,
+    is_fact_table,
+    join_dimensions
+)
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    PYARROW_AVAILABLE = True
+except ImportError:  # pragma: no cover - dependencia opcional
+    PYARROW_AVAILABLE = False
+
+
+DATASET_FILES = {
+    'categoria_ocupacional': 'categoria_ocupacional_processed',
+    'grupo_ocupacional': 'grupo_ocupacional_processed',
+}
+
+# Valor de la columna ``fuente`` asociado a cada dataset
+DATASET_FUENTES = {
+    'categoria_ocupacional': 'categoria_ocupacional',
+    'grupo_ocupacional': 'grupo_ocupacional_ciuo88',
+}
+
+CUBE_FILE = 'ocupacion_cube'
+
+
+def _mapped_frame(table: 'pa.Table') -> pd.DataFrame:
+    """Convierte una tabla Arrow a DataFrame reutilizando sus buffers cuando es posible.
+
+    Las columnas numéricas y los códigos de las categóricas (de un solo bloque
+    y sin nulos) quedan como vistas de solo lectura sobre el archivo mapeado;
+    el resto se copia.
+    """
+    columns = {}
+    for name, column in zip(table.column_names, table.columns):
+        if column.num_chunks != 1 or column.null_count:
+            columns[name] = column.to_pandas()
+            continue
+
+        array = column.chunk(0)
+        try:
+            if pa.types.is_dictionary(array.type):
+                columns[name] = pd.Categorical.from_codes(
+                    array.indices.to_numpy(zero_copy_only=True),
+                    dtype=pd.CategoricalDtype(array.dictionary.to_pandas(), ordered=array.type.ordered)
+                )
+            else:
+                columns[name] = array.to_numpy(zero_copy_only=True)
+        except pa.ArrowInvalid:
+            columns[name] = column.to_pandas()
+
+    return pd.DataFrame(columns, copy=False)
+
+
+class ProcessedDataStore:
+    """Almacenamiento columnar (Parquet / Arrow IPC) de datasets procesados.
+
+    Con ``layout='star'`` cada dataset se guarda como una tabla de hechos de
+    claves enteras más una tabla de dimensión por eje; al leerlo se vuelven
+    a armar las columnas de código y descripción como categóricas.
+    """
+
+    EXTENSIONS = {
+        'parquet': '.parquet',
+        'arrow': '.arrow',
+        'csv': '.csv'
+    }
+
+    LAYOUTS = ('wide', 'star')
+
+    def __init__(self, path_manager: PathManager, storage_format: str = 'parquet',
+                 export_csv: bool = False, snapshot_id: Optional[str] = None,
+                 keep_snapshots: int = 3, layout: str = 'wide'):
+        if storage_format not in self.EXTENSIONS:
+            raise ValueError(f"Formato de almacenamiento no soportado: {storage_format}")
+        if layout not in self.LAYOUTS:
+            raise ValueError(f"Disposición de almacenamiento no soportada: {layout}")
+
+        if storage_format != 'csv' and not PYARROW_AVAILABLE:
+            logger.warning("pyarrow no está instalado; se usará CSV como formato de almacenamiento")
+            storage_format = 'csv'
+
+        self.path_manager = path_manager
+        self.storage_format = storage_format
+        self.export_csv = export_csv
+        self.layout = layout
+        self.snapshots = SnapshotManager(path_manager.get_processed_data_path(), keep=keep_snapshots)
+        self.snapshot_id = snapshot_id
+        self._staging: Optional[Path] = None
+
+    @property
+    def data_dir(self) -> Path:
+        """Directorio leído: el snapshot fijado, el publicado o (sin snapshots) ``data/processed``."""
+        snapshot_id = self.snapshot_id or self.snapshots.current_id()
+        if snapshot_id:
+            return self.snapshots.path(snapshot_id)
+        return self.path_manager.get_processed_data_path()
+
+    def pinned(self) -> 'ProcessedDataStore':
+        """Store de lectura fijado al snapshot publicado actualmente."""
+        return ProcessedDataStore(
+            self.path_manager, storage_format=self.storage_format,
+            snapshot_id=self.snapshots.current_id(), keep_snapshots=self.snapshots.keep,
+            layout=self.layout
+        )
+
+    def _filename(self, name: str, storage_format: Optional[str] = None) -> str:
+        return f"{Path(name).stem}{self.EXTENSIONS[storage_format or self.storage_format]}"
+
+    def path_for(self, name: str, storage_format: Optional[str] = None) -> Path:
+        """Retorna la ruta de lectura de un dataset.
+
+        Durante una ejecución en preparación se leen primero los archivos ya
+        escritos en ella y, si no existen, los del snapshot publicado.
+        """
+        filename = self._filename(name, storage_format)
+        if self._staging is not None and (self._staging / filename).exists():
+            return self._staging / filename
+        return self.data_dir / filename
+
+    def write_path_for(self, name: str, storage_format: Optional[str] = None) -> Path:
+        """Retorna la ruta de escritura (el snapshot en preparación, si lo hay)."""
+        return (self._staging or self.data_dir) / self._filename(name, storage_format)
+
+    def begin_snapshot(self) -> None:
+        """Comienza un snapshot: las escrituras van a un directorio de preparación."""
+        if self._staging is None:
+            self._staging = self.snapshots.create_staging()
+
+    def publish_snapshot(self) -> Optional[str]:
+        """Publica atómicamente el snapshot en preparación.
+
+        Los archivos no regenerados se enlazan desde el snapshot actual y la
+        copia Arrow de los datasets procesados se escribe antes de publicar. Si la
+        ejecución no escribió nada, se descarta y se mantiene el actual.
+        """
+        staging, self._staging = self._staging, None
+        if staging is None:
+            return self.snapshots.current_id()
+
+        if not any(staging.iterdir()):
+            self.snapshots.discard(staging)
+            return self.snapshots.current_id()
+
+        self.snapshots.carry_over(self.data_dir, staging, self.EXTENSIONS.values())
+        self._write_shared_copies(staging)
+        snapshot_id = self.snapshots.publish(staging)
+        logger.info(f"Snapshot de datos procesados publicado: {snapshot_id}")
+        return snapshot_id
+
+    def abort_snapshot(self) -> None:
+        """Descarta el snapshot en preparación (p. ej. ante un error del ETL)."""
+        staging, self._staging = self._staging, None
+        if staging is not None:
+            self.snapshots.discard(staging)
+
+    def exists(self, name: str) -> bool:
+        """Indica si el dataset existe en el formato configurado."""
+        return self.path_for(name).exists()
+
+    def write(self, df: pd.DataFrame, name: str) -> Path:
+        """Escribe un dataset conservando tipos y categorías.
+
+        Fuera de una ejecución en preparación, la escritura se publica como
+        un snapshot propio para que ningún lector vea un archivo a medias.
+        """
+        if self._staging is None:
+            self.begin_snapshot()
+            try:
+                self.write(df, name)
+            except Exception:
+                self.abort_snapshot()
+                raise
+            self.publish_snapshot()
+            return self.path_for(name)
+
+        if self.uses_star(name):
+            encoder = StarSchemaEncoder()
+            output_path = self._write_frame(encoder.encode(df), name)
+            self.write_dimensions(name, encoder)
+            return output_path
+
+        return self._write_frame(df, name)
+
+    def uses_star(self, name: str) -> bool:
+        """Indica si un dataset se escribe con el esquema estrella (solo los datasets procesados)."""
+        return self.layout == 'star' and Path(name).stem in DATASET_FILES.values()
+
+    def write_dimensions(self, name: str, encoder: StarSchemaEncoder) -> None:
+        """Escribe las tablas de dimensión registradas por ``encoder``."""
+        for axis, table in encoder.dimensions().items():
+            self._write_frame(table, dimension_name(name, axis))
+
+    def _write_frame(self, df: pd.DataFrame, name: str) -> Path:
+        """Escribe un DataFrame tal cual en el formato configurado."""
+        output_path = self.write_path_for(name)
+
+        if self.storage_format == 'parquet':
+            df.to_parquet(output_path, engine='pyarrow', index=False)
+        elif self.storage_format == 'arrow':
+            self._write_arrow(df, output_path)
+        else:
+            df.to_csv(output_path, index=False)
+
+        if self.export_csv and self.storage_format != 'csv':
+            csv_path = self.write_path_for(name, 'csv')
+            df.to_csv(csv_path, index=False)
+            logger.info(f"Exportación CSV guardada en: {csv_path}")
+
+        return output_path
+
+    @staticmethod
+    def _write_arrow(df: pd.DataFrame, output_path: Path) -> None:
+        """Escribe Arrow IPC sin compresión y en un solo bloque, legible por memory-map sin copias."""
+        df.reset_index(drop=True).to_feather(
+            output_path, compression='uncompressed', chunksize=max(len(df), 1)
+        )
+
+    def _write_shared_copies(self, staging: Path) -> None:
+        """Escribe en ``staging`` la copia Arrow IPC de cada dataset procesado que aún no la tiene.
+
+        Se prepara antes de publicar: un snapshot publicado ya no se modifica.
+        Las copias de datasets sin cambios llegan enlazadas desde el snapshot anterior.
+        """
+        if self.storage_format != 'parquet':
+            return
+
+        for name in DATASET_FILES.values():
+            source_path = staging / self._filename(name)
+            shared_path = staging / self._filename(name, 'arrow')
+            if source_path.exists() and not shared_path.exists():
+                self._write_arrow(pd.read_parquet(source_path, engine='pyarrow'), shared_path)
+                logger.debug(f"Copia Arrow compartida preparada: {shared_path.name}")
+
+    def read_mapped(self, name: str, columns: Optional[List[str]] = None) -> pd.DataFrame:
+        """Lee un dataset mediante memory-map de su copia Arrow IPC (escrita al publicar el snapshot).
+
+        Varios procesos que mapean el mismo archivo comparten sus páginas en
+        memoria en vez de mantener cada uno su propia copia.
+        """
+        shared_path = self.path_for(name, 'arrow')
+        if not PYARROW_AVAILABLE or not shared_path.exists():
+            # Snapshot anterior a las copias compartidas: se lee sin compartir
+            logger.warning(f"{name} no tiene copia Arrow compartida; se lee sin memory-map")
+            return self.read(name, columns=columns)
+
+        source = pa.memory_map(str(shared_path))
+        table = pa.ipc.open_file(source).read_all()
+        star = is_fact_table(table.column_names)
+        if columns is not None:
+            table = table.select(fact_columns(columns) if star else columns)
+        frame = _mapped_frame(table)
+        return join_dimensions(frame, self.read_dimensions(name), columns) if star else frame
+
+    def open_writer(self, name: str) -> 'DatasetWriter':
+        """Abre un escritor incremental para agregar un dataset por bloques."""
+        return DatasetWriter(self, name)
+
+    def columns_of(self, name: str) -> List[str]:
+        """Columnas guardadas de un dataset, leyendo solo su esquema."""
+        input_path = self.path_for(name)
+
+        if self.storage_format == 'parquet':
+            return pq.read_schema(input_path).names
+        if self.storage_format == 'arrow':
+            with pa.memory_map(str(input_path)) as source:
+                return pa.ipc.open_file(source).schema.names
+        return list(pd.read_csv(input_path, nrows=0).columns)
+
+    def is_star(self, name: str) -> bool:
+        """Indica si un dataset guardado es una tabla de hechos del esquema estrella."""
+        return Path(name).stem in DATASET_FILES.values() and is_fact_table(self.columns_of(name))
+
+    def read_dimensions(self, name: str) -> Dict[str, pd.DataFrame]:
+        """Lee las tablas de dimensión de un dataset en esquema estrella."""
+        return {axis: self._read_frame(dimension_name(name, axis)) for axis in STAR_DIMENSIONS}
+
+    def read(self, name: str, columns: Optional[List[str]] = None) -> pd.DataFrame:
+        """Lee un dataset, opcionalmente proyectando solo algunas columnas."""
+        if self.is_star(name):
+            fact = self._read_frame(name, columns=fact_columns(columns))
+            return join_dimensions(fact, self.read_dimensions(name), columns)
+        return self._read_frame(name, columns=columns)
+
+    def _read_frame(self, name: str, columns: Optional[List[str]] = None) -> pd.DataFrame:
+        """Lee un archivo tal cual fue guardado."""
+        input_path = self.path_for(name)
+
+        if self.storage_format == 'parquet':
+            return pd.read_parquet(input_path, engine='pyarrow', columns=columns)
+        if self.storage_format == 'arrow':
+            return pd.read_feather(input_path, columns=columns)
+        return pd.read_csv(input_path, usecols=columns, dtype=PROCESSED_DTYPES)
+
+    def iter_batches(self, name: str, columns: Optional[List[str]] = None,
+                     batch_size: int = 100000) -> Iterator[pd.DataFrame]:
+        """Lee un dataset por bloques, sin cargarlo completo en memoria."""
+        if self.is_star(name):
+            dimensions = self.read_dimensions(name)
+            for batch in self._iter_frames(name, fact_columns(columns), batch_size):
+                yield join_dimensions(batch, dimensions, columns)
+            return
+
+        yield from self._iter_frames(name, columns, batch_size)
+
+    def _iter_frames(self, name: str, columns: Optional[List[str]] = None,
+                     batch_size: int = 100000) -> Iterator[pd.DataFrame]:
+        """Lee un archivo por bloques tal cual fue guardado."""
+        input_path = self.path_for(name)
+
+        if self.storage_format == 'parquet':
+            parquet_file = pq.ParquetFile(input_path)
+            for batch in parquet_file.iter_batches(batch_size=batch_size, columns=columns):
+                yield batch.to_pandas()
+        elif self.storage_format == 'arrow':
+            with pa.memory_map(str(input_path)) as source:
+                reader = pa.ipc.open_file(source)
+                for index in range(reader.num_record_batches):
+                    batch = reader.get_batch(index)
+                    if columns is not None:
+                        batch = batch.select(columns)
+                    yield batch.to_pandas()
+        else:
+            yield from pd.read_csv(input_path, usecols=columns, dtype=PROCESSED_DTYPES,
+                                   chunksize=batch_size)
+
+    def count_rows(self, name: str) -> int:
+        """Cuenta las filas de un dataset leyendo solo metadatos cuando es posible."""
+        input_path = self.path_for(name)
+
+        if self.storage_format == 'parquet':
+            return pq.ParquetFile(input_path).metadata.num_rows
+        if self.storage_format == 'arrow':
+            with pa.memory_map(str(input_path)) as source:
+                return pa.ipc.open_file(source).read_all().num_rows
+        return sum(len(chunk) for chunk in pd.read_csv(input_path, usecols=[0], chunksize=100000))
+
+    def has_datasets(self) -> bool:
+        """Indica si todos los datasets procesados están disponibles."""
+        return all(self.exists(name) for name in DATASET_FILES.values())
+
+    def read_dataset(self, key: str, columns: Optional[List[str]] = None,
+                     memory_map: bool = False) -> pd.DataFrame:
+        """Lee un dataset procesado por su clave (``categoria_ocupacional`` o ``grupo_ocupacional``)."""
+        if memory_map:
+            return self.read_mapped(DATASET_FILES[key], columns=columns)
+        return self.read(DATASET_FILES[key], columns=columns)
+
+    def signature(self) -> tuple:
+        """Firma del snapshot publicado y de los archivos (tamaño y fecha) de datasets y cubo."""
+        signature = [self.snapshot_id or self.snapshots.current_id()]
+        for name in list(DATASET_FILES.values()) + [CUBE_FILE]:
+            path = self.path_for(name)
+            stat = path.stat() if path.exists() else None
+            signature.append((name, stat.st_size, stat.st_mtime_ns) if stat else (name, None, None))
+        return tuple(signature)
+
+    def read_datasets(self, columns: Optional[List[str]] = None) -> Dict[str, pd.DataFrame]:
+        """Lee los datasets procesados y arma la vista unificada en memoria."""
+        datasets = {
+            key: self.read_dataset(key, columns=columns)
+            for key in DATASET_FILES
+        }
+        datasets['unified'] = concat_datasets(
+            [datasets['categoria_ocupacional'], datasets['grupo_ocupacional']]
+        )
+        return datasets
+
+
+class DatasetWriter:
+    """Escritor incremental que agrega bloques a un dataset sin mantenerlo en memoria."""
+
+    def __init__(self, store: ProcessedDataStore, name: str):
+        self.store = store
+        self.output_path = store.write_path_for(name)
+        self.csv_path = store.write_path_for(name, 'csv') if store.export_csv else None
+        self.name = name
+        self.encoder = StarSchemaEncoder() if store.uses_star(name) else None
+        self.rows_written = 0
+        self._schema = None
+        self._writer = None
+        self._categories = {}
+
+    def __enter__(self) -> 'DatasetWriter':
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.close()
+
+    def _align_categories(self, df: pd.DataFrame) -> pd.DataFrame:
+        """Extiende las categorías acumuladas para que cada bloque solo agregue valores nuevos.
+
+        Así los diccionarios Arrow de bloques sucesivos son extensiones del
+        anterior (deltas), lo que el formato de archivo IPC admite.
+        """
+        categorical_columns = [
+            column for column in df.columns
+            if isinstance(df[column].dtype, pd.CategoricalDtype)
+        ]
+        if not categorical_columns:
+            return df
+
+        df = df.copy(deep=False)
+        for column in categorical_columns:
+            categories = df[column].cat.categories
+            if column in self._categories:
+                categories = self._categories[column].union(categories, sort=False)
+            self._categories[column] = categories
+            df[column] = df[column].cat.set_categories(categories)
+        return df
+
+    def _open(self, table: 'pa.Table') -> None:
+        """Crea el escritor Arrow/Parquet a partir del esquema del primer bloque."""
+        # Índices de diccionario de 32 bits: un bloque posterior puede tener más categorías
+        fields = [
+            pa.field(field.name, pa.dictionary(pa.int32(), field.type.value_type))
+            if pa.types.is_dictionary(field.type) else field
+            for field in table.schema
+        ]
+        self._schema = pa.schema(fields, metadata=table.schema.metadata)
+
+        if self.store.storage_format == 'parquet':
+            self._writer = pq.ParquetWriter(self.output_path, self._schema)
+        else:
+            options = pa.ipc.IpcWriteOptions(emit_dictionary_deltas=True)
+            self._writer = pa.ipc.new_file(str(self.output_path), self._schema, options=options)
+
+    def append(self, df: pd.DataFrame) -> None:
+        """Agrega un bloque de filas al dataset."""
+        storage_format = self.store.storage_format
+        if self.encoder is not None:
+            df = self.encoder.encode(df)
+        df = self._align_categories(df)
+
+        if storage_format == 'csv':
+            df.to_csv(self.output_path, index=False, mode='a' if self.rows_written else 'w',
+                      header=not self.rows_written)
+        else:
+            if self._writer is None:
+                self._open(pa.Table.from_pandas(df, preserve_index=False))
+            table = pa.Table.from_pandas(df, schema=self._schema, preserve_index=False)
+            self._writer.write_table(table)
+
+        if self.csv_path is not None:
+            df.to_csv(self.csv_path, index=False, mode='a' if self.rows_written else 'w',
+                      header=not self.rows_written)
+
+        self.rows_written += len(df)
+
+    def close(self) -> None:
+        """Cierra el archivo de salida."""
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+        if self.encoder is not None and self.rows_written:
+            self.store.write_dimensions(self.name, self.encoder)
+            self.encoder = None
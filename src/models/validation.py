@@ -0,0 +1,150 @@
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+import numpy as np
+import pandas as pd
+
+
+# Reglas equivalentes a los validadores de ``OcupacionRecord``
+MIN_TRIMESTRE_LENGTH = 7
+
+# Tamaño máximo del espacio código × descripción para contar pares sin ordenar
+MAX_DENSE_PAIRS = 10_000_000
+
+# Pares código → descripción que deben ser consistentes
+CODE_DESCRIPTION_PAIRS = [
+    ('trimestre_movil', 'trimestre_movil_desc'),
+    ('region_code', 'region_name'),
+    ('grupo_ocupacional_code', 'grupo_ocupacional_desc'),
+    ('sexo_code', 'sexo_desc'),
+]
+
+
+@dataclass
+class ValidationReport:
+    """Reporte compacto de violaciones: posiciones de fila y conteo por regla."""
+
+    n_rows: int
+    violations: Dict[str, np.ndarray] = field(default_factory=dict)
+    enforced_rules: List[str] = field(default_factory=list)
+
+    @property
+    def counts(self) -> Dict[str, int]:
+        """Cantidad de filas que violan cada regla."""
+        return {rule: int(len(rows)) for rule, rows in self.violations.items()}
+
+    @property
+    def is_valid(self) -> bool:
+        """Indica si no hubo ninguna violación."""
+        return not any(len(rows) for rows in self.violations.values())
+
+    def invalid_mask(self) -> np.ndarray:
+        """Máscara de filas que violan alguna regla obligatoria."""
+        mask = np.zeros(self.n_rows, dtype=bool)
+        for rule in self.enforced_rules:
+            mask[self.violations.get(rule, [])] = True
+        return mask
+
+    def summary(self) -> str:
+        """Resumen legible para logging."""
+        if self.is_valid:
+            return f"{self.n_rows} registros válidos"
+        details = ", ".join(f"{rule}={count}" for rule, count in self.counts.items() if count)
+        return f"{self.n_rows} registros; violaciones: {details}"
+
+
+class ColumnarValidator:
+    """Validador vectorizado que aplica las reglas de ``OcupacionRecord`` por columna.
+
+    Evalúa cada regla como una máscara NumPy sobre la columna completa, en vez
+    de instanciar un modelo pydantic por fila.
+    """
+
+    def __init__(self, value_column: str = 'valor', trimestre_column: str = 'trimestre_movil',
+                 code_pairs: Optional[List[tuple]] = None):
+        self.value_column = value_column
+        self.trimestre_column = trimestre_column
+        self.code_pairs = CODE_DESCRIPTION_PAIRS if code_pairs is None else code_pairs
+
+    def validate(self, df: pd.DataFrame) -> ValidationReport:
+        """Valida el DataFrame y retorna el reporte de violaciones."""
+        report = ValidationReport(
+            n_rows=len(df),
+            enforced_rules=['valor_negativo', 'trimestre_invalido']
+        )
+
+        if self.value_column in df.columns:
+            values = df[self.value_column].to_numpy()
+            report.violations['valor_negativo'] = np.flatnonzero(values < 0)
+
+        if self.trimestre_column in df.columns:
+            report.violations['trimestre_invalido'] = np.flatnonzero(
+                self._invalid_trimestre_mask(df[self.trimestre_column])
+            )
+
+        for code_column, desc_column in self.code_pairs:
+            if code_column in df.columns and desc_column in df.columns:
+                report.violations[f'codigo_inconsistente:{code_column}'] = np.flatnonzero(
+                    self._inconsistent_pairs_mask(df[code_column], df[desc_column])
+                )
+
+        return report
+
+    @staticmethod
+    def _invalid_trimestre_mask(column: pd.Series) -> np.ndarray:
+        """Máscara de trimestres vacíos o más cortos que el formato mínimo."""
+        if isinstance(column.dtype, pd.CategoricalDtype):
+            # Evaluar solo las categorías y propagar por código
+            categories = column.cat.categories.astype(str)
+            invalid_categories = categories.str.len().to_numpy() < MIN_TRIMESTRE_LENGTH
+            codes = column.cat.codes.to_numpy()
+            return np.where(codes < 0, True, invalid_categories[codes])
+
+        lengths = column.astype(str).str.len().to_numpy()
+        return column.isna().to_numpy() | (lengths < MIN_TRIMESTRE_LENGTH)
+
+    @staticmethod
+    def _factorize(column: pd.Series):
+        """Códigos enteros de una columna; en categóricas se reutilizan sus códigos sin recalcular."""
+        if isinstance(column.dtype, pd.CategoricalDtype):
+            return column.cat.codes.to_numpy(), column.cat.categories
+        return pd.factorize(column)
+
+    @staticmethod
+    def _inconsistent_pairs_mask(codes: pd.Series, descriptions: pd.Series) -> np.ndarray:
+        """Marca filas cuya descripción difiere de la más frecuente para su código."""
+        code_idx, code_uniques = ColumnarValidator._factorize(codes)
+        desc_idx, desc_uniques = ColumnarValidator._factorize(descriptions)
+        mask = np.zeros(len(codes), dtype=bool)
+
+        valid = (code_idx >= 0) & (desc_idx >= 0)
+        if not valid.any():
+            return mask
+
+        n_desc = max(len(desc_uniques), 1)
+        pair_keys = code_idx[valid].astype(np.int64) * n_desc + desc_idx[valid]
+        n_keys = max(len(code_uniques), 1) * n_desc
+        if n_keys <= MAX_DENSE_PAIRS:
+            # Conteo directo por clave (sin ordenar) cuando el espacio de pares es acotado
+            dense_counts = np.bincount(pair_keys, minlength=n_keys)
+            pairs = np.flatnonzero(dense_counts)
+            counts = dense_counts[pairs]
+            positions = np.zeros(n_keys, dtype=np.int64)
+            positions[pairs] = np.arange(len(pairs))
+            inverse = positions[pair_keys]
+        else:
+            pairs, inverse, counts = np.unique(pair_keys, return_inverse=True, return_counts=True)
+
+        pair_codes = pairs // n_desc
+        if len(np.unique(pair_codes)) == len(pairs):
+            # Cada código tiene una sola descripción
+            return mask
+
+        # Par canónico por código: el más frecuente (orden por código y conteo descendente)
+        order = np.lexsort((-counts, pair_codes))
+        sorted_codes = pair_codes[order]
+        first_of_code = np.r_[True, sorted_codes[1:] != sorted_codes[:-1]]
+        canonical = np.zeros(len(pairs), dtype=bool)
+        canonical[order[first_of_code]] = True
+
+        mask[valid] = ~canonical[inverse.ravel()]
+        return mask
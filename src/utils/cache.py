@@ -0,0 +1,86 @@
+from collections import OrderedDict
+from threading import RLock
+from typing import Any, Callable, Hashable, Optional
+from loguru import logger
+
+
+class LRUCache:
+    """Caché LRU en proceso, acotada por cantidad de entradas y/o tamaño aproximado.
+
+    Es segura entre hilos (el servidor Dash atiende callbacks concurrentes).
+    El tamaño de cada entrada lo calcula ``size_of``; sin esa función solo
+    aplica el límite de entradas.
+    """
+
+    def __init__(self, max_entries: Optional[int] = 128, max_bytes: Optional[int] = None,
+                 size_of: Optional[Callable[[Any], int]] = None):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.size_of = size_of
+        self.hits = 0
+        self.misses = 0
+        self.current_bytes = 0
+        self._entries: 'OrderedDict[Hashable, tuple]' = OrderedDict()
+        self._lock = RLock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._entries
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """Retorna el valor asociado a ``key`` y lo marca como usado recientemente."""
+        with self._lock:
+            if key not in self._entries:
+                self.misses += 1
+                return default
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return self._entries[key][0]
+
+    def put(self, key: Hashable, value: Any) -> None:
+        """Guarda un valor, desalojando las entradas menos usadas si se excede el límite."""
+        size = self.size_of(value) if self.size_of and self.max_bytes else 0
+
+        with self._lock:
+            if key in self._entries:
+                self.current_bytes -= self._entries.pop(key)[1]
+
+            if self.max_bytes and size > self.max_bytes:
+                logger.debug(f"Entrada de caché omitida por tamaño ({size} bytes)")
+                return
+
+            self._entries[key] = (value, size)
+            self.current_bytes += size
+            self._evict()
+
+    def _evict(self) -> None:
+        """Desaloja entradas hasta cumplir los límites configurados."""
+        while self._entries and (
+            (self.max_entries is not None and len(self._entries) > self.max_entries)
+            or (self.max_bytes and self.current_bytes > self.max_bytes)
+        ):
+            _, (_, size) = self._entries.popitem(last=False)
+            self.current_bytes -= size
+
+    def get_or_compute(self, key: Hashable, compute: Callable[[], Any]) -> Any:
+        """Retorna el valor en caché o lo calcula y guarda."""
+        sentinel = object()
+        value = self.get(key, sentinel)
+        if value is sentinel:
+            value = compute()
+            self.put(key, value)
+        return value
+
+    def clear(self) -> None:
+        """Vacía la caché (por ejemplo, al recargar los datos)."""
+        with self._lock:
+            self._entries.clear()
+            self.current_bytes = 0
+
+    @property
+    def hit_rate(self) -> float:
+        """Proporción de consultas resueltas desde la caché."""
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
@@ -1,5 +1,8 @@
+from contextlib import contextmanager
 from pathlib import Path
-from typing import Any, Dict, List, Optional, Union
+from typing import Any, Dict, Iterator, List, Optional, Union
+import tracemalloc
+import numpy as np
 import pandas as pd
 from loguru import logger
 import sys
@@ -82,13 +85,13 @@ class DataCleaner:
         """Limpia una columna numérica."""
         try:
             # Reemplazar valores no numéricos por NaN
-            df[column] = pd.to_numeric(df[column], errors='coerce')
+            values = pd.to_numeric(df[column], errors='coerce')
             
             # Eliminar valores negativos si es necesario
-            df = df[df[column] >= 0]
+            mask = values >= 0
             
-            # Llenar valores NaN con 0
-            df[column] = df[column].fillna(0)
+            # Llenar valores NaN con 0 (sin asignar sobre una vista filtrada)
+            df = df[mask].assign(**{column: values[mask].fillna(0)})
             
             logger.info(f"Columna {column} limpiada exitosamente")
             return df
@@ -97,10 +100,14 @@ class DataCleaner:
             return df
     
     @staticmethod
-    def remove_duplicates(df: pd.DataFrame) -> pd.DataFrame:
-        """Elimina duplicados del DataFrame."""
+    def remove_duplicates(df: pd.DataFrame, subset: Optional[List[str]] = None,
+                          keep: str = 'first', value_column: Optional[str] = None) -> pd.DataFrame:
+        """Elimina duplicados del DataFrame (por fila completa o por las columnas clave ``subset``)."""
         initial_count = len(df)
-        df = df.drop_duplicates()
+        if subset is None:
+            df = df.drop_duplicates()
+        else:
+            df = df[KeyDeduplicator(subset, value_column, keep).mask(df)]
         final_count = len(df)
         
         if initial_count != final_count:
@@ -109,6 +116,176 @@ class DataCleaner:
         return df
 
 
+class KeyDeduplicator:
+    """Deduplicación por columnas clave codificadas como un único entero por fila.
+    
+    Los códigos de cada columna (los de la categoría, si ya es categórica) se
+    combinan en base mixta, sin comparar cadenas. ``keep`` elige qué fila se
+    conserva entre las de igual clave: ``'first'``, ``'last'`` o ``'error'``,
+    que falla si las filas repetidas difieren en ``value_column``.
+    """
+    
+    KEEP_MODES = ('first', 'last', 'error')
+    
+    def __init__(self, key_columns: List[str], value_column: Optional[str] = None,
+                 keep: str = 'first'):
+        if keep not in self.KEEP_MODES:
+            raise ValueError(f"Modo de conflicto no soportado: {keep}")
+        if keep == 'error' and value_column is None:
+            raise ValueError("El modo 'error' requiere la columna de valor")
+        self.key_columns = list(key_columns)
+        self.value_column = value_column
+        self.keep = keep
+    
+    def encode(self, df: pd.DataFrame) -> np.ndarray:
+        """Clave entera (int64) de cada fila; dos filas tienen igual clave si coinciden sus columnas clave."""
+        keys = np.zeros(len(df), dtype=np.int64)
+        radix = 1
+        for column in self.key_columns:
+            series = df[column]
+            if isinstance(series.dtype, pd.CategoricalDtype):
+                codes, size = series.cat.codes.to_numpy(), len(series.cat.categories)
+            else:
+                codes, uniques = pd.factorize(series)
+                size = len(uniques)
+            
+            # +1 para reservar el código 0 a los nulos (código -1)
+            size += 1
+            if radix > np.iinfo(np.int64).max // size:
+                # Demasiadas combinaciones para un int64: se recurre al hash de las columnas
+                return pd.util.hash_pandas_object(
+                    df[self.key_columns], index=False
+                ).to_numpy().view(np.int64)
+            keys += (codes.astype(np.int64) + 1) * radix
+            radix *= size
+        return keys
+    
+    def conflicts(self, df: pd.DataFrame, keys: np.ndarray) -> int:
+        """Cantidad de claves repetidas cuyas filas tienen valores distintos."""
+        repeated = pd.Series(keys).duplicated(keep=False).to_numpy()
+        if not repeated.any():
+            return 0
+        pairs = pd.DataFrame({
+            'key': keys[repeated],
+            'value': df[self.value_column].to_numpy()[repeated]
+        }).drop_duplicates()
+        return int(pairs['key'].duplicated().sum())
+    
+    def mask(self, df: pd.DataFrame) -> np.ndarray:
+        """Máscara de las filas que se conservan."""
+        keys = self.encode(df)
+        if self.keep == 'error':
+            conflicts = self.conflicts(df, keys)
+            if conflicts:
+                raise ValueError(f"{conflicts} claves duplicadas con valores distintos en {self.value_column}")
+        
+        keep = 'last' if self.keep == 'last' else 'first'
+        return ~pd.Series(keys).duplicated(keep=keep).to_numpy()
+
+
+class StreamingDeduplicator:
+    """Elimina duplicados entre bloques recordando solo el hash de cada fila vista.
+    
+    Con ``key_columns`` se compara solo la clave; como los bloques no se
+    conservan, se mantiene la primera aparición (``keep='first'``) o, con
+    ``keep='error'``, se falla si una clave repetida trae otro ``value_column``.
+    """
+    
+    def __init__(self, key_columns: Optional[List[str]] = None,
+                 value_column: Optional[str] = None, keep: str = 'first'):
+        if keep not in ('first', 'error'):
+            raise ValueError(f"Modo de conflicto no soportado por bloques: {keep}")
+        if keep == 'error' and (key_columns is None or value_column is None):
+            raise ValueError("El modo 'error' requiere columnas clave y columna de valor")
+        self.key_columns = key_columns
+        self.value_column = value_column
+        self.keep = keep
+        # Hash de cada clave vista -> hash de su valor (``None`` sin columna de valor);
+        # agregar un bloque cuesta proporcional a su tamaño, no al total visto
+        self._seen: Dict[int, Optional[int]] = {}
+        self.removed = 0
+    
+    def _check_conflicts(self, hashes: np.ndarray, values: np.ndarray) -> None:
+        """Falla si alguna clave repetida (en el bloque o en previos) trae otro valor."""
+        pairs = pd.DataFrame({'key': hashes, 'value': values}).drop_duplicates()
+        conflicts = int(pairs['key'].duplicated().sum())
+        
+        seen = self._seen
+        conflicts += sum(
+            1 for key, value in zip(hashes.tolist(), values.tolist())
+            if seen.get(key, value) != value
+        )
+        
+        if conflicts:
+            raise ValueError(f"{conflicts} claves duplicadas con valores distintos en {self.value_column}")
+    
+    def mask(self, df: pd.DataFrame) -> np.ndarray:
+        """Máscara de las filas del bloque que no aparecieron antes (en este ni en previos)."""
+        hashed = df if self.key_columns is None else df[self.key_columns]
+        hashes = pd.util.hash_pandas_object(hashed, index=False).to_numpy()
+        
+        values = None
+        if self.keep == 'error':
+            values = pd.util.hash_array(df[self.value_column].to_numpy())
+            self._check_conflicts(hashes, values)
+        
+        seen = self._seen
+        keep = ~pd.Series(hashes).duplicated().to_numpy()
+        keep &= ~np.fromiter((key in seen for key in hashes.tolist()), dtype=bool, count=len(hashes))
+        
+        new_keys = hashes[keep].tolist()
+        if values is None:
+            seen.update(dict.fromkeys(new_keys))
+        else:
+            seen.update(zip(new_keys, values[keep].tolist()))
+        self.removed += int(len(df) - keep.sum())
+        
+        return keep
+    
+    def filter(self, df: pd.DataFrame) -> pd.DataFrame:
+        """Retorna las filas del bloque que no aparecieron antes (en este ni en previos)."""
+        return df[self.mask(df)]
+
+
+class StageMemoryTracker:
+    """Contabiliza con ``tracemalloc`` los bytes asignados en cada etapa de un proceso.
+    
+    Deshabilitado no tiene costo. Por etapa registra los bytes que quedan
+    asignados al terminar (``retained``) y el pico transitorio (``peak``).
+    """
+    
+    def __init__(self, enabled: bool = False):
+        self.enabled = enabled
+        self.stages: Dict[str, Dict[str, int]] = {}
+    
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        """Mide las asignaciones realizadas dentro del bloque ``with``."""
+        if not self.enabled:
+            yield
+            return
+        
+        started = not tracemalloc.is_tracing()
+        if started:
+            tracemalloc.start()
+        tracemalloc.reset_peak()
+        before, _ = tracemalloc.get_traced_memory()
+        try:
+            yield
+        finally:
+            current, peak = tracemalloc.get_traced_memory()
+            self.stages[name] = {'retained': current - before, 'peak': peak - before}
+            if started:
+                tracemalloc.stop()
+    
+    def summary(self) -> str:
+        """Resumen legible para logging."""
+        return ", ".join(
+            f"{name}: {stats['retained'] / 1e6:.1f} MB (pico {stats['peak'] / 1e6:.1f} MB)"
+            for name, stats in self.stages.items()
+        )
+
+
 class ConfigManager:
     """Gestor de configuración siguiendo principios SOLID."""
     
@@ -122,8 +299,29 @@ class ConfigManager:
             'processed_data_path': os.getenv('PROCESSED_DATA_PATH', 'data/processed'),
             'log_level': os.getenv('LOG_LEVEL', 'INFO'),
             'plotly_template': os.getenv('PLOTLY_TEMPLATE', 'plotly_white'),
+            'fast_figures': os.getenv('FAST_FIGURES', 'true').lower() in ('1', 'true', 'yes'),
+            'chart_workers': int(os.getenv('CHART_WORKERS', '4')),
+            'box_stats': os.getenv('BOX_STATS', 'true').lower() in ('1', 'true', 'yes'),
+            'box_max_outliers': int(os.getenv('BOX_MAX_OUTLIERS', '100')),
+            'webgl_threshold': int(os.getenv('WEBGL_THRESHOLD', '1000')),
+            'plot_width': int(os.getenv('PLOT_WIDTH', '1200')),
+            'payload_metrics': os.getenv('PAYLOAD_METRICS', 'false').lower() in ('1', 'true', 'yes'),
             'dash_host': os.getenv('DASH_HOST', '127.0.0.1'),
             'dash_port': int(os.getenv('DASH_PORT', '8050')),
+            'dash_debug': os.getenv('DASH_DEBUG', 'false').lower() in ('1', 'true', 'yes'),
+            'storage_format': os.getenv('STORAGE_FORMAT', 'parquet'),
+            'storage_layout': os.getenv('STORAGE_LAYOUT', 'wide'),
+            'export_csv': os.getenv('EXPORT_CSV', 'false').lower() in ('1', 'true', 'yes'),
+            'keep_snapshots': int(os.getenv('KEEP_SNAPSHOTS', '3')),
+            'dedup_mode': os.getenv('DEDUP_MODE', 'row'),
+            'dedup_keep': os.getenv('DEDUP_KEEP', 'first'),
+            'etl_chunksize': int(os.getenv('ETL_CHUNKSIZE', '0')) or None,
+            'etl_memory_report': os.getenv('ETL_MEMORY_REPORT', 'false').lower() in ('1', 'true', 'yes'),
+            'figure_cache_entries': int(os.getenv('FIGURE_CACHE_ENTRIES', '128')),
+            'figure_cache_mb': float(os.getenv('FIGURE_CACHE_MB', '0')) or None,
+            'dashboard_warmup': os.getenv('DASHBOARD_WARMUP', 'false').lower() in ('1', 'true', 'yes'),
+            'data_reload_interval': float(os.getenv('DATA_RELOAD_INTERVAL', '0')) or None,
+            'dashboard_memory_map': os.getenv('DASHBOARD_MEMORY_MAP', 'false').lower() in ('1', 'true', 'yes'),
         }
     
     def get(self, key: str, default: Any = None) -> Any:
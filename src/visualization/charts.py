@@ -1,4 +1,7 @@
-from typing import Any, Dict, List, Optional
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Union
+import numpy as np
 import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
@@ -6,6 +9,11 @@ from plotly.subplots import make_subplots
 import plotly.figure_factory as ff
 from loguru import logger
 
+from ..etl.cube import OcupacionCube, CUBE_COLUMNS
+from ..etl.storage import DATASET_FUENTES
+from .figures import FastFigureBuilder
+from .downsample import lttb_indices
+from .serialization import encode_figure, to_json
 from ..models.base import Visualizer
 from ..utils.helpers import ConfigManager
 
@@ -13,9 +21,14 @@ from ..utils.helpers import ConfigManager
 class OcupacionVisualizer(Visualizer):
     """Visualizador específico para datos de ocupación laboral."""
     
+    # Gráficos que muestran filas individuales y no agregados
+    ROW_LEVEL_CHARTS = {'scatter', 'box'}
+    
     def __init__(self):
         self.config = ConfigManager()
         self.template = self.config.get('plotly_template', 'plotly_white')
+        # Barras, líneas y tortas sin pasar por plotly.express (mismas figuras, sin revalidar)
+        self.figures = FastFigureBuilder(self.template) if self.config.get('fast_figures', True) else None
         self.colors = {
             'primary': '#1f77b4',
             'secondary': '#ff7f0e', 
@@ -25,8 +38,14 @@ class OcupacionVisualizer(Visualizer):
             'danger': '#dc3545'
         }
     
-    def create_chart(self, data: pd.DataFrame, chart_type: str, **kwargs) -> go.Figure:
-        """Crea un gráfico basado en el tipo especificado."""
+    def create_chart(self, data: Union[pd.DataFrame, OcupacionCube], chart_type: str,
+                     **kwargs) -> go.Figure:
+        """Crea un gráfico basado en el tipo especificado.
+        
+        ``data`` puede ser un DataFrame o un ``OcupacionCube``; con un cubo las
+        agregaciones se resuelven sobre las celdas materializadas. El argumento
+        opcional ``filters`` ({columna: valores permitidos}) aplica a ambos.
+        """
         chart_methods = {
             'bar': self._create_bar_chart,
             'line': self._create_line_chart,
@@ -42,6 +61,35 @@ class OcupacionVisualizer(Visualizer):
         
         return chart_methods[chart_type](data, **kwargs)
     
+    @staticmethod
+    def _filter_rows(data: pd.DataFrame, filters: Optional[Dict[str, List]]) -> pd.DataFrame:
+        """Filtra un DataFrame por listas de valores permitidos."""
+        filters = {column: values for column, values in (filters or {}).items()
+                   if values is not None}
+        if not filters:
+            return data
+        
+        mask = np.ones(len(data), dtype=bool)
+        for column, values in filters.items():
+            mask &= data[column].isin(values).to_numpy()
+        return data[mask]
+    
+    def _group_sum(self, data: Union[pd.DataFrame, OcupacionCube], group_cols: List[str],
+                   value_col: str, filters: Optional[Dict[str, List]] = None) -> pd.DataFrame:
+        """Suma ``value_col`` por ``group_cols`` desde un DataFrame o un cubo."""
+        if isinstance(data, OcupacionCube):
+            return data.query(group_cols, filters=filters)
+        
+        data = self._filter_rows(data, filters)
+        return data.groupby(group_cols, observed=True)[value_col].sum().reset_index()
+    
+    def _rows(self, data: Union[pd.DataFrame, OcupacionCube],
+              filters: Optional[Dict[str, List]] = None) -> pd.DataFrame:
+        """Retorna filas al grano más fino (las celdas base en el caso de un cubo)."""
+        if isinstance(data, OcupacionCube):
+            return data.query(CUBE_COLUMNS, filters=filters)
+        return self._filter_rows(data, filters)
+    
     def _create_bar_chart(self, data: pd.DataFrame, **kwargs) -> go.Figure:
         """Crea un gráfico de barras."""
         x_col = kwargs.get('x', 'grupo_ocupacional_desc')
@@ -50,10 +98,26 @@ class OcupacionVisualizer(Visualizer):
         title = kwargs.get('title', 'Distribución por Grupo Ocupacional')
         
         # Agrupar datos si es necesario
-        if kwargs.get('aggregate', True):
-            data_agg = data.groupby([x_col, color_col])[y_col].sum().reset_index()
+        if kwargs.get('aggregate', True) or isinstance(data, OcupacionCube):
+            data_agg = self._group_sum(data, [x_col, color_col], y_col, kwargs.get('filters'))
         else:
-            data_agg = data
+            data_agg = self._filter_rows(data, kwargs.get('filters'))
+        
+        if self.figures is not None:
+            return self.figures.bar(
+                data_agg[x_col].to_numpy(),
+                data_agg[y_col].to_numpy(),
+                data_agg[color_col].to_numpy(),
+                labels=(x_col, y_col, color_col),
+                title=title,
+                colors=px.colors.qualitative.Set3,
+                layout={
+                    'xaxis': {'title': {'text': "Grupo Ocupacional"}, 'tickangle': -45},
+                    'yaxis': {'title': {'text': "Número de Ocupados (miles)"}},
+                    'legend': {'title': {'text': "Sexo"}},
+                    'height': 600,
+                },
+            )
         
         fig = px.bar(
             data_agg,
@@ -75,15 +139,76 @@ class OcupacionVisualizer(Visualizer):
         
         return fig
     
+    def _level_of_detail(self, data: pd.DataFrame, x_col: str, y_col: str, color_col: str,
+                         width: int, x_range: Optional[tuple] = None):
+        """Reduce cada serie a ~``width`` puntos con LTTB, con más detalle dentro de ``x_range``.
+        
+        ``x_range`` son posiciones de categoría del eje x (como las reporta el
+        zoom de plotly) y solo se usa si alguna serie supera ``width``: el
+        tramo visible se reduce a ``width`` puntos y el resto conserva la
+        resolución gruesa de la vista completa. Retorna las filas conservadas
+        en su orden original y el orden completo de categorías, o ``None`` si
+        no hubo que reducir.
+        """
+        series, _ = pd.factorize(data[color_col])
+        if np.bincount(series[series >= 0]).max(initial=0) <= width:
+            return data, None
+        
+        categories = pd.Index(pd.unique(data[x_col]))
+        positions = categories.get_indexer(data[x_col])
+        values = data[y_col].to_numpy(dtype=np.float64)
+        selected = []
+        for code in np.unique(series):
+            rows = np.flatnonzero(series == code)
+            rows = rows[np.argsort(positions[rows], kind='stable')]
+            selected.append(rows[lttb_indices(positions[rows], values[rows], width)])
+            if x_range is not None:
+                visible = rows[(positions[rows] >= np.floor(x_range[0])) & (positions[rows] <= np.ceil(x_range[1]))]
+                selected.append(visible[lttb_indices(positions[visible], values[visible], width)])
+        selected = np.unique(np.concatenate(selected)) if selected else np.array([], dtype=np.int64)
+        return data.iloc[selected], [str(category) for category in categories]
+    
     def _create_line_chart(self, data: pd.DataFrame, **kwargs) -> go.Figure:
-        """Crea un gráfico de líneas para tendencias temporales."""
+        """Crea un gráfico de líneas para tendencias temporales.
+        
+        Cada serie se reduce con LTTB a ``width`` puntos (por defecto
+        ``plot_width``); con ``x_range`` (el zoom del usuario) el tramo
+        visible recibe ``width`` puntos propios y el resto queda grueso. Sobre
+        ``webgl_threshold`` puntos se usan trazas WebGL.
+        """
         x_col = kwargs.get('x', 'trimestre_movil_desc')
         y_col = kwargs.get('y', 'valor')
         color_col = kwargs.get('color', 'sexo_desc')
         title = kwargs.get('title', 'Tendencia Temporal de Ocupación')
+        width = kwargs.get('width', self.config.get('plot_width', 1200))
         
         # Agrupar datos por periodo
-        data_agg = data.groupby([x_col, color_col])[y_col].sum().reset_index()
+        data_agg = self._group_sum(data, [x_col, color_col], y_col, kwargs.get('filters'))
+        data_agg, category_order = self._level_of_detail(
+            data_agg, x_col, y_col, color_col, width, kwargs.get('x_range')
+        )
+        use_webgl = len(data_agg) > self.config.get('webgl_threshold', 1000)
+        
+        layout = {
+            'xaxis': {'title': {'text': "Periodo"}, 'tickangle': -45},
+            'yaxis': {'title': {'text': "Número de Ocupados (miles)"}},
+            'legend': {'title': {'text': "Sexo"}},
+            'height': 500,
+        }
+        if category_order is not None:
+            # Eje con todas las categorías: las posiciones del zoom no dependen de la reducción
+            layout['xaxis'].update({'categoryorder': 'array', 'categoryarray': category_order})
+        
+        if self.figures is not None:
+            return self.figures.line(
+                data_agg[x_col].to_numpy(),
+                data_agg[y_col].to_numpy(),
+                data_agg[color_col].to_numpy(),
+                labels=(x_col, y_col, color_col),
+                title=title,
+                webgl=use_webgl,
+                layout=layout,
+            )
         
         fig = px.line(
             data_agg,
@@ -92,16 +217,11 @@ class OcupacionVisualizer(Visualizer):
             color=color_col,
             title=title,
             template=self.template,
-            markers=True
+            markers=True,
+            render_mode='webgl' if use_webgl else 'svg'
         )
         
-        fig.update_layout(
-            xaxis_title="Periodo",
-            yaxis_title="Número de Ocupados (miles)",
-            legend_title="Sexo",
-            xaxis_tickangle=-45,
-            height=500
-        )
+        fig.update_layout(**layout)
         
         return fig
     
@@ -112,7 +232,18 @@ class OcupacionVisualizer(Visualizer):
         title = kwargs.get('title', 'Distribución por Grupo Ocupacional')
         
         # Agrupar datos
-        data_agg = data.groupby(names_col)[values_col].sum().reset_index()
+        data_agg = self._group_sum(data, [names_col], values_col, kwargs.get('filters'))
+        
+        if self.figures is not None:
+            return self.figures.pie(
+                data_agg[names_col].to_numpy(),
+                data_agg[values_col].to_numpy(),
+                labels=(names_col, values_col),
+                title=title,
+                colors=px.colors.qualitative.Set3,
+                trace={'textposition': 'inside', 'textinfo': 'percent+label'},
+                layout={'height': 600},
+            )
         
         fig = px.pie(
             data_agg,
@@ -136,6 +267,11 @@ class OcupacionVisualizer(Visualizer):
         size_col = kwargs.get('size', 'valor')
         title = kwargs.get('title', 'Análisis de Dispersión')
         
+        data = self._rows(data, kwargs.get('filters'))
+        
+        # Sobre el umbral el navegador dibuja los puntos con WebGL (scattergl)
+        use_webgl = len(data) > self.config.get('webgl_threshold', 1000)
+        
         fig = px.scatter(
             data,
             x=x_col,
@@ -144,7 +280,8 @@ class OcupacionVisualizer(Visualizer):
             size=size_col,
             title=title,
             template=self.template,
-            hover_data=['grupo_ocupacional_desc']
+            hover_data=['grupo_ocupacional_desc'],
+            render_mode='webgl' if use_webgl else 'svg'
         )
         
         fig.update_layout(height=600)
@@ -158,13 +295,15 @@ class OcupacionVisualizer(Visualizer):
         values_col = kwargs.get('values', 'valor')
         title = kwargs.get('title', 'Mapa de Calor - Ocupación por Grupo y Sexo')
         
-        # Crear pivot table
+        # Crear pivot table (sobre los datos ya agregados por índice y columnas)
+        data = self._group_sum(data, [index_col, columns_col], values_col, kwargs.get('filters'))
         pivot_data = data.pivot_table(
             index=index_col,
             columns=columns_col,
             values=values_col,
             aggfunc='sum',
-            fill_value=0
+            fill_value=0,
+            observed=True
         )
         
         fig = px.imshow(
@@ -185,6 +324,16 @@ class OcupacionVisualizer(Visualizer):
         y_col = kwargs.get('y', 'valor')
         title = kwargs.get('title', 'Distribución de Valores por Sexo')
         
+        data = self._rows(data, kwargs.get('filters'))
+        
+        if self.config.get('box_stats', True):
+            groups, stats, outliers = self._box_statistics(
+                data, x_col, y_col, self.config.get('box_max_outliers', 100)
+            )
+            builder = self.figures or FastFigureBuilder(self.template)
+            return builder.box(groups, stats, outliers, labels=(x_col, y_col), title=title,
+                               layout={'height': 500})
+        
         fig = px.box(
             data,
             x=x_col,
@@ -198,6 +347,50 @@ class OcupacionVisualizer(Visualizer):
         
         return fig
     
+    @staticmethod
+    def _box_statistics(data: pd.DataFrame, x_col: str, y_col: str,
+                        max_outliers: Optional[int] = 100):
+        """Cuartiles, bigotes (1.5 IQR, como plotly) y valores atípicos por grupo.
+        
+        Los grupos quedan en orden de aparición; de los atípicos se conservan
+        a lo más ``max_outliers`` por grupo, los más alejados de la mediana.
+        """
+        codes, groups = pd.factorize(data[x_col])
+        values = data[y_col].to_numpy(dtype=np.float64)
+        valid = (codes >= 0) & ~np.isnan(values)
+        codes, values = codes[valid], values[valid]
+        
+        grouped = pd.Series(values).groupby(codes)
+        quartiles = grouped.quantile([0.25, 0.5, 0.75]).unstack()
+        present = quartiles.index.to_numpy()
+        q1, median, q3 = (quartiles[q].to_numpy() for q in (0.25, 0.5, 0.75))
+        
+        # Posición de cada fila dentro de los grupos presentes
+        slot = np.full(len(groups), -1)
+        slot[present] = np.arange(len(present))
+        rows = slot[codes]
+        iqr = q3 - q1
+        inside = (values >= (q1 - 1.5 * iqr)[rows]) & (values <= (q3 + 1.5 * iqr)[rows])
+        
+        fences = pd.Series(values[inside]).groupby(rows[inside]).agg(['min', 'max'])
+        fences = fences.reindex(np.arange(len(present)))
+        stats = {
+            'q1': q1, 'median': median, 'q3': q3,
+            'lowerfence': fences['min'].to_numpy(),
+            'upperfence': fences['max'].to_numpy(),
+        }
+        
+        # Atípicos ordenados por grupo y distancia a la mediana (los más extremos primero)
+        out_rows, out_values = rows[~inside], values[~inside]
+        order = np.lexsort((-np.abs(out_values - median[out_rows]), out_rows))
+        out_rows, out_values = out_rows[order], out_values[order]
+        bounds = np.searchsorted(out_rows, np.arange(len(present) + 1))
+        outliers = [
+            out_values[start:stop if max_outliers is None else min(stop, start + max_outliers)]
+            for start, stop in zip(bounds[:-1], bounds[1:])
+        ]
+        return list(groups[present]), stats, outliers
+    
     def _create_sunburst(self, data: pd.DataFrame, **kwargs) -> go.Figure:
         """Crea un gráfico sunburst (jerarquico)."""
         path_cols = kwargs.get('path', ['fuente', 'sexo_desc', 'grupo_ocupacional_desc'])
@@ -205,7 +398,7 @@ class OcupacionVisualizer(Visualizer):
         title = kwargs.get('title', 'Distribución Jerárquica de Ocupación')
         
         # Preparar datos para sunburst
-        data_agg = data.groupby(path_cols)[values_col].sum().reset_index()
+        data_agg = self._group_sum(data, path_cols, values_col, kwargs.get('filters'))
         
         fig = px.sunburst(
             data_agg,
@@ -220,63 +413,72 @@ class OcupacionVisualizer(Visualizer):
         
         return fig
     
-    def create_dashboard_charts(self, data: pd.DataFrame) -> Dict[str, go.Figure]:
-        """Crea un conjunto de gráficos para el dashboard."""
-        charts = {}
+    def _dashboard_chart_specs(self, data: pd.DataFrame) -> Dict[str, tuple]:
+        """Datos, tipo y argumentos de cada gráfico del conjunto del dashboard."""
+        # Filtrar datos válidos
+        data_clean = data[data['valor'] > 0]
+        sin_totales = data_clean[data_clean['sexo_code'] != '_T']
         
-        try:
-            # Filtrar datos válidos
-            data_clean = data[data['value'] > 0].copy()
-            
+        return {
             # 1. Gráfico de barras por grupo ocupacional
-            charts['bar_grupos'] = self.create_chart(
-                data_clean,
-                'bar',
-                title='Ocupados por Grupo Ocupacional y Sexo',
-                x='grupo_ocupacional_desc',
-                y='value',
-                color='sexo_desc'
-            )
-            
+            'bar_grupos': (data_clean, 'bar', {
+                'title': 'Ocupados por Grupo Ocupacional y Sexo',
+                'x': 'grupo_ocupacional_desc',
+                'y': 'valor',
+                'color': 'sexo_desc'
+            }),
             # 2. Gráfico de líneas temporal
-            charts['line_temporal'] = self.create_chart(
-                data_clean,
-                'line',
-                title='Evolución Temporal de la Ocupación',
-                x='trimestre_movil_desc',
-                y='value',
-                color='sexo_desc'
-            )
-            
-            # 3. Gráfico de torta
-            charts['pie_total'] = self.create_chart(
-                data_clean[data_clean['sexo_code'] == '_T'],  # Solo totales
-                'pie',
-                title='Distribución Total por Grupo Ocupacional',
-                values='value',
-                names='grupo_ocupacional_desc'
-            )
-            
-            # 4. Mapa de calor
-            charts['heatmap'] = self.create_chart(
-                data_clean[data_clean['sexo_code'] != '_T'],  # Sin totales
-                'heatmap',
-                title='Intensidad de Ocupación por Grupo y Sexo'
-            )
-            
+            'line_temporal': (data_clean, 'line', {
+                'title': 'Evolución Temporal de la Ocupación',
+                'x': 'trimestre_movil_desc',
+                'y': 'valor',
+                'color': 'sexo_desc'
+            }),
+            # 3. Gráfico de torta (solo totales)
+            'pie_total': (data_clean[data_clean['sexo_code'] == '_T'], 'pie', {
+                'title': 'Distribución Total por Grupo Ocupacional',
+                'values': 'valor',
+                'names': 'grupo_ocupacional_desc'
+            }),
+            # 4. Mapa de calor (sin totales)
+            'heatmap': (sin_totales, 'heatmap', {
+                'title': 'Intensidad de Ocupación por Grupo y Sexo'
+            }),
             # 5. Box plot
-            charts['box_distribution'] = self.create_chart(
-                data_clean[data_clean['sexo_code'] != '_T'],
-                'box',
-                title='Distribución de Ocupados por Sexo'
-            )
-            
+            'box_distribution': (sin_totales, 'box', {
+                'title': 'Distribución de Ocupados por Sexo'
+            }),
             # 6. Sunburst
-            charts['sunburst'] = self.create_chart(
-                data_clean[data_clean['sexo_code'] != '_T'],
-                'sunburst',
-                title='Distribución Jerárquica de Ocupación'
-            )
+            'sunburst': (sin_totales, 'sunburst', {
+                'title': 'Distribución Jerárquica de Ocupación'
+            }),
+        }
+    
+    def create_dashboard_charts(self, data: pd.DataFrame,
+                                max_workers: Optional[int] = None) -> Dict[str, go.Figure]:
+        """Crea un conjunto de gráficos para el dashboard.
+        
+        Los gráficos son independientes entre sí: con ``max_workers`` > 1
+        (por defecto ``chart_workers`` de la configuración) se construyen en
+        un pool de hilos. El diccionario resultante conserva el mismo orden.
+        """
+        workers = self.config.get('chart_workers', 1) if max_workers is None else max_workers
+        
+        try:
+            specs = self._dashboard_chart_specs(data)
+            
+            if workers > 1:
+                with ThreadPoolExecutor(max_workers=min(workers, len(specs))) as executor:
+                    futures = {
+                        name: executor.submit(self.create_chart, chart_data, chart_type, **kwargs)
+                        for name, (chart_data, chart_type, kwargs) in specs.items()
+                    }
+                    charts = {name: future.result() for name, future in futures.items()}
+            else:
+                charts = {
+                    name: self.create_chart(chart_data, chart_type, **kwargs)
+                    for name, (chart_data, chart_type, kwargs) in specs.items()
+                }
             
             logger.info(f"Creados {len(charts)} gráficos para el dashboard")
             
@@ -286,23 +488,63 @@ class OcupacionVisualizer(Visualizer):
         
         return charts
     
-    def create_comparison_chart(self, data1: pd.DataFrame, data2: pd.DataFrame,
-                              title: str = "Comparación entre Datasets") -> go.Figure:
-        """Crea un gráfico de comparación entre dos datasets."""
+    def export_charts(self, charts: Dict[str, go.Figure], output_dir: Union[str, Path]) -> Dict[str, Path]:
+        """Guarda cada figura como ``<nombre>.json`` con los datos en arreglos tipados (base64)."""
+        output_dir = Path(output_dir)
+        output_dir.mkdir(parents=True, exist_ok=True)
+        
+        paths = {}
+        try:
+            for name, figure in charts.items():
+                path = output_dir / f"{name}.json"
+                path.write_text(to_json(encode_figure(figure)), encoding='utf-8')
+                paths[name] = path
+            
+            logger.info(f"Exportados {len(paths)} gráficos en {output_dir}")
+            
+        except Exception as e:
+            logger.error(f"Error exportando gráficos: {e}")
+            raise
+        
+        return paths
+    
+    # Etiqueta de cada fuente en el gráfico de comparación
+    FUENTE_LABELS = {
+        'categoria_ocupacional': 'Categoría Ocupacional',
+        'grupo_ocupacional_ciuo88': 'Grupo Ocupacional CIUO88',
+    }
+    
+    def create_comparison_chart(self, data1: Union[pd.DataFrame, OcupacionCube],
+                              data2: Optional[Union[pd.DataFrame, OcupacionCube]] = None,
+                              title: str = "Comparación entre Datasets",
+                              fuentes: Optional[Sequence[str]] = None) -> go.Figure:
+        """Crea un gráfico de comparación entre dos datasets (DataFrames o cubos).
+        
+        Sin ``data2``, ``data1`` es el dataset o cubo combinado y se consulta
+        una vez por cada valor de ``fuentes`` (por defecto, las fuentes del ETL).
+        """
         try:
             # Preparar datos para comparación
-            data1_agg = data1.groupby('sexo_desc')['value'].sum().reset_index()
-            data1_agg['dataset'] = 'Categoría Ocupacional'
+            if data2 is None:
+                parts = [
+                    (data1, {'fuente': [fuente]}, self.FUENTE_LABELS.get(fuente, fuente))
+                    for fuente in (fuentes or DATASET_FUENTES.values())
+                ]
+            else:
+                parts = [(data1, None, 'Categoría Ocupacional'), (data2, None, 'Grupo Ocupacional CIUO88')]
             
-            data2_agg = data2.groupby('sexo_desc')['value'].sum().reset_index()
-            data2_agg['dataset'] = 'Grupo Ocupacional CIUO88'
+            frames = []
+            for data, filters, label in parts:
+                data_agg = self._group_sum(data, ['sexo_desc'], 'valor', filters)
+                data_agg['dataset'] = label
+                frames.append(data_agg)
             
-            combined_data = pd.concat([data1_agg, data2_agg])
+            combined_data = pd.concat(frames)
             
             fig = px.bar(
                 combined_data,
                 x='sexo_desc',
-                y='value',
+                y='valor',
                 color='dataset',
                 title=title,
                 template=self.template,
@@ -1,67 +1,192 @@
 import dash
-from dash import dcc, html, Input, Output, callback
+from flask import jsonify
+from dash import dcc, html, Input, Output, State, Patch, callback, ctx
 import dash_bootstrap_components as dbc
+import math
 import pandas as pd
-from typing import Dict
+from functools import wraps
+from threading import Lock
+from typing import Any, Dict, Hashable, List, Optional, Tuple
 import plotly.graph_objects as go
+import plotly.io as pio
 from loguru import logger
 
-from ..etl.processors import ETLPipeline
+from ..etl.storage import ProcessedDataStore, DATASET_FUENTES
 from ..visualization.charts import OcupacionVisualizer
+from ..visualization.datasets import DatasetsNotReady, LazyDatasetLoader
+from ..visualization.reloader import DataReloader
+from ..utils.cache import LRUCache
+from ..visualization.serialization import EncodedFigure, PayloadMeter, encode_figure, payload_size
 from ..utils.helpers import PathManager, ConfigManager
 
 
+def _outputs_size(outputs) -> int:
+    """Tamaño aproximado (bytes JSON) de las salidas de un callback."""
+    if isinstance(outputs, EncodedFigure) and outputs.size is not None:
+        return outputs.size
+    if not isinstance(outputs, (tuple, list)):
+        outputs = (outputs,)
+    return sum(
+        len(pio.to_json(output, validate=False)) if isinstance(output, go.Figure)
+        else payload_size(output) if isinstance(output, dict)
+        else len(str(output))
+        for output in outputs
+    )
+
+
 class DashboardApp:
     """Aplicación Dash para visualización interactiva de datos de ocupación laboral."""
     
-    def __init__(self, base_path: str = None):
+    def __init__(self, base_path: str = None, warm_up: Optional[bool] = None,
+                 datasets: Optional[Dict[str, pd.DataFrame]] = None,
+                 memory_map: Optional[bool] = None):
         self.config = ConfigManager()
         self.path_manager = PathManager(base_path)
+        self.store = ProcessedDataStore(
+            self.path_manager,
+            storage_format=self.config.get('storage_format', 'parquet')
+        )
         self.visualizer = OcupacionVisualizer()
         
         # Inicializar la aplicación Dash
         self.app = dash.Dash(
             __name__,
             external_stylesheets=[dbc.themes.BOOTSTRAP],
-            suppress_callback_exceptions=True
+            suppress_callback_exceptions=True,
+            on_error=self._on_callback_error
         )
         
-        # Cargar datos
-        self.data = self._load_data()
+        # Caché LRU de salidas de callbacks, invalidada al recargar datos
+        cache_mb = self.config.get('figure_cache_mb')
+        self.figure_cache = LRUCache(
+            max_entries=self.config.get('figure_cache_entries', 128),
+            max_bytes=int(cache_mb * 1024 * 1024) if cache_mb else None,
+            size_of=_outputs_size
+        )
+        self.selection_cache = LRUCache(max_entries=64)
+        
+        # Bytes enviados por salida de callback (log DEBUG y /health), opcional
+        self.payload_meter = PayloadMeter() if self.config.get('payload_metrics', False) else None
+        # Las figuras se miden una vez al cachearlas, solo si alguien usa el tamaño
+        self.measure_figures = self.payload_meter is not None or bool(self.figure_cache.max_bytes)
+        # Claves de layout de las figuras generadas: un ``Patch`` borra las que ya no usa
+        self._layout_keys = frozenset()
+        self._layout_lock = Lock()
+        
+        # Datos cargados bajo demanda (el servidor responde antes de leerlos)
+        self.memory_map = self.config.get('dashboard_memory_map', False) if memory_map is None else memory_map
+        self.datasets = self._new_snapshot(version=0)
+        self._swap_lock = Lock()
+        if datasets:
+            # Resultados del ETL en el mismo proceso: se usan sin releerlos del disco
+            self.datasets.preload(datasets)
+        self.warm_up = self.config.get('dashboard_warmup', False) if warm_up is None else warm_up
         
         # Configurar layout
         self.app.layout = self._create_layout()
         
-        # Registrar callbacks
+        # Registrar callbacks y health check
         self._register_callbacks()
+        self._register_health_check()
+        
+        # Recarga en caliente: un hilo sondea los datos procesados y publica nuevos snapshots
+        self.reloader = DataReloader(
+            self.store.signature, self.reload_data,
+            interval=self.config.get('data_reload_interval') or 0
+        )
+        self.reloader.mark_current()
+        if self.reloader.interval > 0:
+            # Se inicia en la primera petición para que cada worker tenga su propio hilo
+            self.app.server.before_request(self.reloader.ensure_started)
+        
+        if self.warm_up:
+            self.datasets.warm_up(background=True)
     
-    def _load_data(self) -> Dict[str, pd.DataFrame]:
-        """Carga los datos procesados."""
-        try:
-            # Verificar si existen datos procesados
-            processed_path = self.path_manager.get_processed_data_path()
-            
-            if not (processed_path / "ocupacion_laboral_unified.csv").exists():
-                logger.info("Datos procesados no encontrados. Ejecutando pipeline ETL...")
-                etl = ETLPipeline(self.path_manager.base_path)
-                return etl.run_full_pipeline()
-            
-            # Cargar datos existentes
-            unified_df = pd.read_csv(processed_path / "ocupacion_laboral_unified.csv")
-            categoria_df = pd.read_csv(processed_path / "categoria_ocupacional_processed.csv")
-            grupo_df = pd.read_csv(processed_path / "grupo_ocupacional_processed.csv")
-            
-            logger.info("Datos cargados exitosamente")
-            
-            return {
-                'categoria_ocupacional': categoria_df,
-                'grupo_ocupacional': grupo_df,
-                'unified': unified_df
-            }
-            
-        except Exception as e:
-            logger.error(f"Error cargando datos: {e}")
-            raise
+    @property
+    def server(self):
+        """Aplicación WSGI (Flask) para servidores de producción como gunicorn."""
+        return self.app.server
+    
+    @property
+    def data_version(self) -> int:
+        """Versión del snapshot de datos publicado."""
+        return self.datasets.version
+    
+    def _new_snapshot(self, version: int) -> LazyDatasetLoader:
+        """Crea un snapshot de datos vacío (se carga bajo demanda o con ``load_all``).
+        
+        Queda fijado al snapshot publicado en disco, así que sus lecturas
+        no mezclan archivos de ejecuciones distintas del ETL.
+        """
+        return LazyDatasetLoader(
+            self.store.pinned(), self.path_manager.base_path, memory_map=self.memory_map,
+            version=version
+        )
+    
+    def swap_datasets(self, snapshot: LazyDatasetLoader) -> None:
+        """Publica un snapshot de forma atómica e invalida las cachés dependientes.
+        
+        Los callbacks en curso conservan la referencia al snapshot anterior;
+        sus claves de caché incluyen la versión, así que no se mezclan.
+        """
+        with self._swap_lock:
+            self.datasets = snapshot
+            self.figure_cache.clear()
+            self.selection_cache.clear()
+        logger.info(f"Datos publicados (versión {snapshot.version})")
+    
+    def reload_data(self) -> None:
+        """Carga un nuevo snapshot completo en el hilo actual y luego lo publica."""
+        with self._swap_lock:
+            version = self.datasets.version + 1
+        snapshot = self._new_snapshot(version)
+        snapshot.load_all()
+        self.swap_datasets(snapshot)
+    
+    @staticmethod
+    def _cache_key(snapshot: LazyDatasetLoader, name: str, dataset: str, sexo_filter,
+                   *args: Hashable) -> Tuple:
+        """Normaliza las entradas de un callback en una clave de caché."""
+        sexo_key = tuple(sorted(sexo_filter)) if sexo_filter else None
+        return (snapshot.version, name, dataset, sexo_key) + args
+    
+    def _base_filters(self, dataset: str, sexo_filter=None, period_codes: Optional[List] = None) -> Dict:
+        """Traduce la selección de dataset, sexo y ventana de períodos a filtros del cubo."""
+        return {
+            'fuente': [DATASET_FUENTES[dataset]] if dataset in DATASET_FUENTES else None,
+            'sexo_code': list(sexo_filter) if sexo_filter else None,
+            'trimestre_movil': period_codes
+        }
+    
+    @staticmethod
+    def _period_window(snapshot: LazyDatasetLoader, dataset: str, periods) -> Optional[Tuple[int, int]]:
+        """Normaliza el rango del slider; ``None`` si cubre toda la historia del dataset."""
+        if not periods:
+            return None
+        values = snapshot.index(dataset).period_values()
+        start, end = int(min(periods)), int(max(periods))
+        if not len(values) or (start <= values[0] and end >= values[-1]):
+            return None
+        return start, end
+    
+    @staticmethod
+    def _period_slider(values, current=None) -> Tuple[int, int, Dict, Optional[List[int]]]:
+        """Límites, marcas (una por año) y valor del slider de períodos."""
+        if not len(values):
+            return 0, 0, {}, None
+        low, high = int(values[0]), int(values[-1])
+        years = sorted({int(value) // 12 for value in values})
+        step = max(len(years) // 8, 1)
+        marks = {max(year * 12, low): str(year) for year in years[::step]}
+        if current:
+            start, end = max(int(min(current)), low), min(int(max(current)), high)
+            if start <= end:
+                return low, high, marks, [start, end]
+        return low, high, marks, [low, high]
+    
+    def _restrict_sexo(self, sexo_filter, allowed) -> list:
+        """Intersecta el filtro de sexo seleccionado con un conjunto de códigos."""
+        return [code for code in allowed if not sexo_filter or code in sexo_filter]
     
     def _create_layout(self) -> html.Div:
         """Crea el layout principal del dashboard."""
@@ -116,6 +241,15 @@ class DashboardApp:
                                 ],
                                 value='bar',
                                 className="mb-3"
+                            ),
+                            
+                            html.Label("Período:"),
+                            dcc.RangeSlider(
+                                id='period-slider',
+                                step=1,
+                                allowCross=False,
+                                updatemode='mouseup',
+                                className="mb-3"
                             )
                         ])
                     ])
@@ -193,91 +327,340 @@ class DashboardApp:
         ], fluid=True)
     
     def _register_callbacks(self):
-        """Registra los callbacks del dashboard."""
+        """Registra los callbacks del dashboard.
+        
+        Cada grupo de salidas depende solo de las entradas que usa: el tipo de
+        gráfico afecta únicamente al gráfico principal, mientras que métricas,
+        evolución temporal y distribución dependen de dataset, sexo y ventana
+        de períodos. Cada callback toma el snapshot de datos una sola vez al
+        comenzar.
+        """
         
         @self.app.callback(
             Output('sexo-dropdown', 'options'),
             Input('dataset-dropdown', 'value')
         )
+        @self._metered('sexo-dropdown.options')
         def update_sexo_options(dataset):
-            df = self.data[dataset]
-            sexo_options = [
-                {'label': sexo, 'value': code} 
-                for code, sexo in df[['sexo_code', 'sexo_desc']].drop_duplicates().values
-            ]
-            return sexo_options
+            return self.datasets.index(dataset).options('sexo_code')
+        
+        @self.app.callback(
+            [Output('period-slider', 'min'),
+             Output('period-slider', 'max'),
+             Output('period-slider', 'marks'),
+             Output('period-slider', 'value')],
+            Input('dataset-dropdown', 'value'),
+            State('period-slider', 'value')
+        )
+        @self._metered('period-slider.min', 'period-slider.max',
+                       'period-slider.marks', 'period-slider.value')
+        def update_period_range(dataset, current):
+            return self._period_slider(self.datasets.index(dataset).period_values(), current)
+        
+        @self.app.callback(
+            Output('main-chart', 'figure'),
+            [Input('dataset-dropdown', 'value'),
+             Input('sexo-dropdown', 'value'),
+             Input('chart-type-dropdown', 'value'),
+             Input('period-slider', 'value')]
+        )
+        def update_main_chart(dataset, sexo_filter, chart_type, periods=None):
+            snapshot = self.datasets
+            window = self._period_window(snapshot, dataset, periods)
+            key = self._cache_key(snapshot, 'main', dataset, sexo_filter, chart_type, window)
+            return self._figure_update(self.figure_cache.get_or_compute(
+                key, lambda: self._encode(self._build_main_chart(snapshot, dataset, sexo_filter, chart_type, window))
+            ), 'main-chart.figure')
         
         @self.app.callback(
-            [Output('main-chart', 'figure'),
-             Output('total-ocupados', 'children'),
+            [Output('total-ocupados', 'children'),
              Output('total-hombres', 'children'),
              Output('total-mujeres', 'children'),
-             Output('grupos-ocupacionales', 'children'),
-             Output('temporal-chart', 'figure'),
-             Output('distribution-chart', 'figure')],
+             Output('grupos-ocupacionales', 'children')],
             [Input('dataset-dropdown', 'value'),
              Input('sexo-dropdown', 'value'),
-             Input('chart-type-dropdown', 'value')]
+             Input('period-slider', 'value')]
         )
-        def update_dashboard(dataset, sexo_filter, chart_type):
-            df = self.data[dataset].copy()
-            
-            # Aplicar filtros
-            if sexo_filter:
-                df = df[df['sexo_code'].isin(sexo_filter)]
-            
-            # Calcular métricas (valores redondeados)
-            total_ocupados = f"{round(df['valor'].sum()):,}"
-            
-            hombres_data = df[df['sexo_code'] == 'M']
-            total_hombres = f"{round(hombres_data['valor'].sum()):,}" if not hombres_data.empty else "0"
-            
-            mujeres_data = df[df['sexo_code'] == 'F']
-            total_mujeres = f"{round(mujeres_data['valor'].sum()):,}" if not mujeres_data.empty else "0"
-            
-            grupos_ocupacionales = str(df['grupo_ocupacional_desc'].nunique())
-            
-            # Crear gráfico principal
-            try:
-                main_fig = self.visualizer.create_chart(df, chart_type)
-            except Exception as e:
-                logger.error(f"Error creando gráfico principal: {e}")
-                main_fig = go.Figure().add_annotation(
-                    text="Error al generar el gráfico",
-                    xref="paper", yref="paper",
-                    x=0.5, y=0.5, showarrow=False
-                )
-            
-            # Gráfico temporal
-            try:
-                temporal_fig = self.visualizer.create_chart(
-                    df, 'line',
-                    title='Evolución Temporal',
-                    x='trimestre_movil_desc',
-                    y='valor',
-                    color='sexo_desc'
-                )
-            except Exception as e:
-                logger.error(f"Error creando gráfico temporal: {e}")
-                temporal_fig = go.Figure()
-            
-            # Gráfico de distribución
-            try:
-                distribution_fig = self.visualizer.create_chart(
-                    df[df['sexo_code'] != '_T'], 'pie',
-                    title='Distribución por Sexo',
-                    values='valor',
-                    names='sexo_desc'
-                )
-            except Exception as e:
-                logger.error(f"Error creando gráfico de distribución: {e}")
-                distribution_fig = go.Figure()
+        @self._metered('total-ocupados.children', 'total-hombres.children',
+                       'total-mujeres.children', 'grupos-ocupacionales.children')
+        def update_metrics(dataset, sexo_filter, periods=None):
+            snapshot = self.datasets
+            window = self._period_window(snapshot, dataset, periods)
+            key = self._cache_key(snapshot, 'metrics', dataset, sexo_filter, window)
+            return self.figure_cache.get_or_compute(
+                key, lambda: self._build_metrics(snapshot, dataset, sexo_filter, window)
+            )
+        
+        @self.app.callback(
+            Output('temporal-chart', 'figure'),
+            [Input('dataset-dropdown', 'value'),
+             Input('sexo-dropdown', 'value'),
+             Input('period-slider', 'value'),
+             Input('temporal-chart', 'relayoutData')]
+        )
+        def update_temporal_chart(dataset, sexo_filter, periods=None, relayout=None):
+            snapshot = self.datasets
+            window = self._period_window(snapshot, dataset, periods)
+            # Solo el zoom del propio gráfico pide el tramo visible a resolución completa
+            triggered = self._triggered_ids()
+            zoom = None
+            if 'temporal-chart' in triggered:
+                if self._changes_x_range(relayout) and self._zoom_adds_detail(snapshot, dataset, window):
+                    zoom = self._zoom_range(relayout)
+                elif triggered == {'temporal-chart'}:
+                    # Autosize, dragmode o zoom sobre series sin reducir: los datos no cambian
+                    return dash.no_update
+            key = self._cache_key(snapshot, 'temporal', dataset, sexo_filter, window, zoom)
+            return self._figure_update(self.figure_cache.get_or_compute(
+                key, lambda: self._encode(self._build_temporal_chart(snapshot, dataset, sexo_filter, window, zoom))
+            ), 'temporal-chart.figure')
+        
+        @self.app.callback(
+            Output('distribution-chart', 'figure'),
+            [Input('dataset-dropdown', 'value'),
+             Input('sexo-dropdown', 'value'),
+             Input('period-slider', 'value')]
+        )
+        def update_distribution_chart(dataset, sexo_filter, periods=None):
+            snapshot = self.datasets
+            window = self._period_window(snapshot, dataset, periods)
+            key = self._cache_key(snapshot, 'distribution', dataset, sexo_filter, window)
+            return self._figure_update(self.figure_cache.get_or_compute(
+                key, lambda: self._encode(self._build_distribution_chart(snapshot, dataset, sexo_filter, window))
+            ), 'distribution-chart.figure')
+    
+    @staticmethod
+    def _on_callback_error(error: Exception) -> None:
+        """Deja las salidas sin cambios mientras el ETL genera los datos; el resto de errores se propaga."""
+        if isinstance(error, DatasetsNotReady):
+            logger.info(f"Callback omitido: {error}")
+            return None
+        raise error
+    
+    def _register_health_check(self) -> None:
+        """Expone ``/health``, que responde de inmediato aunque los datos aún se estén cargando."""
+        
+        @self.app.server.route('/health')
+        def health():
+            snapshot = self.datasets
+            return jsonify(
+                status='ok',
+                ready=snapshot.is_ready,
+                datasets=snapshot.loaded,
+                data_version=snapshot.version,
+                snapshot_id=snapshot.store.snapshot_id,
+                payload_bytes=self.payload_meter.summary() if self.payload_meter else {}
+            )
+    
+    @staticmethod
+    def _triggered_ids() -> set:
+        """Ids de los componentes que dispararon el callback (vacío en la carga inicial)."""
+        try:
+            return {component for component in ctx.triggered_prop_ids.values() if component}
+        except Exception:
+            # Fuera de un callback (por ejemplo, en pruebas) no hay contexto
+            return set()
+    
+    @staticmethod
+    def _changes_x_range(relayout: Optional[Dict]) -> bool:
+        """Indica si el evento de relayout cambia el rango del eje x (zoom o reinicio)."""
+        return bool(relayout) and any(
+            key in relayout for key in ('xaxis.autorange', 'xaxis.range', 'xaxis.range[0]', 'xaxis.range[1]')
+        )
+    
+    def _zoom_adds_detail(self, snapshot: LazyDatasetLoader, dataset: str,
+                          window: Optional[Tuple[int, int]]) -> bool:
+        """Indica si el zoom cambia los datos: solo cuando las series superan ``plot_width``."""
+        values = snapshot.index(dataset).period_values()
+        if window is not None:
+            values = values[(values >= window[0]) & (values <= window[1])]
+        return len(values) > self.visualizer.config.get('plot_width', 1200)
+    
+    @staticmethod
+    def _zoom_range(relayout: Optional[Dict]) -> Optional[Tuple[float, float]]:
+        """Rango del eje x ampliado por el usuario (posiciones de categoría) o ``None``."""
+        if not relayout or relayout.get('xaxis.autorange'):
+            return None
+        if 'xaxis.range[0]' in relayout and 'xaxis.range[1]' in relayout:
+            bounds = relayout['xaxis.range[0]'], relayout['xaxis.range[1]']
+        elif isinstance(relayout.get('xaxis.range'), list):
+            bounds = tuple(relayout['xaxis.range'][:2])
+        else:
+            return None
+        try:
+            start, stop = sorted(float(bound) for bound in bounds)
+        except (TypeError, ValueError):
+            return None
+        # Redondeo a la categoría: zooms casi iguales comparten la entrada de caché
+        return float(math.floor(start)), float(math.ceil(stop))
+    
+    # Entradas que no cambian el template de las figuras: admiten actualización parcial
+    PATCHABLE_INPUTS = {'sexo-dropdown', 'period-slider', 'temporal-chart'}
+    
+    def _encode(self, figure: go.Figure) -> EncodedFigure:
+        """Codifica una figura para la caché (midiéndola si se usan sus bytes)."""
+        encoded = encode_figure(figure, measure=self.measure_figures)
+        with self._layout_lock:
+            self._layout_keys = self._layout_keys | encoded['layout'].keys()
+        return encoded
+    
+    def _figure_update(self, figure: Dict[str, Any], output: Optional[str] = None):
+        """Retorna la figura completa o una actualización parcial si solo cambió el sexo o el período.
+        
+        ``figure`` es la figura ya codificada (``encode_figure``). Con dataset
+        y tipo de gráfico sin cambios el navegador ya tiene el template, así
+        que el ``Patch`` reemplaza solo las trazas y el resto del layout (que
+        puede depender de los datos, p. ej. categorías de ejes). Las claves
+        de layout que la figura anterior podía tener y la nueva no (p. ej. la
+        anotación de un gráfico sin datos) se borran. Con ``output`` se
+        registran los bytes de la respuesta, medidos al cachear.
+        """
+        triggered = self._triggered_ids()
+        if not triggered or not triggered <= self.PATCHABLE_INPUTS:
+            self._record_figure(output, figure, patch=False)
+            return figure
+        
+        layout = figure['layout']
+        patch = Patch()
+        patch['data'] = figure['data']
+        for key, value in layout.items():
+            if key != 'template':
+                patch['layout'][key] = value
+        for key in sorted(self._layout_keys - layout.keys() - {'template'}):
+            del patch['layout'][key]
+        self._record_figure(output, figure, patch=True)
+        return patch
+    
+    def _record_figure(self, output: Optional[str], figure: Dict[str, Any], patch: bool) -> None:
+        """Registra los bytes de una figura enviada sin volver a serializarla."""
+        if self.payload_meter is None or output is None:
+            return
+        size = getattr(figure, 'patch_size' if patch else 'size', None)
+        if size is None:
+            self.payload_meter.record(output, figure)
+        else:
+            self.payload_meter.record_size(output, size)
+    
+    def _metered(self, *outputs: str):
+        """Decora un callback para registrar los bytes enviados por cada una de sus salidas.
+        
+        Para salidas pequeñas (opciones, textos); las figuras se registran con
+        el tamaño medido al cachearlas (``_figure_update``).
+        """
+        def decorator(func):
+            if self.payload_meter is None:
+                return func
             
-            return (main_fig, total_ocupados, total_hombres, total_mujeres,
-                   grupos_ocupacionales, temporal_fig, distribution_fig)
+            @wraps(func)
+            def wrapper(*args, **kwargs):
+                result = func(*args, **kwargs)
+                values = result if len(outputs) > 1 else (result,)
+                for output, value in zip(outputs, values):
+                    self.payload_meter.record(output, value)
+                return result
+            return wrapper
+        return decorator
     
-    def run(self, debug: bool = True, host: str = None, port: int = None):
-        """Ejecuta la aplicación."""
+    def _get_selection(self, snapshot: LazyDatasetLoader, dataset: str, sexo_filter,
+                       window: Optional[Tuple[int, int]] = None) -> Dict[str, Any]:
+        """Selección compartida por los callbacks de una misma combinación de entradas.
+        
+        Se calcula una vez por cambio de entradas: filtros del cubo y
+        posiciones de fila resueltas con el índice. La ventana de períodos se
+        resuelve a rangos contiguos de las filas ordenadas por período.
+        """
+        key = self._cache_key(snapshot, 'selection', dataset, sexo_filter, window)
+        
+        def compute():
+            index = snapshot.index(dataset)
+            period_codes = index.period_codes(window) if window else None
+            return {
+                'filters': self._base_filters(dataset, sexo_filter, period_codes),
+                'positions': index.select({'sexo_code': sexo_filter or None}, window)
+            }
+        
+        return self.selection_cache.get_or_compute(key, compute)
+    
+    def _build_main_chart(self, snapshot: LazyDatasetLoader, dataset: str, sexo_filter,
+                          chart_type: str, window: Optional[Tuple[int, int]] = None) -> go.Figure:
+        """Crea el gráfico principal según el tipo seleccionado."""
+        selection = self._get_selection(snapshot, dataset, sexo_filter, window)
+        try:
+            # Los gráficos de filas individuales no pueden resolverse con el cubo:
+            # se toman solo las filas seleccionadas mediante el índice
+            if chart_type in self.visualizer.ROW_LEVEL_CHARTS:
+                rows = snapshot.index(dataset).rows(selection['positions'])
+                return self.visualizer.create_chart(rows, chart_type)
+            return self.visualizer.create_chart(snapshot.cube, chart_type, filters=selection['filters'])
+        except Exception as e:
+            logger.error(f"Error creando gráfico principal: {e}")
+            return go.Figure().add_annotation(
+                text="Error al generar el gráfico",
+                xref="paper", yref="paper",
+                x=0.5, y=0.5, showarrow=False
+            )
+    
+    def _build_metrics(self, snapshot: LazyDatasetLoader, dataset: str, sexo_filter,
+                       window: Optional[Tuple[int, int]] = None) -> Tuple[str, str, str, str]:
+        """Calcula las métricas desde el cubo (valores enteros)."""
+        filters = self._get_selection(snapshot, dataset, sexo_filter, window)['filters']
+        cube = snapshot.cube
+        
+        total_ocupados = f"{cube.total(filters):,}"
+        
+        hombres_filters = {**filters, 'sexo_code': self._restrict_sexo(sexo_filter, ['M'])}
+        total_hombres = f"{cube.total(hombres_filters):,}"
+        
+        mujeres_filters = {**filters, 'sexo_code': self._restrict_sexo(sexo_filter, ['F'])}
+        total_mujeres = f"{cube.total(mujeres_filters):,}"
+        
+        grupos_ocupacionales = str(cube.nunique('grupo_ocupacional_desc', filters))
+        
+        return total_ocupados, total_hombres, total_mujeres, grupos_ocupacionales
+    
+    def _build_temporal_chart(self, snapshot: LazyDatasetLoader, dataset: str, sexo_filter,
+                              window: Optional[Tuple[int, int]] = None,
+                              zoom: Optional[Tuple[float, float]] = None) -> go.Figure:
+        """Crea el gráfico de evolución temporal (reducido al ancho; el zoom trae el detalle)."""
+        filters = self._get_selection(snapshot, dataset, sexo_filter, window)['filters']
+        try:
+            figure = self.visualizer.create_chart(
+                snapshot.cube, 'line',
+                title='Evolución Temporal',
+                x='trimestre_movil_desc',
+                y='valor',
+                color='sexo_desc',
+                filters=filters,
+                x_range=zoom
+            )
+            # Conserva el zoom del usuario al reemplazar los datos
+            return figure.update_layout(uirevision=f"{dataset}:{window}")
+        except Exception as e:
+            logger.error(f"Error creando gráfico temporal: {e}")
+            return go.Figure()
+    
+    def _build_distribution_chart(self, snapshot: LazyDatasetLoader, dataset: str, sexo_filter,
+                                  window: Optional[Tuple[int, int]] = None) -> go.Figure:
+        """Crea el gráfico de distribución por sexo (sin totales)."""
+        filters = self._get_selection(snapshot, dataset, sexo_filter, window)['filters']
+        try:
+            cube = snapshot.cube
+            sexo_codes = cube.query(['sexo_code'])['sexo_code'].tolist()
+            sin_totales = [code for code in sexo_codes if code != '_T']
+            return self.visualizer.create_chart(
+                cube, 'pie',
+                title='Distribución por Sexo',
+                values='valor',
+                names='sexo_desc',
+                filters={**filters, 'sexo_code': self._restrict_sexo(sexo_filter, sin_totales)}
+            )
+        except Exception as e:
+            logger.error(f"Error creando gráfico de distribución: {e}")
+            return go.Figure()
+    
+    def run(self, debug: Optional[bool] = None, host: str = None, port: int = None):
+        """Ejecuta la aplicación con el servidor de desarrollo de Dash."""
+        debug = self.config.get('dash_debug', False) if debug is None else debug
         host = host or self.config.get('dash_host', '127.0.0.1')
         port = port or self.config.get('dash_port', 8050)
         
@@ -285,6 +668,26 @@ class DashboardApp:
         self.app.run(debug=debug, host=host, port=port)
 
 
-def create_dashboard(base_path: str = None) -> DashboardApp:
-    """Función factory para crear el dashboard."""
-    return DashboardApp(base_path)
+def create_dashboard(base_path: str = None,
+                     datasets: Optional[Dict[str, pd.DataFrame]] = None) -> DashboardApp:
+    """Función factory para crear el dashboard (opcionalmente con datasets ya en memoria)."""
+    return DashboardApp(base_path, datasets=datasets)
+
+
+def create_production_dashboard(base_path: str = None) -> DashboardApp:
+    """Crea el dashboard para servirlo con varios workers (ver ``wsgi.py``).
+    
+    Requiere datos ya publicados por el ETL: con varios workers el pipeline
+    no se ejecuta al vuelo. El cubo y los índices de filtros se preparan
+    aquí, así que con ``--preload`` el proceso maestro
+    los construye una sola vez y los workers los heredan por copy-on-write
+    (los datos son vistas del memory-map).
+    """
+    dashboard = DashboardApp(base_path, warm_up=False, memory_map=True)
+    if not dashboard.store.has_datasets():
+        message = "No hay datos procesados publicados; ejecute el ETL (python main.py --mode etl) antes de iniciar el servidor"
+        logger.error(message)
+        raise FileNotFoundError(message)
+    
+    dashboard.datasets.warm_up(background=False)
+    return dashboard
@@ -0,0 +1,178 @@
+from threading import RLock, Thread
+from typing import Dict, List, Optional, Union
+import pandas as pd
+from loguru import logger
+
+from ..etl.cube import OcupacionCube
+from ..etl.processors import ETLPipeline
+from ..etl.schema import concat_datasets
+from ..etl.storage import ProcessedDataStore, DATASET_FILES, CUBE_FILE
+from ..visualization.filter_index import FilterIndex, UnionFilterIndex
+
+
+UNIFIED_DATASET = 'unified'
+
+
+class DatasetsNotReady(RuntimeError):
+    """Los datos procesados aún se están generando en segundo plano."""
+
+
+class LazyDatasetLoader:
+    """Carga perezosa de los datasets procesados, sus índices y el cubo de agregados.
+
+    Cada dataset se lee la primera vez que se solicita. El dataset unificado
+    es una vista virtual sobre sus dos partes, sin una copia concatenada.
+    Con ``memory_map`` los datasets se leen desde una copia Arrow compartida.
+    Cada instancia es un snapshot inmutable identificado por ``version``.
+    """
+
+    def __init__(self, store: ProcessedDataStore, base_path=None, memory_map: bool = False,
+                 version: int = 0):
+        self.store = store
+        self.base_path = base_path
+        self.memory_map = memory_map
+        self.version = version
+        self._frames: Dict[str, pd.DataFrame] = {}
+        self._indexes: Dict[str, Union[FilterIndex, UnionFilterIndex]] = {}
+        self._cube: Optional[OcupacionCube] = None
+        self._processed = False
+        self._lock = RLock()
+        self._warmup_thread: Optional[Thread] = None
+
+    @property
+    def names(self) -> List[str]:
+        """Datasets disponibles, incluida la vista unificada."""
+        return [UNIFIED_DATASET] + list(DATASET_FILES)
+
+    @property
+    def loaded(self) -> List[str]:
+        """Datasets cuyos índices ya están en memoria."""
+        return [name for name in self.names if name in self._indexes]
+
+    @property
+    def is_ready(self) -> bool:
+        """Indica si todos los datasets y el cubo están cargados."""
+        return self._cube is not None and len(self.loaded) == len(self.names)
+
+    def preload(self, frames: Dict[str, pd.DataFrame]) -> None:
+        """Registra datasets ya presentes en memoria (p. ej. los resultados del ETL) sin copiarlos.
+
+        La vista unificada se ignora: siempre se arma sobre sus partes.
+        """
+        with self._lock:
+            for name, frame in frames.items():
+                if name in DATASET_FILES:
+                    self._frames[name] = frame
+                    self._indexes.pop(name, None)
+            self._indexes.pop(UNIFIED_DATASET, None)
+
+    def _ensure_processed(self, run: bool = False) -> None:
+        """Comprueba que existan datos procesados o ejecuta el pipeline ETL.
+
+        Solo ``load_all`` lo ejecuta (``run``), fuera del lock. Una petición
+        sin datos inicia la precarga en segundo plano y recibe
+        ``DatasetsNotReady`` en vez de esperar al pipeline.
+        """
+        if self._processed:
+            return
+        if self.store.has_datasets():
+            self._processed = True
+            return
+        if not run:
+            self.warm_up(background=True)
+            raise DatasetsNotReady("Los datos procesados se están generando; reintente en unos segundos")
+
+        logger.info("Datos procesados no encontrados. Ejecutando pipeline ETL...")
+        etl = ETLPipeline(self.base_path, storage_format=self.store.storage_format)
+        results = etl.run_full_pipeline()
+        with self._lock:
+            for key in DATASET_FILES:
+                self._frames.setdefault(key, results[key])
+            self._processed = True
+
+    def frame(self, name: str) -> pd.DataFrame:
+        """Retorna un dataset procesado, leyéndolo en el primer acceso."""
+        if name not in DATASET_FILES:
+            raise KeyError(f"Dataset desconocido: {name}")
+
+        frame = self._frames.get(name)
+        if frame is not None:
+            return frame
+
+        self._ensure_processed()
+        with self._lock:
+            if name not in self._frames:
+                try:
+                    self._frames[name] = self.store.read_dataset(name, memory_map=self.memory_map)
+                    logger.info(f"Dataset {name} cargado ({len(self._frames[name])} filas)")
+                except Exception as e:
+                    logger.error(f"Error cargando dataset {name}: {e}")
+                    raise
+            return self._frames[name]
+
+    def index(self, name: str) -> Union[FilterIndex, UnionFilterIndex]:
+        """Retorna el índice de filtros de un dataset, construyéndolo en el primer acceso."""
+        index = self._indexes.get(name)
+        if index is not None:
+            return index
+
+        with self._lock:
+            if name not in self._indexes:
+                if name == UNIFIED_DATASET:
+                    index = UnionFilterIndex([self.index(part) for part in DATASET_FILES])
+                else:
+                    index = FilterIndex(self.frame(name))
+                self._indexes[name] = index
+            return self._indexes[name]
+
+    @property
+    def cube(self) -> OcupacionCube:
+        """Cubo de agregados materializado por el ETL (o construido en memoria)."""
+        cube = self._cube
+        if cube is not None:
+            return cube
+
+        self._ensure_processed()
+        with self._lock:
+            if self._cube is None:
+                if self.store.exists(CUBE_FILE):
+                    self._cube = OcupacionCube.from_frame(self.store.read(CUBE_FILE))
+                else:
+                    logger.info("Cubo de agregados no encontrado. Construyéndolo en memoria...")
+                    self._cube = OcupacionCube.build(
+                        concat_datasets([self.frame(part) for part in DATASET_FILES])
+                    )
+            return self._cube
+
+    def load_all(self) -> None:
+        """Carga el cubo y todos los datasets con sus índices (ejecuta el ETL si no hay datos)."""
+        self._ensure_processed(run=True)
+        self.cube
+        for name in self.names:
+            self.index(name)
+        logger.info("Datasets del dashboard precargados")
+
+    def warm_up(self, background: bool = True) -> None:
+        """Precarga los datasets, opcionalmente en un hilo en segundo plano."""
+        if not background:
+            self.load_all()
+            return
+
+        def run():
+            try:
+                self.load_all()
+            except Exception as e:
+                logger.error(f"Error en la precarga de datasets: {e}")
+
+        with self._lock:
+            if self._warmup_thread is not None and self._warmup_thread.is_alive():
+                return
+            self._warmup_thread = Thread(target=run, name='dataset-warmup', daemon=True)
+            self._warmup_thread.start()
+
+    def clear(self) -> None:
+        """Descarta los datos cargados; se vuelven a leer en el próximo acceso."""
+        with self._lock:
+            self._frames.clear()
+            self._indexes.clear()
+            self._cube = None
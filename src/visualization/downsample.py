@@ -0,0 +1,35 @@
+import numpy as np
+
+
+def lttb_indices(x: np.ndarray, y: np.ndarray, threshold: int) -> np.ndarray:
+    """Posiciones que conserva Largest-Triangle-Three-Buckets para ``threshold`` puntos.
+
+    ``x`` debe estar ordenado. Se conservan siempre el primer y el último
+    punto; de cada balde intermedio se elige el que forma el triángulo de
+    mayor área con el punto ya elegido y el promedio del balde siguiente,
+    lo que preserva picos y valles de la serie.
+    """
+    n = len(x)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    edges = np.linspace(1, n - 1, threshold - 1).astype(np.int64)
+
+    selected = np.empty(threshold, dtype=np.int64)
+    selected[0], selected[-1] = 0, n - 1
+    previous = 0
+    for bucket in range(threshold - 2):
+        start, stop = edges[bucket], edges[bucket + 1]
+        if bucket + 2 < len(edges):
+            next_start, next_stop = edges[bucket + 1], edges[bucket + 2]
+            avg_x, avg_y = x[next_start:next_stop].mean(), y[next_start:next_stop].mean()
+        else:
+            avg_x, avg_y = x[n - 1], y[n - 1]
+
+        px, py = x[previous], y[previous]
+        area = np.abs((px - avg_x) * (y[start:stop] - py) - (px - x[start:stop]) * (avg_y - py))
+        previous = start + int(np.argmax(area))
+        selected[bucket + 1] = previous
+    return selected
@@ -0,0 +1,189 @@
+from copy import deepcopy
+from typing import Dict, List, Optional, Sequence, Tuple
+import numpy as np
+import pandas as pd
+import plotly.graph_objects as go
+import plotly.io as pio
+
+
+def _merge(base: Dict, overrides: Optional[Dict]) -> Dict:
+    """Combina recursivamente ``overrides`` sobre ``base`` (modifica ``base``)."""
+    for key, value in (overrides or {}).items():
+        if isinstance(value, dict) and isinstance(base.get(key), dict):
+            _merge(base[key], value)
+        else:
+            base[key] = value
+    return base
+
+
+class FastFigureBuilder:
+    """Construye figuras equivalentes a las de ``plotly.express`` desde arreglos ya agregados.
+
+    Las trazas se arman como diccionarios ``go`` y el template se resuelve y
+    valida una sola vez; la figura se crea sin volver a validar cada
+    propiedad, que es el costo dominante de ``px`` en los callbacks.
+    """
+
+    def __init__(self, template: str = 'plotly_white'):
+        self.template = pio.templates[template]
+        colorway = self.template.layout.colorway
+        self.default_colors = list(colorway) if colorway else list(pio.templates['plotly'].layout.colorway)
+
+    def _figure(self, data: List[Dict], layout: Dict) -> go.Figure:
+        """Crea la figura reutilizando el template ya validado."""
+        layout['template'] = self.template
+        return go.Figure({'data': data, 'layout': layout}, _validate=False)
+
+    @staticmethod
+    def _groups(color: np.ndarray) -> List[Tuple[object, np.ndarray]]:
+        """Posiciones de cada valor de ``color``, en orden de aparición (como ``px``)."""
+        codes, uniques = pd.factorize(color)
+        order = np.argsort(codes, kind='stable')
+        bounds = np.searchsorted(codes[order], np.arange(len(uniques) + 1))
+        return [(uniques[i], order[bounds[i]:bounds[i + 1]]) for i in range(len(uniques))]
+
+    @staticmethod
+    def _xy_layout(labels: Sequence[str], title: str, legend: bool = True) -> Dict:
+        """Layout base de ``px`` para gráficos cartesianos."""
+        x_label, y_label = labels[0], labels[1]
+        layout = {
+            'xaxis': {'anchor': 'y', 'domain': [0.0, 1.0], 'title': {'text': x_label}},
+            'yaxis': {'anchor': 'x', 'domain': [0.0, 1.0], 'title': {'text': y_label}},
+            'legend': {'tracegroupgap': 0},
+            'title': {'text': title},
+        }
+        if legend and len(labels) > 2:
+            layout['legend']['title'] = {'text': labels[2]}
+        return layout
+
+    @staticmethod
+    def _values(array: np.ndarray) -> np.ndarray:
+        """Arreglo listo para serializar (las categorías de texto como lista de objetos)."""
+        array = np.asarray(array)
+        return array.astype(object) if array.dtype.kind in 'OUS' else array
+
+    def bar(self, x: np.ndarray, y: np.ndarray, color: np.ndarray, labels: Sequence[str],
+            title: str, colors: Optional[List[str]] = None, layout: Optional[Dict] = None) -> go.Figure:
+        """Barras apiladas, una traza por valor de ``color`` (equivale a ``px.bar``)."""
+        colors = colors or self.default_colors
+        x_label, y_label, color_label = labels
+        x, y = self._values(x), np.asarray(y)
+        data = [
+            {
+                'hovertemplate': f"{color_label}={value}<br>{x_label}=%{{x}}<br>{y_label}=%{{y}}<extra></extra>",
+                'legendgroup': value,
+                'marker': {'color': colors[i % len(colors)], 'pattern': {'shape': ''}},
+                'name': value,
+                'orientation': 'v',
+                'showlegend': True,
+                'textposition': 'auto',
+                'x': x[positions],
+                'xaxis': 'x',
+                'y': y[positions],
+                'yaxis': 'y',
+                'type': 'bar',
+            }
+            for i, (value, positions) in enumerate(self._groups(color))
+        ]
+        base = self._xy_layout(labels, title)
+        base['barmode'] = 'relative'
+        return self._figure(data, _merge(base, deepcopy(layout)))
+
+    def line(self, x: np.ndarray, y: np.ndarray, color: np.ndarray, labels: Sequence[str],
+             title: str, markers: bool = True, colors: Optional[List[str]] = None,
+             webgl: bool = False, layout: Optional[Dict] = None) -> go.Figure:
+        """Líneas, una traza por valor de ``color`` (equivale a ``px.line``; ``webgl`` usa scattergl)."""
+        colors = colors or self.default_colors
+        x_label, y_label, color_label = labels
+        x, y = self._values(x), np.asarray(y)
+        data = []
+        for i, (value, positions) in enumerate(self._groups(color)):
+            trace = {
+                'hovertemplate': f"{color_label}={value}<br>{x_label}=%{{x}}<br>{y_label}=%{{y}}<extra></extra>",
+                'legendgroup': value,
+                'line': {'color': colors[i % len(colors)], 'dash': 'solid'},
+                'marker': {'symbol': 'circle'},
+                'mode': 'lines+markers' if markers else 'lines',
+                'name': value,
+                'orientation': 'v',
+                'showlegend': True,
+                'x': x[positions],
+                'xaxis': 'x',
+                'y': y[positions],
+                'yaxis': 'y',
+                'type': 'scattergl' if webgl else 'scatter',
+            }
+            if not markers:
+                del trace['marker']
+            if webgl:
+                # scattergl no tiene orientación
+                del trace['orientation']
+            data.append(trace)
+        return self._figure(data, _merge(self._xy_layout(labels, title), deepcopy(layout)))
+
+    def pie(self, names: np.ndarray, values: np.ndarray, labels: Sequence[str], title: str,
+            colors: Optional[List[str]] = None, trace: Optional[Dict] = None,
+            layout: Optional[Dict] = None) -> go.Figure:
+        """Torta (equivale a ``px.pie``)."""
+        names_label, values_label = labels
+        data = [_merge({
+            'domain': {'x': [0.0, 1.0], 'y': [0.0, 1.0]},
+            'hovertemplate': f"{names_label}=%{{label}}<br>{values_label}=%{{value}}<extra></extra>",
+            'labels': self._values(names),
+            'legendgroup': '',
+            'name': '',
+            'showlegend': True,
+            'values': np.asarray(values),
+            'type': 'pie',
+        }, deepcopy(trace))]
+        base = {'legend': {'tracegroupgap': 0}, 'title': {'text': title}}
+        if colors:
+            base['piecolorway'] = list(colors)
+        return self._figure(data, _merge(base, deepcopy(layout)))
+
+    def box(self, groups: Sequence, stats: Dict[str, np.ndarray], outliers: List[np.ndarray],
+            labels: Sequence[str], title: str, colors: Optional[List[str]] = None,
+            layout: Optional[Dict] = None) -> go.Figure:
+        """Cajas con estadísticas ya calculadas (q1, median, q3, lowerfence, upperfence).
+
+        Cada grupo es una caja sin muestra y sus valores atípicos van en una
+        traza de puntos aparte, así que el tamaño no depende de la cantidad de filas.
+        """
+        colors = colors or self.default_colors
+        x_label, y_label = labels
+        data = []
+        for i, group in enumerate(groups):
+            color = colors[i % len(colors)]
+            data.append({
+                'alignmentgroup': 'True',
+                'boxpoints': False,
+                'legendgroup': group,
+                'marker': {'color': color},
+                'name': group,
+                'offsetgroup': group,
+                'orientation': 'v',
+                'showlegend': True,
+                'x': [group],
+                'xaxis': 'x',
+                'yaxis': 'y',
+                'type': 'box',
+                **{key: values[i:i + 1] for key, values in stats.items()},
+            })
+            if len(outliers[i]):
+                data.append({
+                    'hovertemplate': f"{x_label}=%{{x}}<br>{y_label}=%{{y}}<extra></extra>",
+                    'legendgroup': group,
+                    'marker': {'color': color},
+                    'mode': 'markers',
+                    'name': group,
+                    'showlegend': False,
+                    'x': [group] * len(outliers[i]),
+                    'xaxis': 'x',
+                    'y': outliers[i],
+                    'yaxis': 'y',
+                    'type': 'scatter',
+                })
+        base = self._xy_layout((x_label, y_label, x_label), title)
+        base['xaxis'].update({'categoryorder': 'array', 'categoryarray': list(groups)})
+        base['boxmode'] = 'overlay'
+        return self._figure(data, _merge(base, deepcopy(layout)))
@@ -0,0 +1,247 @@
+from typing import Dict, List, Optional, Sequence, Tuple, Union
+import numpy as np
+import pandas as pd
+
+from ..etl.schema import (
+    INVALID_PERIOD,
+    PERIOD_COLUMN,
+    TRIMESTRE_COLUMN,
+    concat_datasets,
+    parse_periodo,
+    period_of
+)
+
+
+# Selección de filas: posiciones ordenadas, un rango contiguo o ``None`` (todas)
+Selection = Optional[Union[np.ndarray, slice]]
+
+# Rango de períodos inclusivo (``None`` en un extremo lo deja abierto)
+PeriodRange = Optional[Tuple[Optional[int], Optional[int]]]
+
+# Columnas indexadas por defecto y su columna descriptiva
+INDEXED_COLUMNS = {
+    'sexo_code': 'sexo_desc',
+    'region_code': 'region_name',
+    'grupo_ocupacional_code': 'grupo_ocupacional_desc',
+    'trimestre_movil': 'trimestre_movil_desc',
+}
+
+
+class FilterIndex:
+    """Índice invertido de posiciones de fila por valor, para filtrar sin recorrer el dataset.
+
+    Para cada columna indexada guarda, por valor, un arreglo ordenado de
+    posiciones. Un filtro se resuelve uniendo las posiciones de sus valores
+    e intersectando entre columnas; solo las filas seleccionadas se copian.
+    Los rangos de períodos se resuelven por búsqueda binaria sobre las filas
+    ordenadas por ``periodo``.
+    """
+
+    def __init__(self, df: pd.DataFrame, columns: Optional[Dict[str, str]] = None):
+        self.df = df
+        self.n_rows = len(df)
+        self.postings: Dict[str, Dict] = {}
+        self.labels: Dict[str, Dict] = {}
+
+        for column, desc_column in (columns or INDEXED_COLUMNS).items():
+            if column in df.columns:
+                self._index_column(column, desc_column if desc_column in df.columns else None)
+
+        self._index_periods()
+
+    def _index_periods(self) -> None:
+        """Prepara los períodos ordenados; si las filas no lo están, guarda la permutación."""
+        self._period_values = None
+        if PERIOD_COLUMN in self.df.columns:
+            periods = self.df[PERIOD_COLUMN].to_numpy()
+        elif TRIMESTRE_COLUMN in self.df.columns:
+            periods = parse_periodo(self.df[TRIMESTRE_COLUMN])
+        else:
+            self.periods = None
+            self._period_order = None
+            return
+
+        if len(periods) > 1 and (np.diff(periods) < 0).any():
+            self._period_order = np.argsort(periods, kind='stable').astype(np.int32)
+            self.periods = periods[self._period_order]
+        else:
+            self._period_order = None
+            self.periods = periods
+
+    @property
+    def period_sorted(self) -> bool:
+        """Indica si las filas del dataset están ordenadas por período."""
+        return self.periods is not None and self._period_order is None
+
+    def period_values(self) -> np.ndarray:
+        """Períodos válidos observados, en orden cronológico."""
+        if self._period_values is None:
+            if self.periods is None:
+                self._period_values = np.empty(0, dtype=np.int32)
+            else:
+                values = np.unique(self.periods)
+                self._period_values = values[values != INVALID_PERIOD]
+        return self._period_values
+
+    def period_codes(self, periods: PeriodRange) -> List:
+        """Códigos de trimestre cuyo período cae en el rango (para filtrar el cubo)."""
+        start, end = periods
+        return [
+            code for code in self.postings.get(TRIMESTRE_COLUMN, {})
+            if (start is None or period_of(code) >= start) and (end is None or period_of(code) <= end)
+        ]
+
+    def period_bounds(self, periods: PeriodRange) -> Tuple[int, int]:
+        """Inicio y fin (exclusivo), en el orden por período, de las filas de un rango."""
+        start, end = periods
+        lo = 0 if start is None else int(np.searchsorted(self.periods, start, side='left'))
+        hi = len(self.periods) if end is None else int(np.searchsorted(self.periods, end, side='right'))
+        return lo, max(lo, hi)
+
+    def period_selection(self, periods: PeriodRange) -> Selection:
+        """Filas de un rango de períodos: un rango contiguo si el dataset está ordenado."""
+        if periods is None or self.periods is None:
+            return None
+        lo, hi = self.period_bounds(periods)
+        if self._period_order is None:
+            return slice(lo, hi)
+        return np.sort(self._period_order[lo:hi])
+
+    @staticmethod
+    def restrict(selection: np.ndarray, window: Selection) -> np.ndarray:
+        """Restringe posiciones ordenadas a una ventana; un rango contiguo se resuelve por búsqueda binaria."""
+        if window is None:
+            return selection
+        if isinstance(window, slice):
+            lo, hi = np.searchsorted(selection, [window.start, window.stop])
+            return selection[lo:hi]
+        return np.intersect1d(selection, window, assume_unique=True)
+
+    def _index_column(self, column: str, desc_column: Optional[str]) -> None:
+        """Construye las listas de posiciones de una columna con un solo ordenamiento."""
+        codes, uniques = pd.factorize(self.df[column], sort=True)
+        order = np.argsort(codes, kind='stable').astype(np.int32)
+        counts = np.bincount(codes[codes >= 0], minlength=len(uniques))
+        start = int((codes < 0).sum())
+        offsets = start + np.concatenate([[0], np.cumsum(counts)])
+
+        self.postings[column] = {
+            value: order[offsets[i]:offsets[i + 1]]
+            for i, value in enumerate(uniques)
+        }
+
+        if desc_column is not None:
+            descriptions = self.df[desc_column].to_numpy()
+            self.labels[column] = {
+                value: descriptions[positions[0]]
+                for value, positions in self.postings[column].items()
+                if len(positions)
+            }
+
+    def values(self, column: str) -> List:
+        """Valores observados de una columna indexada."""
+        return list(self.postings[column])
+
+    def options(self, column: str) -> List[Dict]:
+        """Pares (descripción, código) de una columna, en orden de aparición en los datos."""
+        labels = self.labels.get(column, {})
+        first_rows = sorted(
+            (positions[0], value) for value, positions in self.postings[column].items()
+            if len(positions)
+        )
+        return [{'label': labels.get(value, value), 'value': value} for _, value in first_rows]
+
+    def positions_for(self, column: str, values: Sequence) -> np.ndarray:
+        """Posiciones ordenadas de las filas cuyo valor está en ``values``."""
+        postings = self.postings[column]
+        parts = [postings[value] for value in values if value in postings]
+        if not parts:
+            return np.empty(0, dtype=np.int32)
+        if len(parts) == 1:
+            return parts[0]
+        return np.sort(np.concatenate(parts))
+
+    def select(self, filters: Optional[Dict[str, Sequence]] = None,
+               periods: PeriodRange = None) -> Selection:
+        """Resuelve filtros y rango de períodos a filas; ``None`` significa todas las filas."""
+        window = self.period_selection(periods)
+        selection = None
+        for column, values in (filters or {}).items():
+            if values is None:
+                continue
+            if column not in self.postings:
+                raise KeyError(f"Columna no indexada: {column}")
+
+            positions = self.positions_for(column, values)
+            selection = positions if selection is None else np.intersect1d(
+                selection, positions, assume_unique=True
+            )
+
+        if selection is None:
+            return window
+        return self.restrict(selection, window)
+
+    def rows(self, selection: Selection) -> pd.DataFrame:
+        """Materializa una selección (``None`` = todas las filas; un rango contiguo no se copia)."""
+        if selection is None:
+            return self.df
+        return self.df.iloc[selection]
+
+    def take(self, filters: Optional[Dict[str, Sequence]] = None,
+             periods: PeriodRange = None) -> pd.DataFrame:
+        """Retorna solo las filas seleccionadas por los filtros y el rango de períodos."""
+        return self.rows(self.select(filters, periods))
+
+
+class UnionFilterIndex:
+    """Índice sobre la unión de varios datasets, sin concatenar sus filas.
+
+    Una selección es la lista de selecciones de cada parte; al materializarla
+    solo se copian (y concatenan) las filas seleccionadas.
+    """
+
+    def __init__(self, parts: List[FilterIndex]):
+        self.parts = parts
+        self.n_rows = sum(part.n_rows for part in parts)
+
+    def values(self, column: str) -> List:
+        """Valores observados de una columna indexada en alguna de las partes."""
+        return list(dict.fromkeys(value for part in self.parts for value in part.values(column)))
+
+    def options(self, column: str) -> List[Dict]:
+        """Pares (descripción, código) en orden de aparición, recorriendo las partes en orden."""
+        options = {}
+        for part in self.parts:
+            for option in part.options(column):
+                options.setdefault(option['value'], option)
+        return list(options.values())
+
+    def period_values(self) -> np.ndarray:
+        """Períodos observados en alguna de las partes, en orden cronológico."""
+        return np.unique(np.concatenate([part.period_values() for part in self.parts]))
+
+    def period_codes(self, periods: PeriodRange) -> List:
+        """Códigos de trimestre cuyo período cae en el rango, en alguna de las partes."""
+        return list(dict.fromkeys(code for part in self.parts for code in part.period_codes(periods)))
+
+    def select(self, filters: Optional[Dict[str, Sequence]] = None,
+               periods: PeriodRange = None) -> Optional[List]:
+        """Resuelve filtros y rango de períodos en cada parte; ``None`` significa todas las filas."""
+        selections = [part.select(filters, periods) for part in self.parts]
+        if all(selection is None for selection in selections):
+            return None
+        return selections
+
+    def rows(self, selection: Optional[List]) -> pd.DataFrame:
+        """Materializa una selección concatenando solo las filas seleccionadas."""
+        if selection is None:
+            selection = [None] * len(self.parts)
+        return concat_datasets([
+            part.rows(part_selection)
+            for part, part_selection in zip(self.parts, selection)
+        ])
+
+    def take(self, filters: Optional[Dict[str, Sequence]] = None,
+             periods: PeriodRange = None) -> pd.DataFrame:
+        """Retorna solo las filas seleccionadas por los filtros y el rango de períodos."""
+        return self.rows(self.select(filters, periods))
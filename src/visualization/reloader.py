@@ -0,0 +1,72 @@
+import os
+from threading import Event, Lock, Thread
+from typing import Callable, Hashable, Optional
+from loguru import logger
+
+
+class DataReloader:
+    """Sondea los datos procesados y publica un nuevo snapshot cuando cambian.
+
+    ``signature`` identifica la versión de los datos en disco; ante un cambio
+    se llama a ``reload``, que debe cargar el snapshot completo y publicarlo
+    de forma atómica. El sondeo corre en un hilo en segundo plano.
+    """
+
+    def __init__(self, signature: Callable[[], Hashable], reload: Callable[[], None],
+                 interval: float = 60.0):
+        self.signature = signature
+        self.reload = reload
+        self.interval = interval
+        self.last_signature = None
+        self._stop = Event()
+        self._lock = Lock()
+        self._thread: Optional[Thread] = None
+        self._pid: Optional[int] = None
+
+    def mark_current(self) -> None:
+        """Registra la firma actual como la versión ya publicada."""
+        self.last_signature = self.signature()
+
+    def check(self) -> bool:
+        """Recarga si la firma cambió; retorna ``True`` si se publicó un nuevo snapshot."""
+        with self._lock:
+            current = self.signature()
+            if current == self.last_signature:
+                return False
+
+            try:
+                self.reload()
+            except Exception as e:
+                logger.error(f"Error recargando datos procesados: {e}")
+                return False
+
+            # Si los archivos cambiaron durante la carga, se recarga en el próximo sondeo
+            self.last_signature = current
+            return True
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            try:
+                self.check()
+            except Exception as e:
+                logger.error(f"Error sondeando datos procesados: {e}")
+
+    def ensure_started(self) -> None:
+        """Inicia el hilo de sondeo (también tras un fork, donde los hilos no sobreviven)."""
+        if self._thread is not None and self._thread.is_alive() and self._pid == os.getpid():
+            return
+
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive() and self._pid == os.getpid():
+                return
+            if self.last_signature is None:
+                self.last_signature = self.signature()
+            self._stop.clear()
+            self._pid = os.getpid()
+            self._thread = Thread(target=self._run, name='data-reloader', daemon=True)
+            self._thread.start()
+            logger.info(f"Sondeo de datos procesados cada {self.interval} s")
+
+    def stop(self) -> None:
+        """Detiene el hilo de sondeo."""
+        self._stop.set()
@@ -0,0 +1,180 @@
+import base64
+from threading import Lock
+from typing import Any, Dict, Optional
+import numpy as np
+import plotly.graph_objects as go
+from plotly.io.json import to_json_plotly
+from loguru import logger
+
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:  # pragma: no cover - dependencia opcional
+    ORJSON_AVAILABLE = False
+
+
+# Listas numéricas más cortas quedan como texto: el base64 no ahorra nada
+MIN_TYPED_LENGTH = 8
+
+
+def _compact_dtype(values: np.ndarray) -> np.dtype:
+    """Tipo más chico que representa ``values`` sin pérdida (enteros en float incluidos)."""
+    if values.dtype.kind == 'f':
+        finite = np.isfinite(values).all()
+        if not (finite and values.size and np.array_equal(values, np.trunc(values))):
+            return np.dtype('<f8')
+        low, high = values.min(), values.max()
+    elif values.size:
+        low, high = values.min(), values.max()
+    else:
+        return np.dtype('<i1')
+
+    # plotly.js no decodifica enteros de 64 bits: lo que no cabe en 32 va como f8
+    for dtype in ('i1', 'u1', 'i2', 'u2', 'i4', 'u4'):
+        info = np.iinfo(dtype)
+        if info.min <= low and high <= info.max:
+            return np.dtype('<' + dtype)
+    return np.dtype('<f8')
+
+
+def typed_array(values: np.ndarray) -> Dict[str, str]:
+    """Codifica un arreglo numérico como ``{'dtype', 'bdata'}`` (base64, little-endian).
+
+    Los enteros (y los float sin decimales, como ``valor``) usan el tipo
+    entero más chico que los contiene; los arreglos 2D llevan ``shape``.
+    """
+    values = np.asarray(values)
+    dtype = _compact_dtype(values)
+    encoded = {
+        'dtype': dtype.str[1:],
+        'bdata': base64.b64encode(np.ascontiguousarray(values, dtype=dtype).tobytes()).decode('ascii'),
+    }
+    if values.ndim > 1:
+        encoded['shape'] = ', '.join(str(size) for size in values.shape)
+    return encoded
+
+
+def _is_numeric(value: Any) -> bool:
+    return isinstance(value, (int, float, np.number)) and not isinstance(value, (bool, np.bool_))
+
+
+def _is_typed_array(value: Any) -> bool:
+    return isinstance(value, dict) and 'bdata' in value and 'dtype' in value
+
+
+def decode_typed_array(spec: Dict[str, str]) -> np.ndarray:
+    """Arreglo numpy de un ``{'dtype', 'bdata'[, 'shape']}``."""
+    values = np.frombuffer(base64.b64decode(spec['bdata']), dtype='<' + spec['dtype'])
+    if spec.get('shape'):
+        values = values.reshape([int(size) for size in str(spec['shape']).split(',')])
+    return values
+
+
+def _encode_numeric(values: np.ndarray) -> Any:
+    """Arreglo tipado, salvo que sea corto o que el texto decimal resulte más chico."""
+    if values.size < MIN_TYPED_LENGTH:
+        return values.tolist()
+    encoded = typed_array(values)
+    if encoded['dtype'] == 'f8' and len(to_json(values.tolist())) < len(encoded['bdata']):
+        # Decimales cortos (p. ej. 12.5) ocupan menos como texto que 8 bytes en base64
+        return values.tolist()
+    return encoded
+
+
+def encode_arrays(value: Any) -> Any:
+    """Reemplaza recursivamente los arreglos numéricos por arreglos tipados compactos.
+
+    Los arreglos que plotly ya entrega codificados se vuelven a compactar
+    (plotly no reduce, por ejemplo, ``i4`` a ``u1``).
+    """
+    if _is_typed_array(value):
+        return _encode_numeric(decode_typed_array(value))
+    if isinstance(value, dict):
+        return {key: encode_arrays(item) for key, item in value.items()}
+    if isinstance(value, np.ndarray):
+        if value.dtype.kind in 'iuf':
+            return _encode_numeric(value)
+        return value.tolist()
+    if isinstance(value, (list, tuple)):
+        if len(value) >= MIN_TYPED_LENGTH and all(_is_numeric(item) for item in value):
+            return _encode_numeric(np.asarray(value))
+        return [encode_arrays(item) for item in value]
+    return value
+
+
+class EncodedFigure(dict):
+    """Figura codificada lista para Dash, con sus bytes JSON medidos una sola vez.
+
+    Es un ``dict`` común para la respuesta; ``size`` (figura completa) y
+    ``patch_size`` (sin template, lo que envía un ``Patch``) quedan en
+    ``None`` si no se pidió medirla.
+    """
+
+    def __init__(self, figure: Dict[str, Any], measure: bool = False):
+        super().__init__(figure)
+        self.size: Optional[int] = None
+        self.patch_size: Optional[int] = None
+        if measure:
+            layout = {key: value for key, value in self['layout'].items() if key != 'template'}
+            self.size = payload_size(figure)
+            self.patch_size = payload_size({'data': self['data'], 'layout': layout})
+
+
+def encode_figure(figure: go.Figure, measure: bool = False) -> EncodedFigure:
+    """Figura como diccionario listo para enviar, con las trazas en arreglos tipados.
+
+    Solo se codifican los datos de las trazas; el layout (rangos, dominios,
+    template) queda igual. Con ``measure`` se calculan además sus bytes.
+    """
+    payload = figure.to_plotly_json()
+    return EncodedFigure({
+        'data': [encode_arrays(trace) for trace in payload.get('data', [])],
+        'layout': payload.get('layout', {}),
+    }, measure=measure)
+
+
+def to_json(value: Any) -> str:
+    """Serializa con el mismo codificador que usa Dash para las respuestas (orjson si está)."""
+    return to_json_plotly(value, engine='orjson' if ORJSON_AVAILABLE else 'json')
+
+
+def payload_size(value: Any) -> int:
+    """Bytes JSON de una salida de callback tal como se envía al navegador."""
+    return len(to_json(value).encode('utf-8'))
+
+
+class PayloadMeter:
+    """Acumula los bytes enviados por cada salida de callback.
+
+    Cada respuesta se registra en el log (nivel DEBUG) y los totales por
+    salida quedan disponibles para ``/health``.
+    """
+
+    def __init__(self):
+        self._stats: Dict[str, Dict[str, int]] = {}
+        self._lock = Lock()
+
+    def record(self, output: str, value: Any) -> Optional[int]:
+        """Mide y registra una salida; retorna sus bytes (``None`` si no se puede medir)."""
+        try:
+            size = payload_size(value)
+        except Exception as e:
+            logger.warning(f"No se pudo medir la salida {output}: {e}")
+            return None
+        return self.record_size(output, size)
+
+    def record_size(self, output: str, size: int) -> int:
+        """Registra una salida ya medida (p. ej. una figura cacheada con su tamaño)."""
+        with self._lock:
+            stats = self._stats.setdefault(output, {'responses': 0, 'bytes': 0, 'last': 0, 'max': 0})
+            stats['responses'] += 1
+            stats['bytes'] += size
+            stats['last'] = size
+            stats['max'] = max(stats['max'], size)
+        logger.debug(f"Salida {output}: {size:,} bytes")
+        return size
+
+    def summary(self) -> Dict[str, Dict[str, int]]:
+        """Copia de los totales por salida."""
+        with self._lock:
+            return {output: dict(stats) for output, stats in self._stats.items()}
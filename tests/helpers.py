@@ -0,0 +1,44 @@
+"""Utilidades compartidas por los tests: archivos raw sintéticos y directorios de trabajo."""
+
+import tempfile
+from pathlib import Path
+from typing import Tuple
+import pandas as pd
+
+from src.utils.helpers import PathManager
+
+
+def write_raw_files(base_path: Path, periods: int = 4) -> None:
+    """Genera archivos raw sintéticos con el formato del INE."""
+    sexos = [('_T', 'Ambos sexos'), ('M', 'Hombres'), ('F', 'Mujeres')]
+    raw_files = {
+        'ocupados_categoria_ocupacional.csv': ('DTI_CL_CISE', [('ICSE93_T', 'Total'), ('ICSE93_2', 'Cuenta propia')]),
+        'ocupados_grupo_ocupacional_ciuo88.csv': ('DTI_CL_GRUPO_OCU', [('ISCO88_T', 'Total'), ('ISCO88_1', 'Directivos')]),
+    }
+
+    for filename, (code_column, grupos) in raw_files.items():
+        rows = []
+        for month in range(1, periods + 1):
+            for grupo_code, grupo_desc in grupos:
+                for sexo_code, sexo_desc in sexos:
+                    rows.append({
+                        'DTI_CL_TRIMESTRE_MOVIL': f'2018-V{month:02d}',
+                        'Trimestre Móvil': f'2018 periodo {month:02d}',
+                        'DTI_CL_REGION': 'CHL14',
+                        'Región': 'Región de Los Ríos',
+                        code_column: grupo_code,
+                        'Grupo ocupacional': grupo_desc,
+                        'DTI_CL_SEXO': sexo_code,
+                        'Sexo': sexo_desc,
+                        'Value': month * 10.4
+                    })
+        pd.DataFrame(rows).to_csv(base_path / 'data' / 'raw' / filename, index=False)
+
+
+def raw_workspace(periods: int = 4) -> Tuple[tempfile.TemporaryDirectory, Path]:
+    """Directorio temporal con la estructura del proyecto y archivos raw sintéticos."""
+    tmp_dir = tempfile.TemporaryDirectory()
+    base_path = Path(tmp_dir.name)
+    PathManager(base_path)
+    write_raw_files(base_path, periods)
+    return tmp_dir, base_path
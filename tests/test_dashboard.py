@@ -4,16 +4,33 @@ Script de prueba para verificar que el dashboard funciona correctamente
 con los cambios de 'value' a 'valor' y las etiquetas actualizadas.
 """
 
+import json
+import unittest
+import tempfile
+from unittest import mock
+import dash
+import numpy as np
 import pandas as pd
+import plotly.io as pio
+import plotly.graph_objects as go
+from src.visualization.charts import OcupacionVisualizer
 from src.visualization.dashboard import DashboardApp
 from src.etl.processors import ETLPipeline
+from src.etl.storage import ProcessedDataStore
+from src.utils.helpers import PathManager
+from tests.helpers import raw_workspace, write_raw_files
+
+
+def load_unified_data():
+    """Lee el dataset unificado desde el almacenamiento columnar."""
+    return ProcessedDataStore(PathManager()).read_datasets()['unified']
 
 def test_data_structure():
     """Prueba la estructura de datos procesados."""
     print("=== Verificando estructura de datos ===")
     
     # Leer datos procesados
-    df = pd.read_csv('data/processed/ocupacion_laboral_unified.csv')
+    df = load_unified_data()
     
     print(f"Columnas del dataset: {list(df.columns)}")
     print(f"Total de registros: {len(df)}")
@@ -41,7 +58,7 @@ def test_visualization():
     from src.visualization.charts import OcupacionVisualizer
     
     # Leer datos
-    df = pd.read_csv('data/processed/ocupacion_laboral_unified.csv')
+    df = load_unified_data()
     
     # Crear visualizador
     viz = OcupacionVisualizer()
@@ -73,6 +90,445 @@ def test_visualization():
         print(f"❌ Error creando visualizaciones: {e}")
         return False
 
+class TestFilterIndex(unittest.TestCase):
+    """Tests del índice de filtros del dashboard."""
+    
+    def setUp(self):
+        from src.visualization.filter_index import FilterIndex
+        
+        self.df = pd.DataFrame({
+            'sexo_code': pd.Categorical(['_T', 'M', 'F', 'M', 'F', '_T']),
+            'sexo_desc': pd.Categorical(['Ambos sexos', 'Hombres', 'Mujeres',
+                                         'Hombres', 'Mujeres', 'Ambos sexos']),
+            'trimestre_movil': ['2018-V01', '2018-V01', '2018-V01', '2018-V02', '2018-V02', '2018-V02'],
+            'valor': [10, 4, 6, 11, 5, 16]
+        })
+        self.index = FilterIndex(self.df)
+    
+    def test_select_matches_boolean_filter(self):
+        """Test de selección por intersección contra filtros booleanos."""
+        filters = {'sexo_code': ['M', 'F'], 'trimestre_movil': ['2018-V02']}
+        expected = self.df[self.df['sexo_code'].isin(['M', 'F'])
+                           & (self.df['trimestre_movil'] == '2018-V02')]
+        
+        pd.testing.assert_frame_equal(self.index.take(filters), expected)
+        self.assertIs(self.index.take({'sexo_code': None}), self.df)
+        self.assertEqual(len(self.index.take({'sexo_code': ['X']})), 0)
+    
+    def test_options_in_order_of_appearance(self):
+        """Test de opciones de sexo equivalentes a drop_duplicates."""
+        self.assertEqual(self.index.options('sexo_code'), [
+            {'label': 'Ambos sexos', 'value': '_T'},
+            {'label': 'Hombres', 'value': 'M'},
+            {'label': 'Mujeres', 'value': 'F'}
+        ])
+
+    def test_period_range_uses_sorted_slices(self):
+        """Test de rangos de períodos resueltos por búsqueda binaria."""
+        from src.etl.schema import period_of
+
+        start = period_of('2018-V02')
+        self.assertEqual(start, 2018 * 12 + 1)
+        self.assertTrue(self.index.period_sorted)
+        self.assertEqual(self.index.select(periods=(start, None)), slice(3, 6))
+
+        expected = self.df.iloc[[3, 4]]
+        pd.testing.assert_frame_equal(self.index.take({'sexo_code': ['M', 'F']}, (start, start)), expected)
+
+        # Sin orden por período se recurre a la permutación ordenada
+        from src.visualization.filter_index import FilterIndex
+        index = FilterIndex(self.df.iloc[::-1].reset_index(drop=True))
+        self.assertFalse(index.period_sorted)
+        self.assertEqual(index.select(periods=(None, start - 1)).tolist(), [3, 4, 5])
+
+
+class TestFastFigures(unittest.TestCase):
+    """Tests de las figuras construidas sin plotly.express."""
+
+    def setUp(self):
+        self.df = pd.DataFrame({
+            'grupo_ocupacional_desc': pd.Categorical(['Zeta', 'Alfa', 'Zeta', 'Beta', 'Alfa', 'Beta']),
+            'sexo_code': pd.Categorical(['F', 'M', 'M', 'F', 'F', 'M']),
+            'sexo_desc': pd.Categorical(['Mujeres', 'Hombres', 'Hombres', 'Mujeres', 'Mujeres', 'Hombres']),
+            'trimestre_movil': ['2020-V02', '2020-V01', '2020-V01', '2020-V02', '2020-V01', '2020-V02'],
+            'trimestre_movil_desc': ['2020 feb-abr', '2020 ene-mar', '2020 ene-mar',
+                                     '2020 feb-abr', '2020 ene-mar', '2020 feb-abr'],
+            'fuente': pd.Categorical(['CIUO88'] * 6),
+            'valor': [1.5, 2.0, 3.25, 4.0, 5.0, 6.5]
+        })
+        self.visualizer = OcupacionVisualizer()
+
+    def assertSameFigure(self, first, second):
+        self.assertEqual(json.loads(pio.to_json(first)), json.loads(pio.to_json(second)))
+
+    def test_matches_plotly_express(self):
+        """Test de paridad del JSON de barras, líneas y tortas contra px."""
+        express = OcupacionVisualizer()
+        express.figures = None
+
+        self.assertIsNotNone(self.visualizer.figures)
+        for chart_type in ('bar', 'line', 'pie'):
+            with self.subTest(chart_type=chart_type):
+                self.assertSameFigure(self.visualizer.create_chart(self.df, chart_type),
+                                      express.create_chart(self.df, chart_type))
+
+    def test_box_plot_statistics_computed_server_side(self):
+        """Test de cajas precalculadas: cuartiles, bigotes y atípicos acotados."""
+        values = [1.0, 2.0, 3.0, 4.0, 5.0, 6.0, 7.0, 8.0, 100.0, 200.0, 10.0, 20.0, 30.0]
+        df = pd.DataFrame({
+            'sexo_desc': ['Hombres'] * 10 + ['Mujeres'] * 3,
+            'valor': values
+        })
+        self.visualizer.config.config['box_max_outliers'] = 1
+        fig = self.visualizer.create_chart(df, 'box')
+
+        boxes = [trace for trace in fig.data if trace.type == 'box']
+        points = [trace for trace in fig.data if trace.type == 'scatter']
+        self.assertEqual([box.name for box in boxes], ['Hombres', 'Mujeres'])
+        hombres = pd.Series(values[:10])
+        self.assertEqual(boxes[0].q1[0], hombres.quantile(0.25))
+        self.assertEqual(boxes[0].median[0], 5.5)
+        self.assertEqual((boxes[0].lowerfence[0], boxes[0].upperfence[0]), (1.0, 8.0))
+        self.assertEqual((boxes[1].lowerfence[0], boxes[1].upperfence[0]), (10.0, 30.0))
+        # Solo el atípico más extremo de Hombres; ninguna traza lleva las filas crudas
+        self.assertEqual(len(points), 1)
+        self.assertEqual(list(points[0].y), [200.0])
+        self.assertTrue(all(box.y is None for box in boxes))
+
+    def test_line_downsampled_to_width_with_zoom_detail(self):
+        """Test de la reducción LTTB por ancho, el detalle al hacer zoom y el cambio a WebGL."""
+        from src.visualization.downsample import lttb_indices
+
+        y = np.zeros(1000)
+        y[123], y[700] = 50.0, -50.0
+        kept = lttb_indices(np.arange(1000), y, 20)
+        self.assertEqual(len(kept), 20)
+        self.assertEqual((kept[0], kept[-1]), (0, 999))
+        self.assertTrue({123, 700} <= set(kept))
+
+        periods = [f"{year} m{month:02d}" for year in range(2000, 2025) for month in range(1, 13)]
+        df = pd.DataFrame({
+            'trimestre_movil_desc': periods * 2,
+            'sexo_desc': ['Hombres'] * len(periods) + ['Mujeres'] * len(periods),
+            'valor': np.arange(2 * len(periods), dtype=float)
+        })
+        visualizer = self.visualizer
+
+        full = visualizer.create_chart(df, 'line')
+        self.assertEqual([len(trace.x) for trace in full.data], [300, 300])
+        self.assertEqual([trace.type for trace in full.data], ['scatter', 'scatter'])
+
+        reduced = visualizer.create_chart(df, 'line', width=50)
+        self.assertEqual([len(trace.x) for trace in reduced.data], [50, 50])
+        self.assertEqual(list(reduced.layout.xaxis.categoryarray), periods)
+
+        # El zoom suma el tramo visible completo y conserva el resto grueso
+        zoomed = visualizer.create_chart(df, 'line', width=50, x_range=(10.0, 40.0))
+        self.assertTrue(set(periods[10:41]) <= set(zoomed.data[0].x))
+        self.assertTrue(set(reduced.data[0].x) <= set(zoomed.data[0].x))
+        self.assertLess(len(zoomed.data[0].x), 50 + 31)
+
+        # Series que caben en el ancho no se recortan al zoom
+        self.assertEqual(len(visualizer.create_chart(df, 'line', x_range=(10.0, 20.0)).data[0].x), 300)
+
+        visualizer.config.config['webgl_threshold'] = 80
+        self.assertEqual(visualizer.create_chart(df, 'line', width=50).data[0].type, 'scattergl')
+
+        self.assertEqual(DashboardApp._zoom_range({'xaxis.range[0]': 9.6, 'xaxis.range[1]': 40.2}),
+                         (9.0, 41.0))
+        self.assertIsNone(DashboardApp._zoom_range({'xaxis.autorange': True}))
+
+    def test_dashboard_charts_parallel_matches_serial(self):
+        """Test del conjunto de gráficos construido en paralelo sobre la columna 'valor'."""
+        serial = self.visualizer.create_dashboard_charts(self.df, max_workers=1)
+        parallel = self.visualizer.create_dashboard_charts(self.df, max_workers=4)
+
+        self.assertEqual(list(parallel), ['bar_grupos', 'line_temporal', 'pie_total',
+                                          'heatmap', 'box_distribution', 'sunburst'])
+        for name, figure in serial.items():
+            self.assertSameFigure(parallel[name], figure)
+
+
+class TestLRUCache(unittest.TestCase):
+    """Tests de la caché LRU de figuras."""
+    
+    def test_entry_limit_evicts_least_recently_used(self):
+        """Test de desalojo por cantidad de entradas."""
+        from src.utils.cache import LRUCache
+        
+        cache = LRUCache(max_entries=2)
+        cache.put('a', 1)
+        cache.put('b', 2)
+        cache.get('a')
+        cache.put('c', 3)
+        
+        self.assertIn('a', cache)
+        self.assertNotIn('b', cache)
+        self.assertEqual(cache.hits, 1)
+    
+    def test_size_limit_and_get_or_compute(self):
+        """Test de desalojo por tamaño y cálculo solo en fallos."""
+        from src.utils.cache import LRUCache
+        
+        cache = LRUCache(max_entries=None, max_bytes=10, size_of=len)
+        calls = []
+        
+        for key in ['aaaa', 'bbbb', 'aaaa', 'cccc']:
+            cache.get_or_compute(key, lambda key=key: calls.append(key) or key)
+        
+        self.assertEqual(calls, ['aaaa', 'bbbb', 'cccc'])
+        self.assertLessEqual(cache.current_bytes, 10)
+        self.assertNotIn('bbbb', cache)
+        
+        cache.clear()
+        self.assertEqual(len(cache), 0)
+
+
+class TestDashboardCallbacks(unittest.TestCase):
+    """Tests de los callbacks del dashboard sobre datos sintéticos."""
+    
+    @classmethod
+    def setUpClass(cls):
+        cls.tmp_dir, base_path = raw_workspace()
+        ETLPipeline(base_path).run_full_pipeline()
+        cls.dashboard = DashboardApp(base_path)
+    
+    @classmethod
+    def tearDownClass(cls):
+        cls.tmp_dir.cleanup()
+    
+    def callbacks(self, dashboard=None):
+        return {
+            entry['callback'].__name__: entry
+            for entry in (dashboard or self.dashboard).app.callback_map.values()
+        }
+    
+    def test_callbacks_depend_only_on_used_inputs(self):
+        """Test de que el tipo de gráfico solo alimenta el gráfico principal."""
+        callbacks = self.callbacks()
+        for name in ('update_metrics', 'update_temporal_chart', 'update_distribution_chart'):
+            inputs = [item['id'] for item in callbacks[name]['inputs']]
+            self.assertEqual(inputs[:3], ['dataset-dropdown', 'sexo-dropdown', 'period-slider'])
+        # El gráfico temporal además escucha su propio zoom
+        temporal = [item['id'] for item in callbacks['update_temporal_chart']['inputs']]
+        self.assertEqual(temporal[3:], ['temporal-chart'])
+    
+    def test_selection_computed_once_per_input_change(self):
+        """Test de que la selección filtrada se comparte entre callbacks."""
+        callbacks = self.callbacks()
+        self.dashboard.selection_cache.clear()
+        misses = self.dashboard.selection_cache.misses
+        
+        total, hombres, mujeres, _ = callbacks['update_metrics']['callback'].__wrapped__(
+            'unified', ['M', 'F'])
+        callbacks['update_temporal_chart']['callback'].__wrapped__('unified', ['M', 'F'])
+        callbacks['update_main_chart']['callback'].__wrapped__('unified', ['M', 'F'], 'box')
+        
+        self.assertEqual(self.dashboard.selection_cache.misses - misses, 1)
+        self.assertEqual(
+            int(total.replace(',', '')),
+            int(hombres.replace(',', '')) + int(mujeres.replace(',', ''))
+        )
+
+    
+    def test_sexo_change_sends_patch_without_template(self):
+        """Test de actualización parcial cuando solo cambia el filtro de sexo."""
+        # Figura anterior sin datos: su anotación no debe quedar en el navegador
+        self.dashboard._encode(go.Figure().add_annotation(text="Sin datos", showarrow=False))
+        figure = self.dashboard._encode(
+            self.dashboard._build_main_chart(self.dashboard.datasets, 'unified', ['M'], 'box')
+        )
+        self.assertIs(self.dashboard._figure_update(figure), figure)
+        
+        with mock.patch.object(DashboardApp, '_triggered_ids', return_value={'sexo-dropdown'}):
+            patch = self.dashboard._figure_update(figure)
+        operations = {
+            tuple(operation['location']): operation
+            for operation in patch.to_plotly_json()['operations']
+        }
+        self.assertEqual(len(operations[('data',)]['params']['value']), len(figure['data']))
+        self.assertIn(('layout', 'xaxis'), operations)
+        self.assertNotIn(('layout', 'template'), operations)
+        self.assertEqual(operations[('layout', 'annotations')]['operation'], 'Delete')
+
+    def test_relayout_without_detail_change_sends_nothing(self):
+        """Test de que solo un zoom sobre series reducidas vuelve a enviar el gráfico temporal."""
+        update_temporal = self.callbacks()['update_temporal_chart']['callback'].__wrapped__
+        zoom = {'xaxis.range[0]': 0.6, 'xaxis.range[1]': 2.2}
+
+        with mock.patch.object(DashboardApp, '_triggered_ids', return_value={'temporal-chart'}):
+            self.assertIs(update_temporal('unified', ['M'], None, {'autosize': True}), dash.no_update)
+            # 4 períodos caben en el ancho: el zoom no cambia los datos
+            self.assertIs(update_temporal('unified', ['M'], None, zoom), dash.no_update)
+
+            with mock.patch.dict(self.dashboard.visualizer.config.config, {'plot_width': 3}):
+                self.assertIs(update_temporal('unified', ['M'], None, {'dragmode': 'pan'}), dash.no_update)
+                self.assertIsInstance(update_temporal('unified', ['M'], None, zoom), dash.Patch)
+
+    
+    def test_period_window_limits_metrics_and_rows(self):
+        """Test de la ventana de períodos: métricas y filas solo del rango elegido."""
+        callbacks = self.callbacks()
+        periods = self.dashboard.datasets.index('unified').period_values()
+        low, high, marks, value = callbacks['update_period_range']['callback'].__wrapped__('unified', None)
+        self.assertEqual((low, high, value), (periods[0], periods[-1], [periods[0], periods[-1]]))
+        self.assertEqual(marks, {int(periods[0]): '2018'})
+        
+        # Toda la historia equivale a no filtrar
+        update_metrics = callbacks['update_metrics']['callback'].__wrapped__
+        self.assertEqual(update_metrics('unified', None, value), update_metrics('unified', None))
+        
+        last = int(periods[-1])
+        total = int(update_metrics('categoria_ocupacional', ['_T'], [last, last])[0].replace(',', ''))
+        frame = self.dashboard.datasets.frame('categoria_ocupacional')
+        expected = frame[(frame['periodo'] == last) & (frame['sexo_code'] == '_T')]['valor'].sum()
+        self.assertEqual(total, expected)
+        
+        # Las filas de la ventana se toman como un rango contiguo
+        selection = self.dashboard._get_selection(
+            self.dashboard.datasets, 'categoria_ocupacional', None, (last, last)
+        )
+        self.assertIsInstance(selection['positions'], slice)
+        self.assertEqual(selection['filters']['trimestre_movil'], ['2018-V04'])
+    
+    def test_figures_sent_as_typed_arrays_and_metered(self):
+        """Test de figuras con arreglos tipados compactos y bytes registrados por salida."""
+        from src.visualization.serialization import decode_typed_array, encode_arrays, payload_size
+
+        valor = np.array([70000.0, 8.0, 120.0, 3.0, 15.0, 1.0, 99.0, 100000.0])
+        encoded = encode_arrays({'y': valor, 'x': ['a', 'b'], 'q1': np.array([2.5])})
+        self.assertEqual(encoded['y']['dtype'], 'i4')
+        np.testing.assert_array_equal(decode_typed_array(encoded['y']), valor)
+        self.assertEqual((encoded['x'], encoded['q1']), (['a', 'b'], [2.5]))
+
+        # La medición es opcional; cada figura se mide una vez al cachearla
+        self.assertIsNone(self.dashboard.payload_meter)
+        with mock.patch.dict('os.environ', {'PAYLOAD_METRICS': 'true'}):
+            dashboard = DashboardApp(self.dashboard.path_manager.base_path)
+        callbacks = self.callbacks(dashboard)
+        update_temporal = callbacks['update_temporal_chart']['callback'].__wrapped__
+        figure = update_temporal('unified', None)
+        self.assertIsInstance(figure['data'][0]['y'], (dict, list))
+        self.assertEqual(figure.size, payload_size(figure))
+        callbacks['update_metrics']['callback'].__wrapped__('unified', None)
+
+        with mock.patch('src.visualization.serialization.payload_size') as measure:
+            self.assertIs(update_temporal('unified', None), figure)
+            measure.assert_not_called()
+
+        payload = dashboard.app.server.test_client().get('/health').get_json()['payload_bytes']
+        self.assertEqual(payload['temporal-chart.figure'], {
+            'responses': 2, 'bytes': 2 * figure.size, 'last': figure.size, 'max': figure.size
+        })
+        self.assertEqual(payload['total-ocupados.children']['responses'], 1)
+
+    def test_production_dashboard_builds_indexes_before_fork(self):
+        """Test del dashboard de producción: índices listos al crearlo y sin ETL al vuelo."""
+        from src.visualization.dashboard import create_production_dashboard
+
+        dashboard = create_production_dashboard(self.dashboard.path_manager.base_path)
+        self.assertTrue(dashboard.datasets.is_ready)
+
+        with tempfile.TemporaryDirectory() as empty_dir:
+            with mock.patch.object(ETLPipeline, 'run_full_pipeline') as run_etl:
+                with self.assertRaises(FileNotFoundError):
+                    create_production_dashboard(empty_dir)
+                run_etl.assert_not_called()
+
+    def test_health_check_does_not_load_data(self):
+        """Test de que /health responde sin esperar la carga de datos."""
+        dashboard = DashboardApp(self.dashboard.path_manager.base_path)
+        response = dashboard.app.server.test_client().get('/health')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.get_json()['datasets'], [])
+        
+        dashboard.datasets.warm_up(background=False)
+        self.assertTrue(dashboard.app.server.test_client().get('/health').get_json()['ready'])
+    
+    def test_missing_data_runs_etl_in_background(self):
+        """Test de que un callback sin datos procesados no ejecuta el ETL en la petición."""
+        from src.visualization.datasets import DatasetsNotReady
+        
+        tmp_dir, base_path = raw_workspace()
+        self.addCleanup(tmp_dir.cleanup)
+        dashboard = DashboardApp(base_path, warm_up=False)
+        update_main = self.callbacks(dashboard)['update_main_chart']['callback'].__wrapped__
+        
+        with self.assertRaises(DatasetsNotReady) as raised:
+            update_main('unified', None, 'bar')
+        # Dash deja las salidas sin cambios hasta que el ETL termine
+        self.assertIsNone(DashboardApp._on_callback_error(raised.exception))
+        
+        dashboard.datasets._warmup_thread.join()
+        self.assertTrue(dashboard.datasets.is_ready)
+        self.assertGreater(len(update_main('unified', None, 'bar')['data']), 0)
+    
+    def test_unified_view_matches_concatenation(self):
+        """Test de la vista unificada virtual frente a la concatenación de sus partes."""
+        datasets = self.dashboard.datasets
+        expected = ProcessedDataStore(self.dashboard.path_manager).read_datasets()['unified']
+        unified = datasets.index('unified')
+        
+        pd.testing.assert_frame_equal(
+            unified.take({'sexo_code': ['M']}),
+            expected[expected['sexo_code'] == 'M'].reset_index(drop=True)
+        )
+        self.assertEqual(unified.n_rows, len(expected))
+        self.assertEqual(
+            [option['value'] for option in unified.options('sexo_code')], ['_T', 'M', 'F']
+        )
+
+    
+    def test_preloaded_datasets_are_not_read_from_disk(self):
+        """Test del traspaso en memoria de los resultados del ETL al dashboard."""
+        base_path = self.dashboard.path_manager.base_path
+        results = ETLPipeline(base_path).run_full_pipeline()
+        dashboard = DashboardApp(base_path, datasets=results)
+        
+        with mock.patch.object(dashboard.store, 'read_dataset') as read_dataset:
+            frame = dashboard.datasets.frame('categoria_ocupacional')
+            unified = dashboard.datasets.index('unified')
+            read_dataset.assert_not_called()
+        self.assertIs(frame, results['categoria_ocupacional'])
+        self.assertEqual(unified.n_rows, len(results['unified']))
+
+
+
+class TestDataReload(unittest.TestCase):
+    """Tests de la recarga en caliente de los datos procesados."""
+    
+    def setUp(self):
+        self.tmp_dir, self.base_path = raw_workspace()
+        ETLPipeline(self.base_path).run_full_pipeline()
+        self.dashboard = DashboardApp(self.base_path)
+    
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+    
+    def metrics(self, snapshot):
+        return self.dashboard._build_metrics(snapshot, 'unified', None)
+    
+    def test_new_outputs_are_swapped_in_atomically(self):
+        """Test de publicación de un nuevo snapshot sin afectar al anterior."""
+        old_snapshot = self.dashboard.datasets
+        old_metrics = self.metrics(old_snapshot)
+        self.assertFalse(self.dashboard.reloader.check())
+        
+        write_raw_files(self.base_path, periods=5)
+        ETLPipeline(self.base_path).run_full_pipeline()
+        self.assertTrue(self.dashboard.reloader.check())
+        
+        new_snapshot = self.dashboard.datasets
+        self.assertIsNot(new_snapshot, old_snapshot)
+        self.assertEqual(new_snapshot.version, old_snapshot.version + 1)
+        self.assertTrue(new_snapshot.is_ready)
+        self.assertEqual(len(self.dashboard.figure_cache), 0)
+        self.assertNotEqual(self.metrics(new_snapshot), old_metrics)
+        
+        # Un callback en curso sigue viendo el snapshot anterior
+        self.assertEqual(self.metrics(old_snapshot), old_metrics)
+
+
 def main():
     """Función principal de prueba."""
     print("🔍 Iniciando pruebas del dashboard actualizado...")
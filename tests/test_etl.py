@@ -1,4 +1,7 @@
 import unittest
+import tempfile
+import warnings
+from unittest import mock
 import pandas as pd
 import sys
 from pathlib import Path
@@ -6,8 +9,12 @@ from pathlib import Path
 # Agregar src al path
 sys.path.append(str(Path(__file__).parent.parent / "src"))
 
-from src.etl.processors import CategoriaOcupacionalProcessor, GrupoOcupacionalProcessor
+from src.etl.cube import OcupacionCube
+from src.etl.processors import CategoriaOcupacionalProcessor, GrupoOcupacionalProcessor, ETLPipeline
+from src.etl.schema import PROCESSED_DTYPES, concat_datasets
+from src.etl.storage import ProcessedDataStore
 from src.utils.helpers import PathManager, DataValidator, DataCleaner
+from tests.helpers import raw_workspace, write_raw_files
 
 
 class TestETLProcessors(unittest.TestCase):
@@ -63,6 +70,319 @@ class TestETLProcessors(unittest.TestCase):
         self.assertEqual(len(cleaned_df), 3)
 
 
+class TestProcessedDataStore(unittest.TestCase):
+    """Tests para el almacenamiento columnar de datos procesados."""
+    
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.path_manager = PathManager(self.tmp_dir.name)
+        self.df = pd.DataFrame({
+            'sexo_code': pd.Categorical(['_T', 'M', 'F']),
+            'sexo_desc': ['Ambos sexos', 'Hombres', 'Mujeres'],
+            'valor': [188, 111, 77]
+        })
+    
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+    
+    def test_roundtrip_preserves_dtypes(self):
+        """Test de escritura/lectura conservando categorías."""
+        for storage_format in ['parquet', 'arrow']:
+            store = ProcessedDataStore(self.path_manager, storage_format=storage_format)
+            store.write(self.df, 'test_dataset')
+            
+            result = store.read('test_dataset')
+            self.assertIsInstance(result['sexo_code'].dtype, pd.CategoricalDtype)
+            pd.testing.assert_frame_equal(result, self.df)
+    
+    def test_column_projection_and_csv_export(self):
+        """Test de proyección de columnas y exportación CSV opcional."""
+        store = ProcessedDataStore(self.path_manager, export_csv=True)
+        store.write(self.df, 'test_dataset')
+        
+        result = store.read('test_dataset', columns=['valor'])
+        self.assertEqual(list(result.columns), ['valor'])
+        self.assertTrue(store.path_for('test_dataset', 'csv').exists())
+    
+    def test_memory_mapped_read_shares_buffers(self):
+        """Test de lectura por memory-map desde la copia Arrow compartida."""
+        store = ProcessedDataStore(self.path_manager, storage_format='parquet')
+        store.write(self.df, 'categoria_ocupacional_processed')
+        snapshot_dir = store.path_for('categoria_ocupacional_processed').parent
+        
+        # La copia se escribe al publicar; leer no modifica el snapshot
+        self.assertTrue(store.path_for('categoria_ocupacional_processed', 'arrow').exists())
+        published = sorted(path.name for path in snapshot_dir.iterdir())
+        result = store.read_mapped('categoria_ocupacional_processed')
+        self.assertEqual(sorted(path.name for path in snapshot_dir.iterdir()), published)
+        pd.testing.assert_frame_equal(result, self.df)
+        
+        # Vistas de solo lectura sobre el archivo mapeado, no copias
+        self.assertFalse(result['valor'].to_numpy().flags.writeable)
+        self.assertFalse(result['sexo_code'].cat.codes.to_numpy().flags.writeable)
+
+
+class TestETLPipeline(unittest.TestCase):
+    """Tests del pipeline ETL completo."""
+    
+    def setUp(self):
+        self.tmp_dir, self.base_path = raw_workspace()
+    
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+    
+    def test_incremental_run_skips_unchanged_inputs(self):
+        """Test de omisión de procesadores sin cambios en sus archivos raw."""
+        first = ETLPipeline(self.base_path).run_full_pipeline()
+        
+        pipeline = ETLPipeline(self.base_path)
+        with mock.patch.object(pipeline.categoria_processor, 'extract') as extract:
+            second = pipeline.run_full_pipeline()
+            extract.assert_not_called()
+        pd.testing.assert_frame_equal(first['unified'], second['unified'])
+        
+        # Un archivo raw modificado vuelve a procesarse
+        write_raw_files(self.base_path, periods=5)
+        third = ETLPipeline(self.base_path).run_full_pipeline()
+        self.assertGreater(len(third['categoria_ocupacional']), len(first['categoria_ocupacional']))
+
+    def test_failed_run_does_not_record_manifest(self):
+        """Test de que una ejecución abortada no deja huellas de salidas descartadas."""
+        first = ETLPipeline(self.base_path).run_full_pipeline()
+        self.assertEqual(len(first['categoria_ocupacional']), 24)
+
+        write_raw_files(self.base_path, periods=6)
+        pipeline = ETLPipeline(self.base_path)
+        with mock.patch.object(pipeline.grupo_processor, 'transform', side_effect=RuntimeError('falla')):
+            with self.assertRaises(RuntimeError):
+                pipeline.run_full_pipeline()
+
+        rerun = ETLPipeline(self.base_path).run_full_pipeline()
+        self.assertEqual(len(rerun['categoria_ocupacional']), 36)
+        self.assertEqual(len(rerun['grupo_ocupacional']), 36)
+
+    def test_streaming_matches_full_pipeline(self):
+        """Test del modo por bloques: mismo resultado, con duplicados entre bloques."""
+        raw_path = self.base_path / 'data' / 'raw' / 'ocupados_categoria_ocupacional.csv'
+        raw_df = pd.read_csv(raw_path)
+        pd.concat([raw_df, raw_df.head(5)]).to_csv(raw_path, index=False)
+        
+        full = ETLPipeline(self.base_path).run_full_pipeline(force=True)
+        
+        pipeline = ETLPipeline(self.base_path)
+        row_counts = pipeline.run_streaming_pipeline(chunksize=7, force=True)
+        streamed = pipeline.store.read('categoria_ocupacional_processed')
+        
+        self.assertEqual(row_counts['categoria_ocupacional'], len(raw_df))
+        pd.testing.assert_frame_equal(
+            streamed,
+            full['categoria_ocupacional'].reset_index(drop=True),
+            check_categorical=False
+        )
+    
+    def test_streaming_dedup_across_chunks_with_markers(self):
+        """Test de duplicados en bloques distintos, uno de ellos con un marcador no numérico."""
+        raw_path = self.base_path / 'data' / 'raw' / 'ocupados_categoria_ocupacional.csv'
+        raw_df = pd.read_csv(raw_path)
+        raw_df['Value'] = raw_df['Value'].astype(object)
+        raw_df.loc[len(raw_df) - 1, 'Value'] = '..'
+        # El primer bloque es float64; el último (object) repite sus filas
+        pd.concat([raw_df, raw_df.head(3)]).to_csv(raw_path, index=False)
+        
+        full = ETLPipeline(self.base_path).run_full_pipeline(force=True)
+        
+        pipeline = ETLPipeline(self.base_path)
+        row_counts = pipeline.run_streaming_pipeline(chunksize=7, force=True)
+        
+        self.assertEqual(row_counts['categoria_ocupacional'], len(raw_df) - 1)
+        self.assertEqual(row_counts['categoria_ocupacional'], len(full['categoria_ocupacional']))
+    
+    def test_runs_publish_versioned_snapshots(self):
+        """Test de publicación atómica de snapshots, retención y rollback."""
+        pipeline = ETLPipeline(self.base_path)
+        pipeline.store.snapshots.keep = 2
+        pipeline.run_full_pipeline()
+        first_id = pipeline.store.snapshots.current_id()
+        reader = pipeline.store.pinned()
+        
+        # Un lector fijado sigue viendo su snapshot aunque se publique otro
+        write_raw_files(self.base_path, periods=5)
+        pipeline.run_full_pipeline()
+        second_id = pipeline.store.snapshots.current_id()
+        self.assertNotEqual(first_id, second_id)
+        self.assertLess(
+            len(reader.read_dataset('categoria_ocupacional')),
+            len(pipeline.store.read_dataset('categoria_ocupacional'))
+        )
+        
+        # Los archivos sin cambios se enlazan en el nuevo snapshot
+        snapshot_files = {path.name for path in pipeline.store.data_dir.iterdir()}
+        self.assertIn('grupo_ocupacional_processed.parquet', snapshot_files)
+        
+        # Una ejecución fallida no publica nada
+        with mock.patch.object(pipeline, '_save_cube', side_effect=RuntimeError('falla')):
+            with self.assertRaises(RuntimeError):
+                pipeline.run_full_pipeline(force=True)
+        self.assertEqual(pipeline.store.snapshots.current_id(), second_id)
+        
+        write_raw_files(self.base_path, periods=6)
+        pipeline.run_full_pipeline()
+        self.assertEqual(len(pipeline.store.snapshots.list()), 2)
+        self.assertNotIn(first_id, pipeline.store.snapshots.list())
+        self.assertEqual(pipeline.store.snapshots.rollback(), second_id)
+
+    def test_star_layout_reads_like_wide(self):
+        """Test del esquema estrella: hechos con claves enteras y descripciones por dimensión."""
+        full = ETLPipeline(self.base_path).run_full_pipeline()
+
+        with mock.patch.dict('os.environ', {'STORAGE_LAYOUT': 'star'}):
+            pipeline = ETLPipeline(self.base_path)
+            pipeline.run_streaming_pipeline(chunksize=7)
+        store = pipeline.store
+
+        fact = store._read_frame('grupo_ocupacional_processed')
+        self.assertEqual(
+            list(fact.columns),
+            ['trimestre_id', 'region_id', 'grupo_id', 'sexo_id', 'valor', 'fuente', 'periodo']
+        )
+        self.assertEqual(len(store.read_dimensions('grupo_ocupacional_processed')['sexo']), 3)
+
+        for key in ('categoria_ocupacional', 'grupo_ocupacional'):
+            pd.testing.assert_frame_equal(
+                store.read_dataset(key), full[key].reset_index(drop=True), check_categorical=False
+            )
+        projected = store.read_dataset('categoria_ocupacional', columns=['sexo_desc', 'valor'])
+        self.assertEqual(list(projected.columns), ['sexo_desc', 'valor'])
+        self.assertIsInstance(projected['sexo_desc'].dtype, pd.CategoricalDtype)
+
+
+class TestOcupacionSchema(unittest.TestCase):
+    """Tests del esquema explícito de tipos."""
+    
+    def setUp(self):
+        self.tmp_dir, self.base_path = raw_workspace()
+        self.path_manager = PathManager(self.base_path)
+    
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+    
+    def test_processed_dtypes(self):
+        """Test de tipos categóricos y enteros compactos en la salida."""
+        pipeline = ETLPipeline(self.base_path)
+        for dataset_key, processor in pipeline.processors.items():
+            self.assertEqual(processor.schema.processed_dtypes, PROCESSED_DTYPES)
+            
+            raw_df = processor.extract(pipeline.RAW_FILES[dataset_key])
+            self.assertIsInstance(raw_df['DTI_CL_SEXO'].dtype, pd.CategoricalDtype)
+            self.assertEqual(raw_df['Value'].dtype, 'float64')
+            
+            df = processor.transform(raw_df)
+            self.assertEqual({column: str(dtype) for column, dtype in df.dtypes.items()},
+                             PROCESSED_DTYPES)
+    
+    def test_value_dtype_varies_between_chunks(self):
+        """Test de bloques con y sin marcadores no numéricos: mismo resultado tipado."""
+        processor = CategoriaOcupacionalProcessor(self.path_manager)
+        raw_path = self.base_path / 'data' / 'raw' / ETLPipeline.RAW_FILES['categoria_ocupacional']
+        raw_df = pd.read_csv(raw_path)
+        raw_df['Value'] = raw_df['Value'].astype(object)
+        raw_df.loc[len(raw_df) - 1, 'Value'] = '..'
+        raw_df.to_csv(raw_path, index=False)
+        
+        chunks = list(processor.extract_chunks(ETLPipeline.RAW_FILES['categoria_ocupacional'], chunksize=7))
+        self.assertEqual({str(chunk['Value'].dtype) for chunk in chunks}, {'float64', 'object'})
+        
+        transformed = [processor.transform(chunk) for chunk in chunks]
+        for df in transformed:
+            self.assertEqual({column: str(dtype) for column, dtype in df.dtypes.items()},
+                             PROCESSED_DTYPES)
+        full = processor.transform(processor.extract(ETLPipeline.RAW_FILES['categoria_ocupacional']))
+        self.assertEqual(sorted(pd.concat(transformed)['valor']), sorted(full['valor']))
+        self.assertEqual(len(full), len(raw_df) - 1)
+    
+    def test_fused_transform_filters_in_one_pass(self):
+        """Test de la transformación fusionada: máscara combinada, sin copias encadenadas."""
+        processor = CategoriaOcupacionalProcessor(self.path_manager, track_memory=True)
+        raw_df = processor.extract(ETLPipeline.RAW_FILES['categoria_ocupacional'])
+        raw_df = pd.concat([raw_df, raw_df.head(2)], ignore_index=True)
+        raw_df['Value'] = raw_df['Value'].astype(object)
+        raw_df.loc[2, 'Value'] = 'x'
+        raw_df.loc[3, 'Value'] = '-5'
+        
+        with warnings.catch_warnings():
+            warnings.simplefilter('error', pd.errors.SettingWithCopyWarning)
+            df = processor.transform(raw_df)
+        
+        # Duplicados, valores no numéricos y negativos se descartan juntos
+        self.assertEqual(len(df), len(raw_df) - 4)
+        self.assertEqual(df['fuente'].cat.categories.tolist(), ['categoria_ocupacional'])
+        self.assertEqual(df['fuente'].cat.codes.dtype, 'int8')
+        self.assertEqual(
+            set(processor.memory_tracker.stages),
+            {'duplicados', 'valor', 'renombrado', 'validacion', 'filtrado'}
+        )
+    
+    def test_key_deduplication_modes(self):
+        """Test de deduplicación por columnas de código con resolución de conflictos."""
+        processor = CategoriaOcupacionalProcessor(self.path_manager)
+        raw_df = processor.extract(ETLPipeline.RAW_FILES['categoria_ocupacional'])
+        # Misma clave que la fila 0, con otra descripción y otro valor
+        conflict = raw_df.head(1).copy()
+        conflict['Sexo'] = 'Total'
+        conflict['Value'] = 999.0
+        raw_df = pd.concat([raw_df, conflict], ignore_index=True)
+
+        # Por fila completa la fila modificada no es un duplicado
+        self.assertEqual(len(processor.transform(raw_df)), len(raw_df))
+
+        for keep, expected in (('first', 10), ('last', 999)):
+            processor = CategoriaOcupacionalProcessor(self.path_manager, dedup_mode='key', dedup_keep=keep)
+            df = processor.transform(raw_df)
+            self.assertEqual(len(df), len(raw_df) - 1)
+            first_key = (df['trimestre_movil'] == '2018-V01') & (df['grupo_ocupacional_code'] == 'ICSE93_T') \
+                & (df['sexo_code'] == '_T')
+            self.assertEqual(df.loc[first_key, 'valor'].tolist(), [expected])
+
+        processor = CategoriaOcupacionalProcessor(self.path_manager, dedup_mode='key', dedup_keep='error')
+        with self.assertRaises(ValueError):
+            processor.transform(raw_df)
+
+        # Por bloques, el conflicto se detecta también entre bloques distintos
+        raw_df.to_csv(self.base_path / 'data' / 'raw' / 'conflicto.csv', index=False)
+        with self.assertRaises(ValueError):
+            processor.stream('conflicto.csv', 'conflicto', chunksize=5)
+
+    def test_rows_sorted_by_period(self):
+        """Test del índice de período: filas y categorías en orden cronológico."""
+        processor = CategoriaOcupacionalProcessor(self.path_manager)
+        raw_df = processor.extract(ETLPipeline.RAW_FILES['categoria_ocupacional'])
+        # Descripciones cuyo orden lexicográfico no es el temporal
+        months = ['ene', 'feb', 'mar', 'abr']
+        raw_df['Trimestre Móvil'] = raw_df['DTI_CL_TRIMESTRE_MOVIL'].map(
+            lambda code: f"{months[int(code[-2:]) - 1]} 2018"
+        ).astype('category')
+
+        df = processor.transform(raw_df.iloc[::-1])
+
+        self.assertTrue(df['periodo'].is_monotonic_increasing)
+        self.assertEqual(df['periodo'].iloc[0], 2018 * 12)
+        self.assertEqual(df['trimestre_movil_desc'].cat.categories.tolist(),
+                         ['ene 2018', 'feb 2018', 'mar 2018', 'abr 2018'])
+
+        cube = OcupacionCube.build(df)
+        line = cube.query(['trimestre_movil_desc'])
+        self.assertEqual(line['trimestre_movil_desc'].tolist(), ['ene 2018', 'feb 2018', 'mar 2018', 'abr 2018'])
+
+    def test_concat_keeps_categoricals(self):
+        """Test de concatenación sin perder las columnas categóricas."""
+        results = ETLPipeline(self.base_path).run_full_pipeline()
+        unified = concat_datasets([results['categoria_ocupacional'], results['grupo_ocupacional']])
+        
+        self.assertIsInstance(unified['fuente'].dtype, pd.CategoricalDtype)
+        self.assertEqual(set(unified['fuente'].cat.categories),
+                         {'categoria_ocupacional', 'grupo_ocupacional_ciuo88'})
+
+
 class TestDataModels(unittest.TestCase):
     """Tests para los modelos de datos."""
     
@@ -100,5 +420,84 @@ class TestDataModels(unittest.TestCase):
             )
 
 
+class TestOcupacionCube(unittest.TestCase):
+    """Tests del cubo de agregados materializado."""
+    
+    def setUp(self):
+        self.tmp_dir, self.base_path = raw_workspace()
+        self.pipeline = ETLPipeline(self.base_path)
+        self.unified = self.pipeline.run_full_pipeline()['unified']
+    
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+    
+    def test_query_matches_groupby(self):
+        """Test de consultas del cubo contra groupby sobre las filas."""
+        from src.etl.cube import OcupacionCube
+        from src.etl.storage import CUBE_FILE
+        
+        cube = OcupacionCube.from_frame(self.pipeline.store.read(CUBE_FILE))
+        filters = {'sexo_code': ['M', 'F'], 'fuente': ['categoria_ocupacional']}
+        
+        rows = self.unified[self.unified['sexo_code'].isin(['M', 'F'])
+                            & (self.unified['fuente'] == 'categoria_ocupacional')]
+        expected = (rows.groupby('grupo_ocupacional_desc', observed=True)['valor']
+                    .sum().reset_index())
+        result = cube.query(['grupo_ocupacional_desc'], filters=filters)
+        
+        pd.testing.assert_frame_equal(
+            result.sort_values('grupo_ocupacional_desc').reset_index(drop=True),
+            expected.sort_values('grupo_ocupacional_desc').reset_index(drop=True),
+            check_dtype=False,
+            check_categorical=False
+        )
+        self.assertEqual(cube.total(), self.unified['valor'].sum())
+        self.assertEqual(cube.nunique('grupo_ocupacional_desc'),
+                         self.unified['grupo_ocupacional_desc'].nunique())
+
+    def test_comparison_chart_splits_combined_cube_by_fuente(self):
+        """Test de la comparación sobre el cubo combinado, una consulta por fuente."""
+        from src.etl.cube import OcupacionCube
+        from src.etl.storage import CUBE_FILE
+        from src.visualization.charts import OcupacionVisualizer
+
+        cube = OcupacionCube.from_frame(self.pipeline.store.read(CUBE_FILE))
+        visualizer = OcupacionVisualizer()
+        by_fuente = visualizer.create_comparison_chart(cube)
+        by_dataset = visualizer.create_comparison_chart(
+            self.unified[self.unified['fuente'] == 'categoria_ocupacional'],
+            self.unified[self.unified['fuente'] == 'grupo_ocupacional_ciuo88']
+        )
+
+        self.assertEqual([trace.name for trace in by_fuente.data],
+                         ['Categoría Ocupacional', 'Grupo Ocupacional CIUO88'])
+        for fuente_trace, dataset_trace in zip(by_fuente.data, by_dataset.data):
+            self.assertEqual(dict(zip(fuente_trace.x, fuente_trace.y)),
+                             dict(zip(dataset_trace.x, dataset_trace.y)))
+
+
+class TestColumnarValidator(unittest.TestCase):
+    """Tests del validador vectorizado."""
+    
+    def test_rules_match_ocupacion_record(self):
+        """Test de reglas de valor, trimestre y consistencia código-descripción."""
+        from src.models.validation import ColumnarValidator
+        
+        df = pd.DataFrame({
+            'trimestre_movil': pd.Categorical(['2018-V06', '2018-V06', '2018', '2018-V07']),
+            'sexo_code': ['M', 'M', 'F', 'M'],
+            'sexo_desc': ['Hombres', 'Hombres', 'Mujeres', 'Mujeres'],
+            'valor': [10, -1, 5, 3]
+        })
+        
+        report = ColumnarValidator().validate(df)
+        
+        self.assertFalse(report.is_valid)
+        self.assertEqual(report.violations['valor_negativo'].tolist(), [1])
+        self.assertEqual(report.violations['trimestre_invalido'].tolist(), [2])
+        self.assertEqual(report.violations['codigo_inconsistente:sexo_code'].tolist(), [3])
+        self.assertEqual(report.invalid_mask().tolist(), [False, True, True, False])
+
+
 if __name__ == '__main__':
     unittest.main()
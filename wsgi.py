@@ -0,0 +1,24 @@
+"""
+Punto de entrada WSGI del dashboard para servidores de producción.
+
+Uso:
+    gunicorn wsgi:server --workers 4 --preload --bind 0.0.0.0:8050
+
+Cada worker lee los datos procesados por memory-map desde la misma copia
+Arrow (solo lectura) y hereda del proceso maestro los índices de filtros
+ya construidos (``--preload``), por lo que la memoria no crece con la
+cantidad de workers. El ETL debe ejecutarse antes (``python main.py --mode etl``).
+La ruta base se toma de la variable de entorno BASE_PATH.
+"""
+
+import os
+import sys
+from pathlib import Path
+
+# Agregar el directorio src al path
+sys.path.append(str(Path(__file__).parent / "src"))
+
+from src.visualization.dashboard import create_production_dashboard
+
+dashboard = create_production_dashboard(os.getenv('BASE_PATH') or str(Path(__file__).parent))
+server = dashboard.server